@@ -1,8 +1,6 @@
 # -*- encoding: utf-8 -*-
 
 
-import os
-
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from importlib import import_module
@@ -20,32 +18,111 @@ def register_blueprints(app):
         app.register_blueprint(module.blueprint)
 
 
-def configure_database(app):
-    @app.before_request
-    def initialize_database():
-        try:
-            db.create_all()
-        except Exception as e:
+def configure_pages(app):
+    # Registro de las plantillas de pages/ que sirve route_template (búsqueda O(1) por ruta)
+    from apps.utils.page_registry import build_page_registry
+    pages = build_page_registry(app)
+    app.logger.info('> Páginas registradas: {}'.format(len(pages) // 2))
+
 
-            print('> Error: DBMS Exception: ' + str(e))
+def register_commands(app):
+    from apps.commands import register_commands as register_cli_commands
+    register_cli_commands(app)
 
-            # fallback to SQLite
-            basedir = os.path.abspath(os.path.dirname(__file__))
-            app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir,
-                                                                                                          'db.sqlite3')
 
-            print('> Fallback to SQLite ')
-            db.create_all()
+def configure_database(app):
+    # Registrar los modelos en los metadatos (db.create_all / flask db migrate)
+    from apps.pages import models  # noqa: F401
+
+    # Esquema creado una vez al arrancar (no en cada petición); el motor conecta al primer uso
+    from apps.utils.database import bootstrap_database
+    bootstrap_database(app)
 
     @app.teardown_request
     def shutdown_session(exception=None):
         db.session.remove()
 
 
+def configure_templates(app):
+    # Caché de bytecode de Jinja en disco, compartida entre workers y reinicios
+    from apps.utils.template_cache import configure_template_cache
+    configure_template_cache(app)
+
+
+def warm_templates(app):
+    # Precompilar todas las plantillas al arrancar (JINJA_PRECOMPILE)
+    from apps.utils.template_cache import warm_templates as precompile
+    precompile(app)
+
+
+def register_template_helpers(app):
+    # Funciones disponibles en todas las plantillas
+    from apps.utils.assets import asset_bundle, asset_url, critical_css
+    from apps.utils.blog_images import blog_image
+    from apps.utils.static_images import picture
+    app.add_template_global(asset_bundle)
+    app.add_template_global(asset_url)
+    app.add_template_global(critical_css)
+    app.add_template_global(blog_image)
+    app.add_template_global(picture)
+
+
+def configure_static(app):
+    # Entrega de los bytes: sendfile de gunicorn o X-Accel-Redirect de nginx (STATIC_SERVE_MODE)
+    from apps.utils.static_serving import register_static_offload
+    register_static_offload(app)
+
+    # WebP/AVIF en lugar de PNG/JPEG cuando el navegador los acepta (flask assets images)
+    from apps.utils.static_images import register_static_negotiation
+    register_static_negotiation(app)
+
+    # Versiones .br/.gz de los archivos de texto (flask assets compress)
+    from apps.utils.compression import register_static_compression
+    register_static_compression(app)
+
+    # Paquetes CSS/JS con hash (flask assets build): Cache-Control inmutable
+    from apps.utils.assets import register_asset_caching
+    register_asset_caching(app)
+
+    # CSS crítico en línea según la plantilla de la página (flask assets build)
+    from apps.utils.critical_css import register_critical_css
+    register_critical_css(app)
+
+
+def configure_compression(app):
+    # gzip/Brotli al vuelo para HTML y JSON (antes que configure_http_cache: se ejecuta después)
+    from apps.utils.compression import register_compression
+    register_compression(app)
+
+
+def configure_http_cache(app):
+    # ETag / 304 y Cache-Control por ruta (después de Flask-Minify: el ETag es del HTML final)
+    from apps.utils.http_cache import register_http_cache
+    register_http_cache(app)
+
+
+def configure_blog_cache(app):
+    # Precalentar la caché del blog con la última copia buena guardada en disco
+    from apps.utils.blog_api import warm_cache_from_snapshot
+
+    loaded = warm_cache_from_snapshot()
+    if loaded:
+        app.logger.info('> Blog cache: {} entradas cargadas desde el snapshot'.format(loaded))
+
+
 def create_app(config):
     app = Flask(__name__)
     app.config.from_object(config)
+    configure_templates(app)
     register_extensions(app)
     register_blueprints(app)
+    configure_pages(app)
+    register_commands(app)
+    register_template_helpers(app)
+    configure_static(app)
     configure_database(app)
+    configure_compression(app)
+    configure_http_cache(app)
+    configure_blog_cache(app)
+    warm_templates(app)
     return app
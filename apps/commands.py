@@ -0,0 +1,220 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Comandos de la CLI de Flask (`flask <grupo> <comando>`).
+"""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+from apps import db
+
+
+blog_cli = AppGroup('blog', help='Réplica local del blog.')
+
+
+@blog_cli.command('sync')
+@click.option('--full', is_flag=True, help='Revisar el detalle de todos los posts, no solo los modificados.')
+def blog_sync(full):
+    """
+    Sincroniza la réplica local de posts con la API del Blog.
+    """
+    from apps.utils.blog_mirror import sync_posts
+
+    try:
+        stats = sync_posts(full=full)
+    except Exception as e:
+        db.session.rollback()
+        raise click.ClickException('Error al sincronizar el blog: ' + str(e))
+
+    click.echo('> Blog sync: ' + ', '.join('{}={}'.format(k, v) for k, v in stats.items()))
+
+
+@blog_cli.command('reindex')
+def blog_reindex():
+    """
+    Reconstruye el índice de búsqueda full-text del blog.
+    """
+    from apps.utils.blog_mirror import rebuild_search_index
+
+    try:
+        indexed = rebuild_search_index()
+    except Exception as e:
+        raise click.ClickException('Error al reindexar el blog: ' + str(e))
+
+    click.echo('> Blog reindex: {} posts indexados'.format(indexed))
+
+
+@click.command('freeze')
+@click.option('--output', default=None, help='Directorio de salida (por defecto FREEZE_DIR).')
+@click.option('--no-blog', is_flag=True, help='No exportar el listado ni el detalle de los posts.')
+@click.option('--clear', is_flag=True, help='Eliminar la exportación: todo vuelve a servirse desde Flask.')
+@with_appcontext
+def freeze(output, no_blog, clear):
+    """
+    Exporta las páginas públicas a HTML estático para servirlas desde nginx.
+    """
+    from apps.utils.freeze import FREEZE_DIR, freeze_site, clear_frozen
+
+    output = output or FREEZE_DIR
+    if clear:
+        clear_frozen(output)
+        click.echo('> Freeze: exportación eliminada de ' + output)
+        return
+
+    try:
+        manifest = freeze_site(current_app._get_current_object(), output, blog=not no_blog)
+    except Exception as e:
+        raise click.ClickException('Error al exportar las páginas: ' + str(e))
+
+    for route, status in sorted(manifest['skipped'].items()):
+        click.echo('  - {} omitida ({})'.format(route, status))
+    click.echo('> Freeze: {} páginas exportadas en {}{}'.format(
+        len(manifest['pages']), output, '' if manifest['minified'] else ' (sin minificar: DEBUG activo)'))
+
+
+assets_cli = AppGroup('assets', help='Recursos estáticos optimizados.')
+
+
+@assets_cli.command('images')
+@click.option('--avif', is_flag=True, help='Generar también AVIF (requiere soporte AVIF en Pillow).')
+@click.option('--widths', default=None, help='Anchos para srcset separados por comas (por defecto IMAGE_BUILD_WIDTHS).')
+def assets_images(avif, widths):
+    """
+    Genera versiones WebP/AVIF de static/img y su manifiesto.
+    """
+    from apps.utils.static_images import IMAGE_BUILD_WIDTHS, build_images
+
+    try:
+        widths = [int(w) for w in widths.split(',') if w.strip()] if widths else IMAGE_BUILD_WIDTHS
+    except ValueError:
+        raise click.BadParameter('debe ser una lista de enteros', param_hint='--widths')
+
+    try:
+        manifest = build_images(current_app.static_folder, avif=avif, widths=widths)
+    except Exception as e:
+        raise click.ClickException('Error al optimizar las imágenes: ' + str(e))
+
+    for rel, error in sorted(manifest['errors'].items()):
+        click.echo('  - {} omitida ({})'.format(rel, error))
+
+    original = sum(entry['bytes'] for entry in manifest['images'].values())
+    for fmt in manifest['formats']:
+        optimized = [entry['formats'][fmt]['full_bytes'] for entry in manifest['images'].values()
+                     if fmt in entry['formats']]
+        saved = sum(entry['bytes'] for entry in manifest['images'].values() if fmt in entry['formats']) - sum(optimized)
+        click.echo('> {}: {} imágenes, {} KB menos'.format(fmt.upper(), len(optimized), saved // 1024))
+    click.echo('> Assets images: {} imágenes optimizadas ({} KB originales)'.format(
+        len(manifest['images']), original // 1024))
+
+
+@assets_cli.command('fonts')
+def assets_fonts():
+    """
+    Genera el subconjunto de Font Awesome con los iconos usados en las plantillas.
+    """
+    from apps.utils.font_subset import build_font_subset
+
+    try:
+        report = build_font_subset(current_app._get_current_object())
+    except Exception as e:
+        raise click.ClickException('Error al generar el subconjunto de Font Awesome: ' + str(e))
+
+    for name in report['unknown_icons']:
+        click.echo('  - {} no existe en fontawesome.css'.format(name))
+    for font, data in sorted(report['fonts'].items()):
+        click.echo('  {:<24} {:>8} KB -> {:>5} KB ({} glifos)'.format(
+            font, data['original_bytes'] // 1024, data['subset_bytes'] // 1024, data['glyphs']))
+    click.echo('  {:<24} {:>8} KB -> {:>5} KB'.format(
+        'fontawesome.css', report['css']['original_bytes'] // 1024, report['css']['subset_bytes'] // 1024))
+    click.echo('> Assets fonts: {} iconos, estilos {}, {} KB menos'.format(
+        len(report['icons']), ', '.join(report['styles']),
+        (report['original_bytes'] - report['subset_bytes']) // 1024))
+
+
+@assets_cli.command('build')
+@click.option('--no-minify', is_flag=True, help='Concatenar sin minificar (para depurar los paquetes).')
+@click.option('--no-critical', is_flag=True, help='No calcular el CSS crítico de las plantillas.')
+def assets_build(no_minify, no_critical):
+    """
+    Genera los paquetes CSS/JS con hash, el CSS crítico y el manifiesto en static/dist.
+    """
+    from apps.utils.assets import ASSETS_DIST_DIR, build_assets
+
+    try:
+        manifest = build_assets(current_app._get_current_object(), minify=not no_minify, critical=not no_critical)
+    except Exception as e:
+        raise click.ClickException('Error al generar los paquetes: ' + str(e))
+
+    for name, entry in sorted(manifest['bundles'].items()):
+        click.echo('  {:<14} {:>2} archivos {:>6} KB -> {:>5} KB  {}'.format(
+            name, len(entry['sources']), entry['source_bytes'] // 1024, entry['bytes'] // 1024, entry['file']))
+    for template, css in sorted(manifest['critical'].items()):
+        click.echo('  {:<32} {:>5} KB de CSS crítico'.format(template, len(css) // 1024))
+    for template, error in sorted(manifest['critical_errors'].items()):
+        click.echo('  - {} sin CSS crítico ({})'.format(template, error))
+    click.echo('> Assets build: {} paquetes en static/{}'.format(len(manifest['bundles']), ASSETS_DIST_DIR))
+
+
+@assets_cli.command('compress')
+def assets_compress():
+    """
+    Genera las versiones .gz/.br de los archivos de texto de static.
+    """
+    from apps.utils.compression import compress_static
+
+    try:
+        stats = compress_static(current_app.static_folder)
+    except Exception as e:
+        raise click.ClickException('Error al comprimir los archivos estáticos: ' + str(e))
+
+    original = stats['original_bytes']
+    for encoding in ('gzip', 'br'):
+        if encoding in stats:
+            click.echo('  {:<5} {:>6} KB -> {:>6} KB'.format(encoding, original // 1024, stats[encoding] // 1024))
+    click.echo('> Assets compress: {} archivos, {} versiones nuevas'.format(stats['files'], stats['written']))
+
+
+@assets_cli.command('templates')
+def assets_templates():
+    """
+    Compila todas las plantillas en la caché de bytecode de Jinja (JINJA_CACHE_DIR).
+    """
+    from apps.utils.template_cache import JINJA_CACHE_DIR, precompile_templates
+
+    if not JINJA_CACHE_DIR:
+        raise click.ClickException('La caché de plantillas está desactivada (JINJA_CACHE_DIR vacío)')
+
+    result = precompile_templates(current_app._get_current_object())
+    for name, error in sorted(result['errors'].items()):
+        click.echo('  - {} omitida ({})'.format(name, error))
+    click.echo('> Assets templates: {} plantillas, {} compiladas en {} s'.format(
+        result['templates'], result['compiled'], result['seconds']))
+
+
+database_cli = AppGroup('database', help='Esquema de la base de datos.')
+
+
+@database_cli.command('create')
+def database_create():
+    """
+    Crea las tablas que falten (con DB_CREATE_ON_STARTUP=False no se crean al arrancar).
+    """
+    from apps.utils.database import create_schema
+
+    try:
+        status = create_schema(current_app._get_current_object())
+    except Exception as e:
+        raise click.ClickException('Error al crear el esquema: ' + str(e))
+
+    if status['fallback']:
+        click.echo('  - DBMS no disponible, se usa SQLite ({})'.format(status['error']))
+    click.echo('> Database create: esquema listo en {} s'.format(status['seconds']))
+
+
+def register_commands(app):
+    app.cli.add_command(blog_cli)
+    app.cli.add_command(database_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(freeze)
@@ -30,6 +30,12 @@ class Config(object):
     RECAPTCHA_SECRET_KEY = os.getenv('RECAPTCHA_SECRET_KEY', None)
     RECAPTCHA_MIN_SCORE = float(os.getenv('RECAPTCHA_MIN_SCORE', '0.5'))        
 
+    # Token para consultar /debug-stats fuera de modo debug (cabecera X-Debug-Token)
+    DEBUG_STATS_TOKEN = os.getenv('DEBUG_STATS_TOKEN', None)
+
+    # Cache-Control de los archivos de static en segundos (los de dist/ son inmutables)
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.getenv('STATIC_MAX_AGE', '604800'))
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     DB_ENGINE   = os.getenv('DB_ENGINE'   , None)
@@ -79,6 +85,9 @@ class ProductionConfig(Config):
 class DebugConfig(Config):
     DEBUG = True
 
+    # Revalidar siempre los archivos estáticos mientras se editan
+    SEND_FILE_MAX_AGE_DEFAULT = None
+
 # Load all possible configurations
 config_dict = {
     'Production': ProductionConfig,
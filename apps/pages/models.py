@@ -0,0 +1,126 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Modelos locales: réplica de los posts publicados de la API del Blog.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from apps import db
+
+
+def parse_api_datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    Convierte una fecha ISO 8601 de la API (ej: '2025-01-15T10:00:00.000Z') a datetime UTC sin tz.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return parsed
+
+
+def format_api_datetime(value: Optional[datetime]) -> Optional[str]:
+    """
+    Formatea un datetime UTC igual que la API del Blog.
+    """
+    if value is None:
+        return None
+    return value.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(value.microsecond // 1000)
+
+
+class Post(db.Model):
+    """
+    Post publicado, sincronizado desde la API del Blog (mismo ID que en la API).
+    """
+
+    __tablename__ = 'blog_posts'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    slug = db.Column(db.String(255), nullable=False, unique=True, index=True)
+    title = db.Column(db.String(255), nullable=False)
+    excerpt = db.Column(db.Text)
+    author = db.Column(db.String(100))
+    tag = db.Column(db.String(50), index=True)
+    published_at = db.Column(db.DateTime, index=True)
+    header_image_url = db.Column(db.String(500))
+    content_html = db.Column(db.Text)
+    is_published = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, index=True)
+
+    # Huella del resumen del listado: si no cambia, no hace falta pedir el detalle
+    summary_checksum = db.Column(db.String(40))
+    synced_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_blog_posts_published', 'is_published', 'published_at'),
+        db.Index('ix_blog_posts_tag_published', 'tag', 'is_published', 'published_at'),
+    )
+
+    def update_from_api(self, data: Dict) -> None:
+        """
+        Copia los campos de la representación JSON de la API.
+        """
+        self.slug = data.get('slug', self.slug)
+        self.title = data.get('title', self.title)
+        self.excerpt = data.get('excerpt', self.excerpt)
+        self.author = data.get('author', self.author)
+        self.tag = data.get('tag', self.tag)
+        self.header_image_url = data.get('headerImageUrl', self.header_image_url)
+        self.is_published = data.get('isPublished', True)
+        if 'publishedAt' in data:
+            self.published_at = parse_api_datetime(data.get('publishedAt'))
+        if 'contentHtml' in data:
+            self.content_html = data.get('contentHtml')
+        if 'createdAt' in data:
+            self.created_at = parse_api_datetime(data.get('createdAt'))
+        if 'updatedAt' in data:
+            self.updated_at = parse_api_datetime(data.get('updatedAt'))
+        self.synced_at = datetime.utcnow()
+
+    def to_dict(self, full: bool = True) -> Dict:
+        """
+        Representación con el mismo formato que la API (camelCase).
+
+        Args:
+            full: Si es False, solo los campos resumidos del listado (sin contentHtml)
+        """
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'slug': self.slug,
+            'excerpt': self.excerpt,
+            'author': self.author,
+            'tag': self.tag,
+            'publishedAt': format_api_datetime(self.published_at),
+            'headerImageUrl': self.header_image_url,
+            'isPublished': self.is_published,
+        }
+        if full:
+            data['contentHtml'] = self.content_html
+            data['createdAt'] = format_api_datetime(self.created_at)
+            data['updatedAt'] = format_api_datetime(self.updated_at)
+        return data
+
+    def __repr__(self):
+        return '<Post {}: {}>'.format(self.id, self.slug)
+
+
+class BlogSyncState(db.Model):
+    """
+    Estado de la sincronización de la réplica local (una sola fila, id = 1).
+    """
+
+    __tablename__ = 'blog_sync_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_sync_at = db.Column(db.DateTime)
+    last_full_sync_at = db.Column(db.DateTime)
+    max_updated_at = db.Column(db.DateTime)
+    posts = db.Column(db.Integer, default=0)
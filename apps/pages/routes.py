@@ -1,13 +1,29 @@
 # -*- encoding: utf-8 -*-
 
 
+import hmac
 import os
 from apps.pages import blueprint
-from flask import render_template, request, current_app, send_from_directory, abort, session, redirect, url_for, flash
+from flask import render_template, request, current_app, send_file, abort, session, redirect, url_for, flash
 from jinja2 import TemplateNotFound
-from apps.utils.client_portal_api import api_post, api_get, api_put, get_client_portal_token, get_client_portal_user
-from apps.utils.blog_api import get_posts, get_post_by_id, get_post_by_slug, create_post, update_post, delete_post
+from apps.utils.client_portal_api import api_post, api_get, api_put, get_client_portal_token, get_client_portal_user, get_portal_flight_stats, get_portal_breaker_stats, get_portal_cache_stats
+from apps.utils.blog_api import get_posts, get_post_by_id, create_post, update_post, delete_post, get_blog_cache_stats, get_post_index_stats, get_blog_flight_stats, get_blog_breaker_stats, get_tag_index_stats, get_blog_revalidation_stats
+from apps.utils.blog_mirror import get_public_posts, get_public_post, get_public_tags, get_public_header_image, mirror_record_post, mirror_forget_post
+from apps.utils.blog_search import search_posts, search_record_post, search_forget_post, get_search_stats
 from apps.utils.recaptcha import verify_recaptcha
+from apps.utils.http_client import get_pool_stats
+from apps.utils.page_cache import cached_page, not_found_page, get_page_cache_stats
+from apps.utils.freeze import unfreeze_blog
+from apps.utils.http_cache import page_etag, not_modified
+from apps.utils.blog_content import get_post_content, get_content_cache_stats
+from apps.utils.assets import get_asset_stats
+from apps.utils.compression import get_compression_stats
+from apps.utils.static_serving import serve_static
+from apps.utils.page_registry import resolve_page, resolve_static_alias
+from apps.utils.database import get_database_status
+from apps.utils.template_cache import get_template_stats
+from apps.utils.blog_images import BLOG_IMAGE_WIDTHS, ImageUnavailable, images_enabled, known_source, remember_source, source_version, preferred_format, get_variant, mimetype_for, get_image_cache_stats
+from apps.pages.models import parse_api_datetime
 from flask import jsonify
 
 
@@ -20,7 +36,7 @@ def index():
     latest_posts = []
     try:
         # Obtener los últimos 2-3 posts para la home
-        response_json, status_code = get_posts(page=1, limit=3)
+        response_json, status_code = get_public_posts(page=1, limit=3)
         if status_code == 200:
             latest_posts = response_json.get('data', [])
     except Exception as e:
@@ -30,37 +46,41 @@ def index():
     return render_template('pages/index6.html', segment='index', latest_posts=latest_posts)
 
 
+# Map solution names to template files
+SOLUTION_TEMPLATES = {
+    'assistant360': 'assistant360.html',
+    'condominio360': 'condominio360.html',
+    'serviexpress': 'serviexpress.html',
+    'intela-grid': 'intela_grid.html',
+    'intela-smart': 'intela_smart.html',
+}
+
+
 @blueprint.route('/solutions/<solution_name>')
+@cached_page
 def solution_page(solution_name):
     try:
-        # Map solution names to template files
-        solution_templates = {
-            'assistant360': 'assistant360.html',
-            'condominio360': 'condominio360.html',
-            'serviexpress': 'serviexpress.html',
-            'intela-grid': 'intela_grid.html',
-            'intela-smart': 'intela_smart.html',
-        }
-        
-        template = solution_templates.get(solution_name)
+        template = SOLUTION_TEMPLATES.get(solution_name)
         if template:
             segment = get_segment(request)
             return render_template("pages/" + template, segment=segment)
         else:
-            return render_template('pages/page-404.html'), 404
+            return not_found_page()
     except TemplateNotFound:
-        return render_template('pages/page-404.html'), 404
+        return not_found_page()
     except:
         return render_template('pages/page-500.html'), 500
 
 
 @blueprint.route('/terminos')
+@cached_page
 def terminos():
     segment = get_segment(request)
     return render_template('pages/terminos.html', segment=segment)
 
 
 @blueprint.route('/privacidad')
+@cached_page
 def privacidad():
     segment = get_segment(request)
     return render_template('pages/privacidad.html', segment=segment)
@@ -164,7 +184,7 @@ def portal_clientes():
         if user_role == 'user':
             # Llamar a la API para obtener el cliente asociado al usuario
             # El endpoint /clients/me devuelve el cliente con sus productos incluidos
-            response_json, status_code = api_get('/clients/me')
+            response_json, status_code = api_get('/clients/me', use_cache=True)
             
             if status_code == 200:
                 # Éxito: mostrar información del cliente y sus productos
@@ -225,7 +245,7 @@ def portal_clientes():
             response_json, status_code = api_get('/clients', {
                 'page': page,
                 'limit': limit
-            })
+            }, use_cache=True)
             
             if status_code == 200:
                 # Éxito: mostrar el dashboard con los datos
@@ -426,7 +446,8 @@ def blog_list():
         limit = request.args.get('limit', 20, type=int)
         tag = request.args.get('tag', None)
         
-        response_json, status_code = get_posts(page=page, limit=limit, tag=tag)
+        # El panel de administración siempre consulta la API (sin caché)
+        response_json, status_code = get_posts(page=page, limit=limit, tag=tag, use_cache=False)
         
         if status_code == 200:
             posts = response_json.get('data', [])
@@ -515,6 +536,9 @@ def blog_new():
             response_json, status_code = create_post(post_data)
             
             if status_code == 201:
+                mirror_record_post(response_json)
+                search_record_post(response_json)
+                unfreeze_blog()
                 flash('Post creado exitosamente.', 'success')
                 return redirect(url_for('pages_blueprint.blog_list'))
             elif status_code == 401:
@@ -594,6 +618,9 @@ def blog_edit(post_id):
             response_json, status_code = update_post(post_id, post_data)
             
             if status_code == 200:
+                mirror_record_post(response_json)
+                search_record_post(response_json)
+                unfreeze_blog()
                 flash('Post actualizado exitosamente.', 'success')
                 return redirect(url_for('pages_blueprint.blog_list'))
             elif status_code == 401:
@@ -681,6 +708,9 @@ def blog_delete(post_id):
         response_json, status_code = delete_post(post_id)
         
         if status_code == 200:
+            mirror_forget_post(post_id)
+            search_forget_post(post_id)
+            unfreeze_blog()
             flash('Post eliminado exitosamente.', 'success')
         elif status_code == 401:
             session.pop('client_portal_token', None)
@@ -715,18 +745,25 @@ def blog_public():
         limit = request.args.get('limit', 9, type=int)
         tag = request.args.get('tag', None)
         
-        response_json, status_code = get_posts(page=page, limit=limit, tag=tag)
+        response_json, status_code = get_public_posts(page=page, limit=limit, tag=tag)
         
         if status_code == 200:
             posts = response_json.get('data', [])
             pagination = response_json.get('pagination', {})
+            tags = get_public_tags()
+            
+            # Huella del listado: si el cliente ya tiene esta versión, 304 sin renderizar
+            response_304 = not_modified(page_etag(posts, pagination, tags))
+            if response_304:
+                return response_304
             
             return render_template(
                 'pages/blog.html',
                 posts=posts,
                 pagination=pagination,
                 segment='blog',
-                tag=tag
+                tag=tag,
+                tags=tags
             )
         else:
             # Si hay error, mostrar página vacía con mensaje
@@ -751,88 +788,156 @@ def blog_public():
         )
 
 
+@blueprint.route('/blog/search')
+def blog_search():
+    """
+    Búsqueda full-text de posts (índice local, sin llamar a la API del Blog).
+    """
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    limit = min(request.args.get('limit', 9, type=int), 50)
+
+    if not query:
+        return redirect(url_for('pages_blueprint.blog_public'))
+
+    response_json, status_code = search_posts(query, page=page, limit=limit)
+
+    if status_code == 200:
+        return render_template(
+            'pages/blog.html',
+            posts=response_json.get('data', []),
+            pagination=response_json.get('pagination', {}),
+            segment='blog',
+            query=query
+        )
+
+    return render_template(
+        'pages/blog.html',
+        posts=[],
+        pagination={},
+        segment='blog',
+        query=query,
+        error='La búsqueda no está disponible en este momento.'
+    )
+
+
+@blueprint.route('/blog/search.json')
+def blog_search_json():
+    """
+    Búsqueda full-text de posts en formato JSON (mismo formato que el listado de la API).
+    """
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    limit = min(request.args.get('limit', 9, type=int), 50)
+
+    response_json, status_code = search_posts(query, page=page, limit=limit)
+    return jsonify(response_json), status_code
+
+
 @blueprint.route('/blog/<slug>')
 def blog_post_detail(slug):
     """
     Detalle de un post individual del blog.
     """
     try:
-        response_json, status_code = get_post_by_slug(slug)
+        response_json, status_code = get_public_post(slug)
         
         if status_code == 200:
             post = response_json
+            
+            # El ETag sale del updatedAt del post: 304 sin renderizar si no cambió
+            response_304 = not_modified(
+                page_etag(post.get('id'), post.get('updatedAt')),
+                parse_api_datetime(post.get('updatedAt'))
+            )
+            if response_304:
+                return response_304
+            
             return render_template(
                 'pages/blog-detail.html',
                 post=post,
+                content=get_post_content(post),
                 segment='blog'
             )
         elif status_code == 404:
             # Post no encontrado, mostrar 404
-            return render_template('pages/page-404.html'), 404
+            return not_found_page()
         else:
             # Otro error
             error_message = response_json.get('message', 'Error al cargar el post.')
             current_app.logger.error(f"Error al cargar post {slug}: {error_message}")
-            return render_template('pages/page-404.html'), 404
+            return not_found_page()
     
     except Exception as e:
         current_app.logger.error(f"Error en blog_post_detail: {str(e)}")
-        return render_template('pages/page-404.html'), 404
+        return not_found_page()
 
 
-# ==================== Fin Rutas Públicas del Blog ====================
+@blueprint.route('/img/blog/<int:post_id>/<int:width>')
+def blog_image(post_id, width):
+    """
+    Miniatura de la imagen de cabecera de un post (WebP o JPEG según Accept).
+    Si la imagen no se puede generar se redirige a la original. La URL de
+    origen sale de lo que la aplicación ya conoce del post (ver
+    get_public_header_image): un ID desconocido o una API caída dan 404.
+    """
+    if width not in BLOG_IMAGE_WIDTHS:
+        abort(404)
 
+    version = request.args.get('v')
+    url = known_source(post_id)
+    if url is None or (version and version != source_version(url)):
+        url = get_public_header_image(post_id) or url
+        if url:
+            remember_source(post_id, url)
+    if not url:
+        abort(404)
 
-@blueprint.route('/<template>')
-def route_template(template):
+    if not images_enabled():
+        return redirect(url)
+    if version and version != source_version(url):
+        # La imagen del post cambió: redirigir a la URL de la versión actual
+        return redirect(url_for('pages_blueprint.blog_image', post_id=post_id, width=width, v=source_version(url)))
+
+    fmt = preferred_format(request.headers.get('Accept', ''))
     try:
-        # Excluir rutas del Portal de Clientes de la ruta genérica
-        excluded_routes = ['portal-clientes', 'login', 'logout']
-        if template in excluded_routes:
-            abort(404)
-        
-        # Rutas especiales para iconos de Apple / favicons
-        # Evitar que se intenten procesar como plantillas HTML
-        if template.startswith('apple-touch-icon'):
-            # Ejemplos de rutas solicitadas:
-            # /apple-touch-icon.png
-            # /apple-touch-icon-120x120.png
-            # /apple-touch-icon-120x120-precomposed.png
-            
-            # Intenta servir desde la carpeta de favicons estáticos
-            # current_app.root_path apunta a la carpeta de la app (apps/)
-            # La carpeta static está en apps/static/favicon_io/
-            favicon_dir = os.path.join(current_app.root_path, 'static', 'favicon_io')
-            favicon_dir = os.path.abspath(favicon_dir)
-            
-            # Mapea diferentes nombres solicitados al archivo principal apple-touch-icon.png
-            filename = 'apple-touch-icon.png'
-            
-            try:
-                return send_from_directory(favicon_dir, filename)
-            except Exception:
-                # Si por alguna razón no existe, devolvemos 404 simple
-                abort(404)
-        
-        # Excluir otros archivos estáticos comunes que no deberían ser plantillas
-        static_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.css', '.js', '.json', '.xml', '.webmanifest')
-        if template.lower().endswith(static_extensions):
-            abort(404)
+        path, name = get_variant(url, width, fmt)
+    except ImageUnavailable as e:
+        current_app.logger.warning(f"Imagen del post {post_id} no disponible: {str(e)}")
+        return redirect(url)
 
-        if not template.endswith('.html'):
-            template += '.html'
+    response = send_file(path, mimetype=mimetype_for(fmt), etag=name, conditional=True)
+    response.vary.add('Accept')
+    if version:
+        # La URL cambia con la imagen: se puede cachear sin revalidar
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
 
-        # Detect the current page
-        segment = get_segment(request)
 
-        # Serve the file (if exists) from app/templates/pages/FILE.html
-        return render_template("pages/" + template, segment=segment)
+# ==================== Fin Rutas Públicas del Blog ====================
 
-    except TemplateNotFound:
-        return render_template('pages/page-404.html'), 404
 
-    except:
-        return render_template('pages/page-404.html'), 404
+@blueprint.route('/<template>')
+@cached_page
+def route_template(template):
+    # Rutas especiales para iconos de Apple / favicons (/apple-touch-icon-120x120-precomposed.png...),
+    # servidas con el archivo de apps/static/favicon_io/ a través de la vista static
+    filename = resolve_static_alias(template)
+    if filename:
+        return serve_static(filename)
+
+    # Solo las plantillas de app/templates/pages registradas al arrancar (sin panel, login ni errores):
+    # cualquier otra ruta recibe la 404 ya renderizada, sin pasar por Jinja
+    page = resolve_page(template)
+    if page is None:
+        return not_found_page()
+
+    # Detect the current page
+    segment = get_segment(request)
+
+    return render_template(page, segment=segment)
 
 
 # Helper - Extract current page name from request
@@ -867,10 +972,63 @@ def debug_ip():
     }
 
 
+def can_see_debug_stats():
+    """
+    Helper para /debug-stats: modo debug, sesión de administrador del portal
+    o la cabecera X-Debug-Token con el valor de DEBUG_STATS_TOKEN.
+    """
+    if current_app.debug:
+        return True
+
+    user = get_client_portal_user()
+    if get_client_portal_token() and user and user.get('role') == 'admin':
+        return True
+
+    expected = current_app.config.get('DEBUG_STATS_TOKEN')
+    token = request.headers.get('X-Debug-Token', '')
+    return bool(expected) and hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+
+@blueprint.route('/debug-stats')
+def debug_stats():
+    """
+    Ruta de debug con métricas internas del proceso (pools HTTP, cachés).
+    Para cualquier otro visitante responde la 404 (ver can_see_debug_stats).
+    """
+    if not can_see_debug_stats():
+        return not_found_page()
+
+    return {
+        "pid": os.getpid(),
+        "database": get_database_status(),
+        "http_pools": get_pool_stats(),
+        "blog_cache": get_blog_cache_stats(),
+        "blog_revalidation": get_blog_revalidation_stats(),
+        "portal_cache": get_portal_cache_stats(),
+        "page_cache": get_page_cache_stats(),
+        "blog_post_index": get_post_index_stats(),
+        "blog_tag_index": get_tag_index_stats(),
+        "blog_content": get_content_cache_stats(),
+        "blog_images": get_image_cache_stats(),
+        "assets": get_asset_stats(),
+        "compression": get_compression_stats(),
+        "templates": get_template_stats(),
+        "blog_search": get_search_stats(),
+        "circuit_breakers": {
+            "blog": get_blog_breaker_stats(),
+            "portal": get_portal_breaker_stats(),
+        },
+        "coalescing": {
+            "blog": get_blog_flight_stats(),
+            "portal": get_portal_flight_stats(),
+        },
+    }
+
+
 @blueprint.app_errorhandler(404)
 def page_not_found(e):
     """
     Handler global para errores 404.
     Asegura que cualquier 404 muestre la página personalizada.
     """
-    return render_template('pages/page-404.html'), 404
+    return not_found_page()
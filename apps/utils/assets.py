@@ -0,0 +1,379 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Paquetes (bundles) de CSS y JS con hash de contenido en el nombre.
+
+`flask assets build` concatena y minifica las hojas y scripts que enlazan
+`partials/head-css.html` y `partials/footer-scripts.html` (comunes a los dos
+layouts) y los escribe en `static/dist/<nombre>.<hash>.<ext>` junto con
+`dist/manifest.json`. Con el manifiesto:
+
+- `asset_bundle()` (función global de las plantillas) devuelve la URL del
+  paquete; sin manifiesto, las URLs de los archivos originales.
+- `asset_url()` resuelve cualquier ruta de static a través del manifiesto.
+- La vista `static` sirve `dist/` con Cache-Control inmutable (1 año): el
+  nombre cambia cuando cambia el contenido.
+- `critical_css()` devuelve el CSS crítico de la plantilla en curso
+  (ver apps/utils/critical_css.py), guardado también en el manifiesto.
+
+Se conservan los archivos del build anterior para las páginas ya cacheadas
+que todavía los enlazan.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import current_app, g
+from markupsafe import Markup
+
+try:
+    from rcssmin import cssmin
+except ImportError:  # pragma: no cover - dependencia de Flask-Minify
+    cssmin = None
+
+try:
+    from jsmin import jsmin
+except ImportError:  # pragma: no cover - dependencia de Flask-Minify
+    jsmin = None
+
+
+# Usar los paquetes cuando existe el manifiesto (False para depurar con los archivos originales)
+ASSETS_USE_BUNDLES = os.environ.get('ASSETS_USE_BUNDLES', 'True').lower() in ('1', 'true', 'yes')
+
+# Carpeta de salida dentro de static (misma profundidad que css/ y js/)
+ASSETS_DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Caracteres del hash de contenido en el nombre de los archivos
+HASH_LENGTH = 10
+
+# Cache-Control de los archivos con hash
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Longitud media de línea a partir de la cual un script se considera ya minificado
+MINIFIED_LINE_LENGTH = 200
+
+# Paquete del que se extrae el CSS crítico
+CRITICAL_BUNDLE = 'css/site.css'
+
+# Hoja de Font Awesome: se sustituye por la recortada si existe (flask assets fonts)
+FONTAWESOME_PLACEHOLDER = 'css/fontawesome.css'
+
+# Paquetes en el orden en que se enlazan
+BUNDLES: Dict[str, List[str]] = {
+    'css/site.css': [
+        'css/bootstrap.min.css',
+        FONTAWESOME_PLACEHOLDER,
+        'css/magnific-popup.css',
+        'css/nice-select.css',
+        'css/slick-slider.css',
+        'css/owl.carousel.min.css',
+        'css/aos.css',
+        'css/mobile-menu.css',
+        'css/main.css',
+    ],
+    # jQuery va en el <head>: hay scripts en línea de las plantillas que lo usan
+    'js/head.js': [
+        'js/jquery-3-7-1.min.js',
+    ],
+    'js/site.js': [
+        'js/bootstrap.min.js',
+        'js/aos.js',
+        'js/fontawesome.js',
+        'js/jquery.countup.js',
+        'js/mobile-menu.js',
+        'js/jquery.magnific-popup.js',
+        'js/owl.carousel.min.js',
+        'js/slick-slider.js',
+        'js/gsap.min.js',
+        'js/ScrollTrigger.min.js',
+        'js/Splitetext.js',
+        'js/text-animation.js',
+        'js/SmoothScroll.js',
+        'js/tilt.jquery.js',
+        'js/main.js',
+    ],
+}
+
+_CHARSET_RE = re.compile(r'@charset\s+"[^"]*"\s*;', re.IGNORECASE)
+_IMPORT_RE = re.compile(r'@import\s+(?:url\(\s*(["\']?)(.*?)\1\s*\)|(["\'])(.*?)\3)[^;]*;', re.IGNORECASE)
+_CSS_URL_RE = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+_URL_SUFFIX_RE = re.compile(r'([^?#]*)(.*)', re.DOTALL)
+_CSS_SOURCEMAP_RE = re.compile(r'/\*#\s*sourceMappingURL=[^*]*\*/')
+_JS_SOURCEMAP_RE = re.compile(r'^\s*//[#@]\s*sourceMappingURL=.*$', re.MULTILINE)
+_LICENSE_RE = re.compile(r'\A\s*(/\*!.*?\*/)', re.DOTALL)
+
+_manifest: Optional[Dict] = None
+_manifest_mtime: Optional[float] = None
+_manifest_checked_at = 0.0
+_manifest_lock = threading.Lock()
+_MANIFEST_RECHECK = 30
+
+
+def bundle_sources(name: str) -> List[str]:
+    """
+    Archivos de un paquete, con Font Awesome resuelto a la hoja recortada si existe.
+    """
+    from apps.utils.font_subset import fontawesome_css
+
+    return [fontawesome_css() if source == FONTAWESOME_PLACEHOLDER else source for source in BUNDLES[name]]
+
+
+# CSS
+
+def _rewrite_url(url: str, source: str, base: str) -> str:
+    if not url or url.startswith(('data:', '#', '/')) or '://' in url:
+        return url
+    path, suffix = _URL_SUFFIX_RE.match(url).groups()
+    resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+    if base.startswith('/') or '://' in base:
+        return '{}/{}{}'.format(base.rstrip('/'), resolved, suffix)
+    return posixpath.relpath(resolved, base) + suffix
+
+
+def _process_css(text: str, source: str, imports: List[str], base: str) -> str:
+    """
+    Prepara una hoja para concatenarla: sin @charset ni sourcemap, con los
+    @import extraídos (deben ir al principio del paquete) y las url()
+    relativas reescritas para `base` (carpeta de salida o URL absoluta).
+    """
+    text = _CHARSET_RE.sub('', text)
+    text = _CSS_SOURCEMAP_RE.sub('', text)
+
+    def hoist(match):
+        statement = match.group(0)
+        if statement not in imports:
+            imports.append(statement)
+        return ''
+
+    text = _IMPORT_RE.sub(hoist, text)
+
+    def rewrite(match):
+        quote, url = match.group(1), match.group(2).strip()
+        return 'url({0}{1}{0})'.format(quote, _rewrite_url(url, source, base))
+
+    return _CSS_URL_RE.sub(rewrite, text)
+
+
+def build_css(static_dir: str, sources: List[str], minify: bool = True, base: str = ASSETS_DIST_DIR) -> str:
+    imports: List[str] = []
+    parts = []
+    for source in sources:
+        with open(os.path.join(static_dir, source), encoding='utf-8') as f:
+            parts.append('/* {} */\n{}'.format(source, _process_css(f.read(), source, imports, base)))
+    css = '\n'.join(parts)
+    if minify and cssmin is not None:
+        css = cssmin(css, keep_bang_comments=True)
+    return '@charset "UTF-8";\n' + ''.join(statement + '\n' for statement in imports) + css
+
+
+# JS
+
+def _is_minified(text: str) -> bool:
+    # Por el contenido y no por el nombre: jquery-3-7-1.min.js no está minificado
+    return len(text) / (text.count('\n') + 1) > MINIFIED_LINE_LENGTH
+
+
+def _process_js(text: str, minify: bool) -> str:
+    text = _JS_SOURCEMAP_RE.sub('', text)
+    if minify and jsmin is not None and not _is_minified(text):
+        # jsmin elimina todos los comentarios: se conserva la cabecera de licencia
+        license_match = _LICENSE_RE.match(text)
+        text = (license_match.group(1) + '\n' if license_match else '') + jsmin(text)
+    return text.strip()
+
+
+def build_js(static_dir: str, sources: List[str], minify: bool = True) -> str:
+    parts = []
+    for source in sources:
+        with open(os.path.join(static_dir, source), encoding='utf-8') as f:
+            parts.append('/* {} */\n{}'.format(source, _process_js(f.read(), minify)))
+    # El ';' separa scripts que no terminan en punto y coma
+    return '\n;\n'.join(parts) + '\n'
+
+
+# Build
+
+def _write_text(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def load_asset_manifest(static_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(static_dir, ASSETS_DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_assets(app, minify: bool = True, critical: bool = True) -> Dict:
+    """
+    Genera los paquetes, el CSS crítico y el manifiesto en static/dist.
+
+    Args:
+        app: Aplicación Flask
+        minify: Minificar CSS y JS (los scripts ya minificados se copian tal cual)
+        critical: Calcular el CSS crítico de las plantillas principales
+
+    Returns:
+        dict: El manifiesto escrito
+    """
+    static_dir = app.static_folder
+    previous = load_asset_manifest(static_dir) or {}
+    dist_dir = os.path.join(static_dir, ASSETS_DIST_DIR)
+
+    bundles = {}
+    for name in BUNDLES:
+        sources = bundle_sources(name)
+        if name.endswith('.css'):
+            text = build_css(static_dir, sources, minify=minify)
+        else:
+            text = build_js(static_dir, sources, minify=minify)
+        data = text.encode('utf-8')
+
+        stem, extension = posixpath.splitext(posixpath.basename(name))
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        filename = '{}/{}.{}{}'.format(ASSETS_DIST_DIR, stem, digest, extension)
+        if not os.path.exists(os.path.join(static_dir, filename)):
+            _write_text(os.path.join(static_dir, filename), text)
+
+        bundles[name] = {
+            'file': filename,
+            'sources': sources,
+            'bytes': len(data),
+            'source_bytes': sum(os.path.getsize(os.path.join(static_dir, source)) for source in sources),
+        }
+
+    current = {entry['file'] for entry in bundles.values()}
+    kept = {entry['file'] for entry in previous.get('bundles', {}).values()} - current
+
+    manifest = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'minified': minify,
+        'bundles': bundles,
+        'previous': sorted(kept),
+        'critical': {},
+        'critical_errors': {},
+    }
+    if critical:
+        from apps.utils.critical_css import build_critical, critical_templates
+
+        # El <style> va en la página: url() absolutas
+        css = build_css(static_dir, bundle_sources(CRITICAL_BUNDLE), minify=False,
+                        base=app.config.get('ASSETS_ROOT', '/static'))
+        result = build_critical(app, css, critical_templates())
+        manifest['critical'] = {name: cssmin(text, keep_bang_comments=False) if minify and cssmin else text
+                                for name, text in result['pages'].items()}
+        manifest['critical_errors'] = result['errors']
+    _write_text(os.path.join(dist_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True))
+    _remove_stale(static_dir, current | kept)
+    return manifest
+
+
+def _remove_stale(static_dir: str, keep) -> None:
+    dist_dir = os.path.join(static_dir, ASSETS_DIST_DIR)
+    for name in os.listdir(dist_dir):
+        # Las versiones .gz/.br (flask assets compress) siguen a su archivo
+        original = re.sub(r'\.(gz|br)$', '', name)
+        if original != MANIFEST_NAME and '{}/{}'.format(ASSETS_DIST_DIR, original) not in keep:
+            os.remove(os.path.join(dist_dir, name))
+
+
+# Plantillas
+
+def get_asset_manifest() -> Dict:
+    """
+    Manifiesto de la aplicación actual (se vuelve a leer si cambia en disco).
+    """
+    global _manifest, _manifest_mtime, _manifest_checked_at
+
+    now = time.time()
+    if _manifest is not None and now - _manifest_checked_at < _MANIFEST_RECHECK:
+        return _manifest
+
+    with _manifest_lock:
+        _manifest_checked_at = now
+        path = os.path.join(current_app.static_folder, ASSETS_DIST_DIR, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        if _manifest is None or mtime != _manifest_mtime:
+            manifest = load_asset_manifest(current_app.static_folder) if mtime else None
+            _manifest = (manifest or {}) if ASSETS_USE_BUNDLES else {}
+            _manifest_mtime = mtime
+    return _manifest
+
+
+def asset_url(path: str) -> str:
+    """
+    URL de un archivo de static (función global de las plantillas): la del
+    paquete con hash si `path` es un paquete construido, si no la original.
+
+    Args:
+        path: Ruta relativa a static (ej: 'css/site.css', 'img/logo/logo1.png')
+    """
+    entry = get_asset_manifest().get('bundles', {}).get(path)
+    return '{}/{}'.format(current_app.config.get('ASSETS_ROOT', '/static'), entry['file'] if entry else path)
+
+
+def asset_bundle(name: str) -> List[str]:
+    """
+    URLs a enlazar para un paquete (función global de las plantillas): una sola
+    si está construido, si no las de cada archivo original en orden.
+    """
+    if name in get_asset_manifest().get('bundles', {}):
+        return [asset_url(name)]
+    return [asset_url(source) for source in bundle_sources(name)]
+
+
+def critical_css() -> Markup:
+    """
+    CSS crítico de la plantilla que se está renderizando (función global de
+    las plantillas), o cadena vacía si no se calculó para ella.
+    """
+    css = get_asset_manifest().get('critical', {}).get(g.get('page_template'))
+    # Un "</style>" dentro del CSS cerraría la etiqueta
+    return Markup(css.replace('</', '<\\/')) if css else Markup('')
+
+
+def get_asset_stats() -> Dict:
+    """
+    Tamaño de los paquetes servidos frente a la suma de sus archivos originales
+    y bytes de CSS crítico por plantilla.
+    """
+    manifest = get_asset_manifest()
+    stats = {name: {'file': entry['file'], 'bytes': entry['bytes'], 'source_bytes': entry['source_bytes'],
+                    'sources': len(entry['sources'])}
+             for name, entry in manifest.get('bundles', {}).items()}
+    stats['critical'] = {name: len(text) for name, text in manifest.get('critical', {}).items()}
+    return stats
+
+
+def register_asset_caching(app) -> None:
+    """
+    Envuelve la vista `static` para servir los archivos con hash como inmutables.
+    """
+    send_static = app.view_functions['static']
+
+    def static(filename):
+        response = send_static(filename=filename)
+        if filename.startswith(ASSETS_DIST_DIR + '/') and filename != '{}/{}'.format(ASSETS_DIST_DIR, MANIFEST_NAME) \
+                and response.status_code in (200, 206, 304):
+            response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    app.view_functions['static'] = static
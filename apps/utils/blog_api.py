@@ -5,23 +5,271 @@ Helper para interactuar con la API del Blog de Arsys Intela.
 """
 
 import requests
+import hashlib
+import json
 import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
 from flask import session, current_app
 from typing import Optional, Dict, Tuple, Any
+from apps.utils.blog_index import PostIndex, TagIndex
+from apps.utils.cache import ResponseCache, ValidatorStore, create_cache, CACHE_FRESH, CACHE_STALE
+from apps.utils.circuit_breaker import CircuitBreaker
+from apps.utils.http_client import http_get, http_post, http_put, http_delete
+from apps.utils.singleflight import SingleFlight, request_key
+from apps.utils.snapshot_store import SnapshotStore
 from apps.utils.client_portal_api import get_client_portal_token
 
 
 # Base URL de la API del Blog
 BLOG_API_BASE_URL = os.environ.get('BLOG_API_BASE_URL', 'https://blog.arsystech.net/api')
 
+# Segundos durante los que un listado completo (o un ID no encontrado) evita volver a
+# recorrer el listado de posts al buscar un ID desconocido
+BLOG_POST_INDEX_TTL = float(os.environ.get('BLOG_POST_INDEX_TTL', '300'))
 
-def blog_api_get(path: str, params: Optional[Dict] = None) -> Tuple[Dict, int]:
+# Antigüedad máxima (segundos) del índice de tags: sin réplica, pasado ese tiempo se
+# vacía y los listados por tag vuelven a la API hasta que se completa de nuevo
+BLOG_TAG_INDEX_TTL = float(os.environ.get('BLOG_TAG_INDEX_TTL', '300'))
+
+# Caché de lecturas públicas (listados y detalle de posts)
+BLOG_CACHE_TTL = float(os.environ.get('BLOG_CACHE_TTL', '60'))
+BLOG_CACHE_STALE_TTL = float(os.environ.get('BLOG_CACHE_STALE_TTL', '600'))
+BLOG_CACHE_MAX_ENTRIES = int(os.environ.get('BLOG_CACHE_MAX_ENTRIES', '256'))
+BLOG_CACHE_MAX_BYTES = int(os.environ.get('BLOG_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+
+# Copia persistente de la última respuesta buena (vacío para desactivar)
+BLOG_SNAPSHOT_PATH = os.environ.get(
+    'BLOG_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'blog_snapshot.sqlite3')
+)
+BLOG_SNAPSHOT_WARM_LIMIT = int(os.environ.get('BLOG_SNAPSHOT_WARM_LIMIT', '200'))
+
+_cache = create_cache(
+    'blog',
+    ttl=BLOG_CACHE_TTL,
+    stale_ttl=BLOG_CACHE_STALE_TTL,
+    max_entries=BLOG_CACHE_MAX_ENTRIES,
+    max_bytes=BLOG_CACHE_MAX_BYTES
+)
+
+_snapshots = SnapshotStore(BLOG_SNAPSHOT_PATH) if BLOG_SNAPSHOT_PATH else None
+
+# Validadores (ETag / Last-Modified / huella) para revalidar con peticiones condicionales
+_validators = ValidatorStore(max_entries=BLOG_CACHE_MAX_ENTRIES)
+
+# Circuit breaker del upstream: falla rápido si la API está caída o muy lenta
+_breaker = CircuitBreaker('blog')
+
+# Coalescencia de GETs idénticos concurrentes
+_flight = SingleFlight()
+
+# Índice id <-> slug alimentado por todas las respuestas de la API
+_post_index = PostIndex()
+_post_index_lock = threading.Lock()
+
+# Índice tag -> posts publicados (listados por tag y nube de tags en memoria)
+_tag_index = TagIndex(max_age=BLOG_TAG_INDEX_TTL)
+
+# Claves que se están refrescando en segundo plano
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# Generación de la caché: cada invalidación la incrementa y una respuesta pedida
+# en una generación anterior (antes de una escritura) ya no se guarda
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def _cache_key(path: str, params: Optional[Dict] = None) -> str:
+    """
+    Construye la clave de caché a partir de la ruta y los parámetros ordenados.
+    """
+    if not params:
+        return path
+    query = urlencode(sorted((k, v) for k, v in params.items() if v is not None))
+    return f"{path}?{query}"
+
+
+def _refresh_in_background(key: str, path: str, params: Optional[Dict] = None) -> None:
+    """
+    Refresca una entrada obsoleta de la caché en un hilo aparte
+    (stale-while-revalidate). Si ya hay un refresco en curso para la clave, no hace nada.
+    """
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    app = current_app._get_current_object()
+    generation = _generation
+
+    def refresh():
+        try:
+            with app.app_context():
+                response_json, status_code = _blog_api_get(path, params, None)
+                if status_code == 200:
+                    _store(key, response_json, generation)
+        except Exception:
+            # El error ya quedó registrado; se seguirá sirviendo la copia obsoleta
+            pass
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def _store(key: str, response_json: Dict, generation: int) -> None:
+    """
+    Guarda una respuesta buena en la caché en memoria y en el snapshot persistente,
+    salvo que la caché se haya invalidado desde que se pidió (`generation`).
+    """
+    with _generation_lock:
+        if generation != _generation:
+            return
+        _cache.set(key, response_json)
+        if _snapshots:
+            _snapshots.save(key, response_json)
+
+
+def _get_last_good(key: str, count: bool = True) -> Optional[Dict]:
+    """
+    Última copia conocida de una respuesta (memoria o disco), sin importar su antigüedad.
+    """
+    stale_json = _cache.get_stale(key, count=count)
+    if stale_json is None and _snapshots:
+        stale_json = _snapshots.get(key)
+    return stale_json
+
+
+def warm_cache_from_snapshot() -> int:
+    """
+    Precalienta la caché en memoria (y el índice id <-> slug) con el snapshot
+    persistente. Las entradas se cargan como obsoletas: se sirven desde la
+    primera petición y se refrescan en segundo plano.
+    
+    Returns:
+        int: Cantidad de entradas cargadas
+    """
+    # Con el backend compartido (SQLite) la caché ya persiste entre reinicios
+    # y otros workers pueden tener entradas más recientes que el snapshot
+    if not _snapshots or not isinstance(_cache, ResponseCache):
+        return 0
+    
+    loaded = 0
+    stale_at = time.time() - BLOG_CACHE_TTL - 1
+    # Se insertan de la más antigua a la más reciente para respetar el orden LRU
+    for key, value, _ in reversed(list(_snapshots.items(BLOG_SNAPSHOT_WARM_LIMIT))):
+        _cache.set(key, value, stored_at=stale_at)
+        path, _, query = key.partition('?')
+        _record_response(path, value, dict(parse_qsl(query)))
+        loaded += 1
+    return loaded
+
+
+def invalidate_blog_cache() -> None:
+    """
+    Vacía la caché de lecturas de posts (se llama tras crear, editar o eliminar un post).
+    Las lecturas en curso, pedidas antes, ya no se guardarán.
+    """
+    global _generation
+
+    with _generation_lock:
+        _generation += 1
+        _cache.invalidate('/posts')
+        _validators.invalidate('/posts')
+        if _snapshots:
+            _snapshots.delete_prefix('/posts')
+
+
+def get_blog_cache_stats() -> Dict:
+    """
+    Estadísticas de la caché de lecturas del blog.
+    """
+    return _cache.stats()
+
+
+def get_blog_revalidation_stats() -> Dict:
+    """
+    Estadísticas de revalidación condicional contra la API del Blog.
+    """
+    return _validators.stats()
+
+
+def get_blog_breaker_stats() -> Dict:
+    """
+    Estado y métricas del circuit breaker de la API del Blog.
+    """
+    return _breaker.stats()
+
+
+def get_blog_flight_stats() -> Dict:
+    """
+    Estadísticas de coalescencia de GETs hacia la API del Blog.
+    """
+    return _flight.stats()
+
+
+def get_post_index_stats() -> Dict:
+    """
+    Estadísticas del índice id <-> slug.
+    """
+    return _post_index.stats()
+
+
+def get_known_slug(post_id: int) -> Optional[str]:
+    """
+    Slug de un post ya visto en alguna respuesta de la API (sin consultarla).
+    """
+    return _post_index.get_slug(post_id)
+
+
+def get_tag_index() -> TagIndex:
+    """
+    Índice tag -> posts publicados del proceso.
+    """
+    return _tag_index
+
+
+def get_tag_index_stats() -> Dict:
+    """
+    Estadísticas del índice de tags.
+    """
+    return _tag_index.stats()
+
+
+def _record_response(path: str, response_json: Dict, params: Optional[Dict] = None, public: bool = True) -> None:
+    """
+    Alimenta el índice id <-> slug con un listado o detalle recibido de la API
+    y, si la respuesta es pública (sin token: no incluye borradores), el de tags.
+    """
+    if not isinstance(response_json, dict):
+        return
+    if path == '/posts':
+        posts = response_json.get('data', [])
+        _post_index.record_posts(posts)
+        if public:
+            # Solo el listado sin filtrar dice cuántos posts publicados hay en total
+            total = None if (params or {}).get('tag') else response_json.get('pagination', {}).get('total')
+            _tag_index.record_listing(posts, total=total)
+    elif path.startswith('/posts/'):
+        _post_index.record_post(response_json)
+        if public:
+            _tag_index.record_post(response_json)
+
+
+def blog_api_get(path: str, params: Optional[Dict] = None, use_cache: bool = False) -> Tuple[Dict, int]:
     """
     Realiza una petición GET a la API del Blog.
     
     Args:
         path: Ruta relativa del endpoint (ej: '/posts')
         params: Parámetros de query string (opcional)
+        use_cache: Si es True, usa la caché de lecturas públicas. Solo aplica a
+                   peticiones anónimas: con token la respuesta puede incluir posts
+                   no publicados y siempre se consulta la API.
     
     Returns:
         tuple: (response_json, status_code)
@@ -31,26 +279,124 @@ def blog_api_get(path: str, params: Optional[Dict] = None) -> Tuple[Dict, int]:
     """
     token = get_client_portal_token()
     
+    if not use_cache or token:
+        return _blog_api_get(path, params, token)
+    
+    key = _cache_key(path, params)
+    cached_json, state = _cache.get(key)
+    
+    if state == CACHE_FRESH:
+        return cached_json, 200
+    
+    if state == CACHE_STALE:
+        _refresh_in_background(key, path, params)
+        return cached_json, 200
+    
+    generation = _generation
+    try:
+        response_json, status_code = _blog_api_get(path, params, None)
+    except requests.RequestException:
+        # stale-if-error: si la API no responde (o el circuito está abierto),
+        # servir la última copia conocida aunque haya expirado
+        stale_json = _get_last_good(key)
+        if stale_json is None:
+            raise
+        current_app.logger.warning(f"API del Blog no disponible, sirviendo copia en caché de {key}")
+        return stale_json, 200
+    
+    if status_code == 200:
+        _store(key, response_json, generation)
+    elif status_code >= 500:
+        stale_json = _get_last_good(key)
+        if stale_json is not None:
+            current_app.logger.warning(f"API del Blog respondió {status_code}, sirviendo copia en caché de {key}")
+            return stale_json, 200
+    
+    return response_json, status_code
+
+
+def _blog_api_get(path: str, params: Optional[Dict], token: Optional[str]) -> Tuple[Dict, int]:
+    """
+    Petición GET sin caché. No accede a la sesión, por lo que puede usarse
+    fuera de un request (refrescos en segundo plano).
+    """
     url = f"{BLOG_API_BASE_URL}{path}"
     headers = {}
     
     if token:
         headers['Authorization'] = f'Bearer {token}'
     
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        
-        # Intentar parsear JSON, si falla devolver texto
+    # Lecturas anónimas: revalidar con una petición condicional si tenemos
+    # validadores y el cuerpo correspondiente para reutilizarlo ante un 304
+    key = _cache_key(path, params)
+    validator = None if token else _validators.get(key)
+    cached_json = None
+    if validator and (validator['etag'] or validator['last_modified']):
+        cached_json = _get_last_good(key, count=False)
+        if cached_json is not None:
+            if validator['etag']:
+                headers['If-None-Match'] = validator['etag']
+            if validator['last_modified']:
+                headers['If-Modified-Since'] = validator['last_modified']
+            _validators.count('conditional_requests')
+    
+    # Peticiones idénticas concurrentes comparten una sola llamada a la API
+    def fetch():
         try:
-            response_json = response.json()
-        except ValueError:
-            response_json = {'message': response.text}
+            response = _breaker.call(http_get, url, headers=headers, params=params, timeout=10)
+            
+            if response.status_code == 304 and cached_json is not None:
+                _validators.count('not_modified')
+                _validators.count('bytes_saved', validator['size'])
+                return cached_json, 200
+            
+            # Intentar parsear JSON, si falla devolver texto
+            try:
+                response_json = response.json()
+            except ValueError:
+                response_json = {'message': response.text}
+            
+            if response.status_code == 200:
+                _record_response(path, response_json, params, public=not token)
+                if not token:
+                    _remember_validators(key, response, response_json, validator)
+            
+            return response_json, response.status_code
         
-        return response_json, response.status_code
-    
-    except requests.RequestException as e:
-        current_app.logger.error(f"Error en petición GET a {url}: {str(e)}")
-        raise
+        except requests.RequestException as e:
+            current_app.logger.error(f"Error en petición GET a {url}: {str(e)}")
+            raise
+        
+    return _flight.do(request_key('GET', url, params, token), fetch)
+
+
+def _fingerprint(response_json: Dict) -> str:
+    """
+    Huella del contenido de una respuesta: el `updatedAt` de un post o, para
+    los listados, un hash del JSON.
+    """
+    if isinstance(response_json, dict) and response_json.get('updatedAt'):
+        return '{}:{}'.format(response_json.get('id'), response_json['updatedAt'])
+    payload = json.dumps(response_json, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _remember_validators(key: str, response: requests.Response, response_json: Dict,
+                         previous: Optional[Dict]) -> None:
+    """
+    Guarda los validadores de una respuesta 200. Si la API no envía ETag ni
+    Last-Modified, la huella permite al menos detectar que el contenido no cambió.
+    """
+    fingerprint = _fingerprint(response_json)
+    if previous and previous['fingerprint'] == fingerprint:
+        _validators.count('unchanged_refetches')
+    _validators.set(
+        key,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        fingerprint=fingerprint,
+        size=len(response.content)
+    )
 
 
 def blog_api_post(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, int]:
@@ -76,7 +422,7 @@ def blog_api_post(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, in
         headers['Authorization'] = f'Bearer {token}'
     
     try:
-        response = requests.post(url, headers=headers, json=json_data, timeout=10)
+        response = _breaker.call(http_post, url, headers=headers, json=json_data, timeout=10)
         
         # Intentar parsear JSON, si falla devolver texto
         try:
@@ -114,7 +460,7 @@ def blog_api_put(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, int
         headers['Authorization'] = f'Bearer {token}'
     
     try:
-        response = requests.put(url, headers=headers, json=json_data, timeout=10)
+        response = _breaker.call(http_put, url, headers=headers, json=json_data, timeout=10)
         
         # Intentar parsear JSON, si falla devolver texto
         try:
@@ -151,7 +497,7 @@ def blog_api_delete(path: str) -> Tuple[Dict, int]:
         headers['Authorization'] = f'Bearer {token}'
     
     try:
-        response = requests.delete(url, headers=headers, timeout=10)
+        response = _breaker.call(http_delete, url, headers=headers, timeout=10)
         
         # Intentar parsear JSON, si falla devolver texto
         try:
@@ -168,7 +514,8 @@ def blog_api_delete(path: str) -> Tuple[Dict, int]:
 
 # Funciones de alto nivel para facilitar el uso
 
-def get_posts(page: int = 1, limit: int = 10, tag: Optional[str] = None) -> Tuple[Dict, int]:
+def get_posts(page: int = 1, limit: int = 10, tag: Optional[str] = None,
+              use_cache: bool = True) -> Tuple[Dict, int]:
     """
     Obtiene la lista de posts con paginación.
     
@@ -176,6 +523,7 @@ def get_posts(page: int = 1, limit: int = 10, tag: Optional[str] = None) -> Tupl
         page: Número de página (default: 1)
         limit: Cantidad de posts por página (default: 10)
         tag: Tag para filtrar (opcional)
+        use_cache: Usar la caché de lecturas públicas (default: True)
     
     Returns:
         tuple: (response_json, status_code)
@@ -184,49 +532,107 @@ def get_posts(page: int = 1, limit: int = 10, tag: Optional[str] = None) -> Tupl
     if tag:
         params['tag'] = tag
     
-    return blog_api_get('/posts', params)
+    return blog_api_get('/posts', params, use_cache=use_cache)
 
 
-def get_post_by_slug(slug: str) -> Tuple[Dict, int]:
+def get_post_by_slug(slug: str, use_cache: bool = True) -> Tuple[Dict, int]:
     """
     Obtiene un post completo por su slug.
     
     Args:
         slug: Slug del post
+        use_cache: Usar la caché de lecturas públicas (default: True)
     
     Returns:
         tuple: (response_json, status_code)
     """
-    return blog_api_get(f'/posts/{slug}')
+    return blog_api_get(f'/posts/{slug}', use_cache=use_cache)
+
+
+def fetch_public_posts(page: int = 1, limit: int = 100) -> Tuple[Dict, int]:
+    """
+    Listado anónimo de posts publicados, sin caché ni sesión.
+    Lo usa la sincronización de la réplica local (fuera de un request).
+    
+    Returns:
+        tuple: (response_json, status_code)
+    """
+    return _blog_api_get('/posts', {'page': page, 'limit': limit}, None)
+
+
+def fetch_public_post(slug: str) -> Tuple[Dict, int]:
+    """
+    Post completo anónimo por slug, sin caché ni sesión.
+    
+    Returns:
+        tuple: (response_json, status_code)
+    """
+    return _blog_api_get(f'/posts/{slug}', None, None)
 
 
 def get_post_by_id(post_id: int) -> Tuple[Dict, int]:
     """
     Obtiene un post completo por su ID.
-    Primero busca el post en el listado para obtener su slug, luego obtiene el post completo.
-    Nota: La API del blog no tiene endpoint directo por ID, así que buscamos en el listado.
-    """
-    # Buscar el post en el listado para obtener su slug
-    # Intentamos con varias páginas si es necesario
-    for page in range(1, 11):  # Buscar en las primeras 10 páginas
-        response_json, status_code = get_posts(page=page, limit=100)
-        if status_code == 200:
-            posts = response_json.get('data', [])
-            for post in posts:
-                if post.get('id') == post_id:
-                    # Obtener el post completo por slug
-                    slug = post.get('slug')
-                    if slug:
-                        return get_post_by_slug(slug)
-            # Si no encontramos más posts, salir
-            if len(posts) < 100:
-                break
-        else:
-            break
+    Nota: La API del blog no tiene endpoint directo por ID, así que el slug se
+    resuelve con el índice id <-> slug. Solo si el ID no está en el índice
+    (o apunta a un slug que ya no existe) se reconstruye recorriendo el listado,
+    como mucho una vez cada BLOG_POST_INDEX_TTL segundos.
+    """
+    slug = _post_index.get_slug(post_id)
+    if slug:
+        response_json, status_code = get_post_by_slug(slug, use_cache=False)
+        if status_code != 404 and (status_code != 200 or response_json.get('id') == post_id):
+            return response_json, status_code
+        # El slug cambió o el post ya no existe
+        _post_index.forget(post_id)
+    
+    slug = _rebuild_post_index(post_id)
+    if slug:
+        return get_post_by_slug(slug, use_cache=False)
     
     return {'message': 'Post no encontrado'}, 404
 
 
+def _rebuild_post_index(post_id: int) -> Optional[str]:
+    """
+    Recorre el listado de posts (hasta 10 páginas de 100) para alimentar el
+    índice id <-> slug, deteniéndose en cuanto aparece el ID buscado.
+    
+    Returns:
+        str: Slug del post si se encontró, None en caso contrario
+    """
+    # Un ID que no estaba en un listado completo reciente (o que ya se buscó sin
+    # éxito) no existe: no se vuelve a recorrer la API por cada petición
+    if _post_index.built_within(BLOG_POST_INDEX_TTL) or _post_index.is_missing(post_id, BLOG_POST_INDEX_TTL):
+        return None
+    
+    with _post_index_lock:
+        # Otro hilo pudo haber reconstruido el índice mientras esperábamos
+        slug = _post_index.get_slug(post_id)
+        if slug:
+            return slug
+        if _post_index.built_within(BLOG_POST_INDEX_TTL) or _post_index.is_missing(post_id, BLOG_POST_INDEX_TTL):
+            return None
+        
+        for page in range(1, 11):
+            response_json, status_code = get_posts(page=page, limit=100, use_cache=False)
+            if status_code != 200:
+                break
+            
+            slug = _post_index.get_slug(post_id)
+            if slug:
+                return slug
+            
+            # Si no hay más posts, el índice quedó completo
+            if len(response_json.get('data', [])) < 100:
+                _post_index.mark_built()
+                break
+        
+        _post_index.mark_missing(post_id)
+    
+    return None
+
+
 def create_post(post_data: Dict) -> Tuple[Dict, int]:
     """
     Crea un nuevo post.
@@ -237,7 +643,11 @@ def create_post(post_data: Dict) -> Tuple[Dict, int]:
     Returns:
         tuple: (response_json, status_code)
     """
-    return blog_api_post('/posts', post_data)
+    response_json, status_code = blog_api_post('/posts', post_data)
+    if status_code == 201:
+        _post_index.record_post(response_json)
+        invalidate_blog_cache()
+    return response_json, status_code
 
 
 def update_post(post_id: int, post_data: Dict) -> Tuple[Dict, int]:
@@ -251,7 +661,11 @@ def update_post(post_id: int, post_data: Dict) -> Tuple[Dict, int]:
     Returns:
         tuple: (response_json, status_code)
     """
-    return blog_api_put(f'/posts/{post_id}', post_data)
+    response_json, status_code = blog_api_put(f'/posts/{post_id}', post_data)
+    if status_code == 200:
+        _post_index.record_post(response_json)
+        invalidate_blog_cache()
+    return response_json, status_code
 
 
 def delete_post(post_id: int) -> Tuple[Dict, int]:
@@ -264,5 +678,9 @@ def delete_post(post_id: int) -> Tuple[Dict, int]:
     Returns:
         tuple: (response_json, status_code)
     """
-    return blog_api_delete(f'/posts/{post_id}')
+    response_json, status_code = blog_api_delete(f'/posts/{post_id}')
+    if status_code == 200:
+        _post_index.forget(post_id)
+        invalidate_blog_cache()
+    return response_json, status_code
 
@@ -0,0 +1,229 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Procesado del `contentHtml` de los posts antes de mostrarlos.
+
+Se hace una sola vez por versión del post (id + updatedAt) y el resultado se
+guarda en una caché acotada, así la vista de detalle solo renderiza la plantilla:
+- Imágenes con loading="lazy", decoding="async" y width/height cuando la URL
+  indica el tamaño (ej: placehold.co/800x400, ?w=800&h=400, foto-800x400.jpg).
+- Índice de contenidos a partir de los <h2>/<h3> (se les asigna un id).
+- Cantidad de palabras y tiempo de lectura estimado.
+"""
+
+import hashlib
+import math
+import os
+import re
+import unicodedata
+from html import escape, unescape
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from apps.utils.cache import ResponseCache
+
+
+# Cantidad máxima de posts procesados en memoria
+BLOG_CONTENT_CACHE_SIZE = int(os.environ.get('BLOG_CONTENT_CACHE_SIZE', '128'))
+
+# Palabras por minuto para estimar el tiempo de lectura
+WORDS_PER_MINUTE = 200
+
+# Encabezados que forman el índice de contenidos
+TOC_TAGS = ('h2', 'h3')
+
+_SIZE_IN_PATH_RE = re.compile(r'(?<![0-9])([1-9][0-9]{1,3})x([1-9][0-9]{1,3})(?![0-9])')
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Las entradas no caducan en la práctica: la clave ya cambia con cada versión del post
+_cache = ResponseCache(ttl=365 * 24 * 3600, stale_ttl=0, max_entries=BLOG_CONTENT_CACHE_SIZE,
+                       max_bytes=32 * 1024 * 1024)
+
+
+def _slugify(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'seccion'
+
+
+def image_size_from_url(url: str) -> Optional[Tuple[int, int]]:
+    """
+    Deduce ancho y alto de una imagen a partir de su URL, si la URL los indica.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    width = (query.get('w') or query.get('width') or [None])[0]
+    height = (query.get('h') or query.get('height') or [None])[0]
+    if width and height and width.isdigit() and height.isdigit():
+        return int(width), int(height)
+    match = _SIZE_IN_PATH_RE.search(parsed.path)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    return None
+
+
+def _render_attrs(attrs: List[Tuple[str, Optional[str]]]) -> str:
+    return ''.join(
+        ' {}'.format(name) if value is None else ' {}="{}"'.format(name, escape(value, quote=True))
+        for name, value in attrs
+    )
+
+
+class _ContentProcessor(HTMLParser):
+    """
+    Reescribe el HTML conservando el original salvo en <img> y en los encabezados del índice.
+    """
+
+    SKIP_TEXT_TAGS = ('script', 'style')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.out: List[str] = []
+        self.toc: List[Dict] = []
+        self.words = 0
+        self._used_ids = set()
+        self._heading = None
+        self._skip = 0
+
+    # Etiquetas
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            self.out.append(self._img_tag(attrs, self_closing=False))
+            return
+        if tag in self.SKIP_TEXT_TAGS:
+            self._skip += 1
+        if tag in TOC_TAGS and self._heading is None:
+            # El id se decide al cerrar el encabezado, cuando se conoce su texto
+            self._heading = {'tag': tag, 'attrs': attrs, 'index': len(self.out), 'text': []}
+            self.out.append('')
+            return
+        self.out.append(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'img':
+            self.out.append(self._img_tag(attrs, self_closing=True))
+            return
+        self.out.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TEXT_TAGS and self._skip:
+            self._skip -= 1
+        if self._heading is not None and tag == self._heading['tag']:
+            self._close_heading()
+        self.out.append('</{}>'.format(tag))
+
+    # Contenido
+
+    def handle_data(self, data):
+        self.out.append(data)
+        if not self._skip:
+            self.words += len(_WORD_RE.findall(data))
+            if self._heading is not None:
+                self._heading['text'].append(data)
+
+    def handle_entityref(self, name):
+        self.out.append('&{};'.format(name))
+        if self._heading is not None:
+            self._heading['text'].append(unescape('&{};'.format(name)))
+
+    def handle_charref(self, name):
+        self.out.append('&#{};'.format(name))
+        if self._heading is not None:
+            self._heading['text'].append(unescape('&#{};'.format(name)))
+
+    def handle_comment(self, data):
+        self.out.append('<!--{}-->'.format(data))
+
+    def handle_decl(self, decl):
+        self.out.append('<!{}>'.format(decl))
+
+    def handle_pi(self, data):
+        self.out.append('<?{}>'.format(data))
+
+    def unknown_decl(self, data):
+        self.out.append('<![{}]>'.format(data))
+
+    # Auxiliares
+
+    def _img_tag(self, attrs, self_closing: bool) -> str:
+        names = {name for name, _ in attrs}
+        attrs = list(attrs)
+        if 'loading' not in names:
+            attrs.append(('loading', 'lazy'))
+        if 'decoding' not in names:
+            attrs.append(('decoding', 'async'))
+        if 'width' not in names and 'height' not in names:
+            size = image_size_from_url(dict(attrs).get('src') or '')
+            if size:
+                attrs.append(('width', str(size[0])))
+                attrs.append(('height', str(size[1])))
+        return '<img{}{}>'.format(_render_attrs(attrs), ' /' if self_closing else '')
+
+    def _close_heading(self):
+        heading = self._heading
+        self._heading = None
+
+        text = ' '.join(''.join(heading['text']).split())
+        attrs = list(heading['attrs'])
+        anchor = dict(attrs).get('id')
+        if not anchor:
+            base = _slugify(text)
+            anchor = base
+            suffix = 2
+            while anchor in self._used_ids:
+                anchor = '{}-{}'.format(base, suffix)
+                suffix += 1
+            attrs.append(('id', anchor))
+        self._used_ids.add(anchor)
+
+        self.out[heading['index']] = '<{}{}>'.format(heading['tag'], _render_attrs(attrs))
+        if text:
+            self.toc.append({'id': anchor, 'text': text, 'level': int(heading['tag'][1])})
+
+
+def process_content(html: str) -> Dict:
+    """
+    Procesa un `contentHtml` (sin caché).
+
+    Returns:
+        dict: html, toc (lista de {id, text, level}), word_count, reading_time (minutos)
+    """
+    processor = _ContentProcessor()
+    processor.feed(html or '')
+    processor.close()
+    if processor._heading is not None:
+        # Encabezado sin cerrar: se conserva tal cual
+        heading = processor._heading
+        processor.out[heading['index']] = '<{}{}>'.format(heading['tag'], _render_attrs(heading['attrs']))
+
+    return {
+        'html': ''.join(processor.out),
+        'toc': processor.toc,
+        'word_count': processor.words,
+        'reading_time': max(1, int(math.ceil(processor.words / float(WORDS_PER_MINUTE)))),
+    }
+
+
+def get_post_content(post: Dict) -> Dict:
+    """
+    Contenido procesado de un post, calculado una sola vez por versión (id + updatedAt).
+    """
+    html = post.get('contentHtml') or ''
+    version = post.get('updatedAt') or hashlib.sha1(html.encode('utf-8')).hexdigest()
+    key = '{}:{}'.format(post.get('id'), version)
+
+    content, _ = _cache.get(key)
+    if content is None:
+        content = process_content(html)
+        _cache.set(key, content)
+    return content
+
+
+def get_content_cache_stats() -> Dict:
+    """
+    Estadísticas de la caché de contenido procesado.
+    """
+    return _cache.stats()
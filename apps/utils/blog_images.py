@@ -0,0 +1,404 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Proxy de las imágenes de cabecera de los posts (`headerImageUrl`).
+
+`/img/blog/<id>/<ancho>` descarga la imagen original una sola vez, genera
+miniaturas WebP (o JPEG para navegadores sin WebP) en los anchos de
+BLOG_IMAGE_WIDTHS y las guarda en disco. Los archivos se nombran por el
+hash del contenido original, así que una misma imagen usada por varios
+posts se descarga y se redimensiona una sola vez. La caché se acota por
+tamaño eliminando primero los archivos usados hace más tiempo.
+
+Las URL que generan las plantillas llevan `?v=<hash de headerImageUrl>`:
+si la imagen del post cambia, cambia la URL, por eso se sirven como
+`immutable`.
+
+Necesita Pillow; sin Pillow las plantillas usan la URL original.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from apps.utils.http_client import http_get
+from apps.utils.singleflight import SingleFlight
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow es opcional
+    Image = None
+    ImageOps = None
+
+
+logger = logging.getLogger(__name__)
+
+# Directorio de la caché de miniaturas (vacío para desactivar el proxy)
+BLOG_IMAGE_CACHE_DIR = os.environ.get(
+    'BLOG_IMAGE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'blog_images')
+)
+
+# Tamaño máximo de la caché en disco (originales + miniaturas)
+BLOG_IMAGE_CACHE_MAX_BYTES = int(os.environ.get('BLOG_IMAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Anchos generados (tarjetas del listado y de la home, detalle del post)
+BLOG_IMAGE_WIDTHS = tuple(
+    int(width) for width in os.environ.get('BLOG_IMAGE_WIDTHS', '400,800,1200').split(',') if width.strip()
+)
+
+# Tamaño máximo de la imagen original que se acepta descargar
+BLOG_IMAGE_MAX_SOURCE_BYTES = int(os.environ.get('BLOG_IMAGE_MAX_SOURCE_BYTES', str(10 * 1024 * 1024)))
+
+# Timeout (segundos) de la descarga de la imagen original
+BLOG_IMAGE_TIMEOUT = float(os.environ.get('BLOG_IMAGE_TIMEOUT', '10'))
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# Ancho usado en `src` (navegadores sin soporte de srcset)
+_DEFAULT_WIDTH = 800
+
+# Tamaños CSS de cada hueco donde se muestra la imagen (atributo `sizes`)
+IMAGE_SLOTS = {
+    'card': '(max-width: 767px) 100vw, (max-width: 991px) 50vw, 400px',
+    'home-card': '(max-width: 991px) 100vw, 600px',
+    'hero': '(max-width: 991px) 100vw, 500px',
+    'detail': '(max-width: 991px) 100vw, 800px',
+}
+
+_FORMATS = {
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+# Máximo de píxeles de una imagen original (protección contra "bombas" de descompresión)
+if Image is not None:
+    Image.MAX_IMAGE_PIXELS = 40 * 1000 * 1000
+
+
+class ImageUnavailable(Exception):
+    """
+    La imagen original no se pudo descargar o no es una imagen válida.
+    """
+
+
+def images_enabled() -> bool:
+    return Image is not None and bool(BLOG_IMAGE_CACHE_DIR) and bool(BLOG_IMAGE_WIDTHS)
+
+
+def source_version(url: str) -> str:
+    """
+    Versión corta de una URL de imagen (parámetro `v` de las URL del proxy).
+    """
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+
+
+class ImageDiskCache(object):
+    """
+    Caché de archivos en disco acotada por tamaño (LRU por fecha de modificación).
+
+    Los archivos se escriben de forma atómica, así que varios workers pueden
+    compartir el mismo directorio.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    def path(self, name: str) -> str:
+        # Subdirectorios para no acumular miles de archivos en uno solo
+        shard = hashlib.md5(name.encode('utf-8')).hexdigest()[:2]
+        return os.path.join(self.root, shard, name)
+
+    def get(self, name: str) -> Optional[str]:
+        """
+        Ruta del archivo si existe (y lo marca como usado recientemente).
+        """
+        path = self.path(name)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        with self._lock:
+            self._stats['hits'] += 1
+        return path
+
+    def read(self, name: str) -> Optional[bytes]:
+        path = self.get(name)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, name: str, data: bytes) -> str:
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._stats['writes'] += 1
+            if self._bytes is not None:
+                self._bytes += len(data)
+            over = self._bytes is None or self._bytes > self.max_bytes
+        if over:
+            self._evict(keep=path)
+        return path
+
+    def _scan(self):
+        files = []
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """
+        Recalcula el tamaño real y, si supera el máximo, elimina los archivos
+        menos usados hasta quedar en el 90% (para no evictar en cada escritura).
+        El archivo `keep` (el recién escrito) nunca se elimina.
+        """
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        if total > self.max_bytes:
+            target = int(self.max_bytes * 0.9)
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+
+        with self._lock:
+            self._bytes = total
+            self._stats['evictions'] += evicted
+        if evicted:
+            logger.info('Caché de imágenes: %d archivos eliminados (%d bytes en uso)', evicted, total)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['bytes'] = self._bytes
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+_cache = ImageDiskCache(BLOG_IMAGE_CACHE_DIR, BLOG_IMAGE_CACHE_MAX_BYTES) if BLOG_IMAGE_CACHE_DIR else None
+_flight = SingleFlight()
+
+# post_id -> headerImageUrl de los posts ya mostrados en alguna página (evita
+# consultar el post en cada petición de imagen)
+_sources: Dict[int, str] = {}
+_sources_lock = threading.Lock()
+
+
+def remember_source(post_id: int, url: str) -> None:
+    with _sources_lock:
+        _sources[post_id] = url
+
+
+def known_source(post_id: int) -> Optional[str]:
+    return _sources.get(post_id)
+
+
+def _is_remote(url: Optional[str]) -> bool:
+    return bool(url) and url.lower().startswith(('http://', 'https://'))
+
+
+def blog_image(post: Dict, slot: str = 'card', default: Optional[str] = None) -> Dict:
+    """
+    Atributos `src`/`srcset`/`sizes` de la imagen de cabecera de un post
+    (función global de las plantillas).
+
+    Args:
+        post: Post con el formato de la API
+        slot: Hueco donde se muestra la imagen (clave de IMAGE_SLOTS)
+        default: Imagen a usar si el post no tiene cabecera
+
+    Returns:
+        dict: src, srcset y sizes (srcset vacío si no se usa el proxy)
+    """
+    from flask import url_for
+
+    url = post.get('headerImageUrl') or default
+    post_id = post.get('id')
+    if not images_enabled() or post_id is None or not _is_remote(url):
+        return {'src': url, 'srcset': '', 'sizes': ''}
+
+    remember_source(post_id, url)
+    version = source_version(url)
+
+    def variant_url(width):
+        return url_for('pages_blueprint.blog_image', post_id=post_id, width=width, v=version)
+
+    widths = sorted(BLOG_IMAGE_WIDTHS)
+    default_width = _DEFAULT_WIDTH if _DEFAULT_WIDTH in widths else widths[-1]
+    return {
+        'src': variant_url(default_width),
+        'srcset': ', '.join('{} {}w'.format(variant_url(width), width) for width in widths),
+        'sizes': IMAGE_SLOTS.get(slot, IMAGE_SLOTS['card']),
+    }
+
+
+def preferred_format(accept: str) -> str:
+    return 'webp' if 'image/webp' in (accept or '') else 'jpeg'
+
+
+def _download(url: str) -> bytes:
+    try:
+        response = http_get(url, timeout=BLOG_IMAGE_TIMEOUT, stream=True)
+    except requests.RequestException as e:
+        raise ImageUnavailable('Error al descargar {}: {}'.format(url, e))
+
+    try:
+        if response.status_code != 200:
+            raise ImageUnavailable('{} respondió {}'.format(url, response.status_code))
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > BLOG_IMAGE_MAX_SOURCE_BYTES:
+                raise ImageUnavailable('{} supera {} bytes'.format(url, BLOG_IMAGE_MAX_SOURCE_BYTES))
+            chunks.append(chunk)
+        return b''.join(chunks)
+    except requests.RequestException as e:
+        raise ImageUnavailable('Error al descargar {}: {}'.format(url, e))
+    finally:
+        response.close()
+
+
+def _ref_name(url: str) -> str:
+    return 'ref-' + hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def _download_source(url: str) -> str:
+    """
+    Descarga la imagen original y la guarda por el hash de su contenido.
+
+    Returns:
+        str: Hash (sha256) del contenido
+    """
+    data = _download(url)
+    digest = hashlib.sha256(data).hexdigest()
+    _cache.put('src-' + digest, data)
+    _cache.put(_ref_name(url), digest.encode('ascii'))
+    return digest
+
+
+def _resize(data: bytes, width: int, fmt: str) -> bytes:
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft('RGB', (width, width * 4))
+        image = ImageOps.exif_transpose(image)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageUnavailable('Imagen no válida: {}'.format(e))
+
+    if image.width > width:
+        height = max(1, round(image.height * width / float(image.width)))
+        image = image.resize((width, height), Image.LANCZOS)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    out = io.BytesIO()
+    if fmt == 'webp':
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        image.save(out, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        if has_alpha:
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.split()[-1])
+        else:
+            image = image.convert('RGB')
+        image.save(out, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def get_variant(url: str, width: int, fmt: str) -> Tuple[str, str]:
+    """
+    Miniatura de una imagen remota, generándola si no está en la caché.
+
+    Args:
+        url: URL de la imagen original
+        width: Ancho (uno de BLOG_IMAGE_WIDTHS)
+        fmt: 'webp' o 'jpeg'
+
+    Returns:
+        tuple: (ruta del archivo, nombre usado como ETag)
+
+    Raises:
+        ImageUnavailable: Si la imagen no se puede descargar o procesar
+    """
+    def build():
+        ref = _cache.read(_ref_name(url))
+        digest = ref.decode('ascii') if ref else None
+        if digest:
+            name = '{}-{}.{}'.format(digest, width, fmt)
+            path = _cache.get(name)
+            if path is not None:
+                return path, name
+
+        source = _cache.read('src-' + digest) if digest else None
+        if source is None:
+            # Primera vez (o el original se eliminó de la caché)
+            digest = _download_source(url)
+            source = _cache.read('src-' + digest)
+            if source is None:
+                raise ImageUnavailable('Original de {} no disponible'.format(url))
+
+        name = '{}-{}.{}'.format(digest, width, fmt)
+        return _cache.put(name, _resize(source, width, fmt)), name
+
+    return _flight.do('{}|{}|{}'.format(url, width, fmt), build)
+
+
+def mimetype_for(fmt: str) -> str:
+    return _FORMATS[fmt]
+
+
+def get_image_cache_stats() -> Dict:
+    """
+    Estadísticas del proxy de imágenes.
+    """
+    stats = _cache.stats() if _cache is not None else {}
+    stats['enabled'] = images_enabled()
+    stats['known_posts'] = len(_sources)
+    stats['widths'] = list(BLOG_IMAGE_WIDTHS)
+    stats['coalescing'] = _flight.stats()
+    return stats
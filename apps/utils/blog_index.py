@@ -0,0 +1,324 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Índices en memoria construidos a partir de las respuestas de la API del Blog.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class PostIndex(object):
+    """
+    Índice bidireccional id -> slug y slug -> id de los posts.
+
+    La API del blog no expone un endpoint por ID, así que el índice se
+    alimenta de cada listado o detalle que pasa por el cliente y de las
+    escrituras (crear, editar, eliminar) hechas desde el panel.
+    """
+
+    # IDs inexistentes recordados como máximo (caché negativa)
+    MAX_MISSING = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slug_by_id: Dict[int, str] = {}
+        self._id_by_slug: Dict[str, int] = {}
+        self._missing: Dict[int, float] = {}
+        self.built_at: Optional[float] = None
+
+    def record_post(self, post: Dict) -> None:
+        """
+        Registra (o actualiza) un post a partir de su representación JSON.
+        """
+        post_id = post.get('id') if isinstance(post, dict) else None
+        slug = post.get('slug') if isinstance(post, dict) else None
+        if post_id is None or not slug:
+            return
+
+        with self._lock:
+            self._missing.pop(post_id, None)
+            old_slug = self._slug_by_id.get(post_id)
+            if old_slug and old_slug != slug and self._id_by_slug.get(old_slug) == post_id:
+                del self._id_by_slug[old_slug]
+            self._slug_by_id[post_id] = slug
+            self._id_by_slug[slug] = post_id
+
+    def record_posts(self, posts: Iterable[Dict]) -> None:
+        """
+        Registra todos los posts de un listado.
+        """
+        for post in posts or []:
+            self.record_post(post)
+
+    def forget(self, post_id: int) -> None:
+        """
+        Elimina un post del índice.
+        """
+        with self._lock:
+            slug = self._slug_by_id.pop(post_id, None)
+            if slug and self._id_by_slug.get(slug) == post_id:
+                del self._id_by_slug[slug]
+
+    def get_slug(self, post_id: int) -> Optional[str]:
+        with self._lock:
+            return self._slug_by_id.get(post_id)
+
+    def get_id(self, slug: str) -> Optional[int]:
+        with self._lock:
+            return self._id_by_slug.get(slug)
+
+    def mark_built(self) -> None:
+        """
+        Marca el índice como reconstruido a partir del listado completo.
+        """
+        self.built_at = time.time()
+
+    def built_within(self, max_age: float) -> bool:
+        """
+        Indica si el índice se reconstruyó completo hace menos de `max_age` segundos.
+        """
+        return self.built_at is not None and time.time() - self.built_at < max_age
+
+    def mark_missing(self, post_id: int) -> None:
+        """
+        Recuerda que `post_id` no apareció en el listado (caché negativa).
+        """
+        with self._lock:
+            self._missing.pop(post_id, None)
+            self._missing[post_id] = time.time()
+            while len(self._missing) > self.MAX_MISSING:
+                del self._missing[next(iter(self._missing))]
+
+    def is_missing(self, post_id: int, max_age: float) -> bool:
+        """
+        Indica si `post_id` se buscó sin éxito hace menos de `max_age` segundos.
+        """
+        with self._lock:
+            missed_at = self._missing.get(post_id)
+        return missed_at is not None and time.time() - missed_at < max_age
+
+    def stats(self) -> Dict:
+        with self._lock:
+            size = len(self._slug_by_id)
+            missing = len(self._missing)
+        return {'posts': size, 'missing': missing, 'built_at': self.built_at}
+
+
+class TagIndex(object):
+    """
+    Índice tag -> IDs de posts publicados, ordenados igual que el listado
+    (publishedAt descendente), con el resumen de cada post.
+
+    Sirve los listados filtrados por tag y la nube de tags con sus contadores
+    sin llamar a la API. Se alimenta de forma incremental con los listados y
+    detalles que ya llegan de la API y con las escrituras hechas desde el
+    panel, y se reconstruye entero desde la réplica local (`rebuild`).
+    Solo responde cuando está completo: tras una reconstrucción, o cuando ya
+    contiene tantos posts como el `total` del último listado sin filtrar.
+
+    Completo por los listados, deja de estarlo (y se vacía) a los `max_age`
+    segundos: puede contener posts borrados o despublicados en la API o desde
+    otro worker. Reconstruido desde la réplica, el margen es el doble, porque
+    la réplica lo vuelve a reconstruir cada `max_age` segundos.
+    """
+
+    SUMMARY_FIELDS = ('id', 'title', 'slug', 'excerpt', 'author', 'tag', 'publishedAt', 'headerImageUrl', 'isPublished')
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._posts: Dict[int, Dict] = {}
+        self._ids_by_tag: Dict[str, List[int]] = {}
+        self._expected_total: Optional[int] = None
+        self._complete_until: Optional[float] = None
+        self.built_at: Optional[float] = None
+
+    @classmethod
+    def _summary(cls, post: Dict) -> Dict:
+        return {field: post.get(field) for field in cls.SUMMARY_FIELDS if field in post}
+
+    @staticmethod
+    def _is_public(post: Dict) -> bool:
+        return isinstance(post, dict) and post.get('id') is not None and post.get('isPublished', True)
+
+    def _sort(self, ids: List[int]) -> None:
+        ids.sort(key=lambda post_id: (self._posts[post_id].get('publishedAt') or '', post_id), reverse=True)
+
+    def rebuild(self, posts: Iterable[Dict]) -> None:
+        """
+        Reemplaza el índice con el listado completo de posts publicados.
+        """
+        summaries = {post['id']: self._summary(post) for post in posts or [] if self._is_public(post)}
+        ids_by_tag: Dict[str, List[int]] = {}
+        for post_id, summary in summaries.items():
+            if summary.get('tag'):
+                ids_by_tag.setdefault(summary['tag'], []).append(post_id)
+
+        with self._lock:
+            self._posts = summaries
+            self._ids_by_tag = ids_by_tag
+            for ids in ids_by_tag.values():
+                self._sort(ids)
+            self._expected_total = len(summaries)
+            self.built_at = time.time()
+            self._complete_until = self.built_at + (self.max_age * 2 if self.max_age is not None else math.inf)
+
+    def record_post(self, post: Dict) -> None:
+        """
+        Registra (o actualiza) un post leído, creado o editado. Los no publicados se eliminan.
+        """
+        if not isinstance(post, dict) or post.get('id') is None:
+            return
+        if not self._is_public(post):
+            self.forget(post['id'])
+            return
+
+        with self._lock:
+            self._record(post)
+            if self._expected_total is not None and len(self._posts) > self._expected_total:
+                # Post nuevo que aún no aparecía en el total del listado
+                self._expected_total = len(self._posts)
+            self._update_complete()
+
+    def record_listing(self, posts: Iterable[Dict], total: Optional[int] = None) -> None:
+        """
+        Registra los posts de un listado público de la API.
+
+        Args:
+            posts: Posts de la página
+            total: `pagination.total` si el listado no estaba filtrado por tag
+        """
+        posts = [post for post in posts or [] if isinstance(post, dict) and post.get('id') is not None]
+        with self._lock:
+            self._record_posts(posts)
+            if total is not None:
+                self._expected_total = total
+                if len(self._posts) > total:
+                    # Sobran posts: alguno se borró o despublicó en la API (o desde
+                    # otro worker). Se empieza de cero con los de este listado
+                    self._reset()
+                    self._expected_total = total
+                    self._record_posts(posts)
+            self._update_complete()
+
+    def _record_posts(self, posts: List[Dict]) -> None:
+        # Debe llamarse con el lock tomado
+        for post in posts:
+            if self._is_public(post):
+                self._record(post)
+            else:
+                self._remove(post['id'])
+
+    def _record(self, post: Dict) -> None:
+        # Debe llamarse con el lock tomado
+        summary = self._summary(post)
+        previous = self._posts.get(post['id'])
+        if previous is not None and previous.get('tag') == summary.get('tag') \
+                and previous.get('publishedAt') == summary.get('publishedAt'):
+            self._posts[post['id']] = summary
+            return
+        self._remove(post['id'])
+        self._posts[post['id']] = summary
+        if summary.get('tag'):
+            ids = self._ids_by_tag.setdefault(summary['tag'], [])
+            ids.append(post['id'])
+            self._sort(ids)
+
+    def _update_complete(self) -> None:
+        # Debe llamarse con el lock tomado
+        if self._complete_until is None and self._expected_total is not None \
+                and len(self._posts) >= self._expected_total:
+            self._complete_until = time.time() + (self.max_age if self.max_age is not None else math.inf)
+
+    def _is_complete(self) -> bool:
+        # Debe llamarse con el lock tomado
+        if self._complete_until is None:
+            return False
+        if time.time() < self._complete_until:
+            return True
+        # Caducado: se vacía y se vuelve a completar con los listados (o la réplica)
+        self._reset()
+        return False
+
+    def _reset(self) -> None:
+        # Debe llamarse con el lock tomado
+        self._posts = {}
+        self._ids_by_tag = {}
+        self._expected_total = None
+        self._complete_until = None
+        self.built_at = None
+
+    def get_summary(self, post_id: int) -> Optional[Dict]:
+        """
+        Resumen de un post publicado ya visto (aunque el índice no esté completo).
+        """
+        with self._lock:
+            summary = self._posts.get(post_id)
+            return dict(summary) if summary is not None else None
+
+    def forget(self, post_id: int) -> None:
+        """
+        Elimina un post del índice.
+        """
+        with self._lock:
+            if self._remove(post_id) and self._expected_total:
+                self._expected_total -= 1
+
+    def _remove(self, post_id: int) -> bool:
+        # Debe llamarse con el lock tomado
+        summary = self._posts.pop(post_id, None)
+        if summary and summary.get('tag') in self._ids_by_tag:
+            ids = self._ids_by_tag[summary['tag']]
+            if post_id in ids:
+                ids.remove(post_id)
+            if not ids:
+                del self._ids_by_tag[summary['tag']]
+        return summary is not None
+
+    def get_page(self, tag: str, page: int = 1, limit: int = 10) -> Optional[Dict]:
+        """
+        Listado de un tag con el mismo formato que la API, o None si el índice no está completo.
+        """
+        page = max(page, 1)
+        limit = max(limit, 1)
+        with self._lock:
+            if not self._is_complete():
+                return None
+            ids = self._ids_by_tag.get(tag, [])
+            total = len(ids)
+            data = [dict(self._posts[post_id]) for post_id in ids[(page - 1) * limit:page * limit]]
+
+        return {
+            'data': data,
+            'pagination': {
+                'page': page,
+                'limit': limit,
+                'total': total,
+                'totalPages': (total + limit - 1) // limit
+            }
+        }
+
+    def tag_counts(self) -> Optional[List[Dict]]:
+        """
+        Tags con su cantidad de posts (de mayor a menor), o None si el índice no está completo.
+        """
+        with self._lock:
+            if not self._is_complete():
+                return None
+            counts = [{'tag': tag, 'count': len(ids)} for tag, ids in self._ids_by_tag.items()]
+        counts.sort(key=lambda item: (-item['count'], item['tag'].lower()))
+        return counts
+
+    def is_stale(self, max_age: float) -> bool:
+        """
+        Indica si el índice nunca se reconstruyó entero o se reconstruyó hace más de `max_age` segundos.
+        """
+        return self.built_at is None or time.time() - self.built_at > max_age
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'posts': len(self._posts), 'tags': len(self._ids_by_tag), 'complete': self._is_complete(),
+                    'expected_total': self._expected_total, 'built_at': self.built_at}
@@ -0,0 +1,486 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Réplica local de los posts publicados del blog (tabla blog_posts).
+
+`flask blog sync` la mantiene al día y las rutas públicas (home, /blog y
+/blog/<slug>) leen de ella en lugar de llamar a la API en cada visita.
+Mientras la réplica no se haya sincronizado nunca, o si la última
+sincronización es más antigua que BLOG_MIRROR_MAX_AGE, se sigue usando la API.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from apps import db
+from apps.pages.models import Post, BlogSyncState, parse_api_datetime
+from apps.utils.blog_api import get_posts, get_post_by_slug, get_known_slug, fetch_public_posts, fetch_public_post, get_tag_index, BLOG_TAG_INDEX_TTL
+from apps.utils.blog_search import get_search_index
+from apps.utils.database import database_ready
+
+
+# Segundos entre comprobaciones de si la réplica ya está lista
+_READY_RECHECK = 30
+
+# Antigüedad máxima (segundos) de la última sincronización para leer de la réplica
+# (0 para no comprobarla). Si `flask blog sync` deja de ejecutarse, se vuelve a la API
+BLOG_MIRROR_MAX_AGE = float(os.environ.get('BLOG_MIRROR_MAX_AGE', '1800'))
+
+_ready = False
+_ready_checked_at = 0.0
+_ready_lock = threading.Lock()
+
+_tag_index_building = False
+_tag_index_lock = threading.Lock()
+
+
+def mirror_is_ready() -> bool:
+    """
+    Indica si la réplica local está sincronizada: al menos una vez y, con
+    BLOG_MIRROR_MAX_AGE, hace menos de ese tiempo. El estado se vuelve a leer de
+    la base de datos como mucho cada _READY_RECHECK segundos (la sincronización
+    corre en otro proceso).
+    """
+    global _ready, _ready_checked_at
+
+    if not database_ready():
+        # El esquema no se pudo crear al arrancar: ni siquiera se intenta la consulta
+        return False
+
+    now = time.time()
+    if now - _ready_checked_at < _READY_RECHECK:
+        return _ready
+
+    with _ready_lock:
+        if now - _ready_checked_at < _READY_RECHECK:
+            return _ready
+        _ready_checked_at = now
+        was_ready = _ready
+        try:
+            state = BlogSyncState.query.get(1)
+            last_sync_at = state.last_sync_at if state else None
+            _ready = last_sync_at is not None and (
+                BLOG_MIRROR_MAX_AGE <= 0
+                or (datetime.utcnow() - last_sync_at).total_seconds() <= BLOG_MIRROR_MAX_AGE
+            )
+            if was_ready and not _ready:
+                current_app.logger.warning(
+                    f"Réplica del blog sin sincronizar desde {last_sync_at} (UTC): se usa la API")
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Réplica del blog no disponible: {str(e)}")
+            _ready = False
+    return _ready
+
+
+def mirror_get_posts(page: int = 1, limit: int = 10, tag: Optional[str] = None) -> Tuple[Dict, int]:
+    """
+    Listado de posts publicados desde la réplica, con el mismo formato que la API.
+
+    Returns:
+        tuple: (response_json, status_code)
+    """
+    page = max(page, 1)
+    limit = max(limit, 1)
+
+    query = Post.query.filter(Post.is_published.is_(True))
+    if tag:
+        query = query.filter(Post.tag == tag)
+
+    total = query.count()
+    posts = query.order_by(Post.published_at.desc(), Post.id.desc()) \
+                 .offset((page - 1) * limit).limit(limit).all()
+
+    return {
+        'data': [post.to_dict(full=False) for post in posts],
+        'pagination': {
+            'page': page,
+            'limit': limit,
+            'total': total,
+            'totalPages': (total + limit - 1) // limit
+        }
+    }, 200
+
+
+def mirror_get_post_by_slug(slug: str) -> Tuple[Dict, int]:
+    """
+    Post completo desde la réplica.
+
+    Returns:
+        tuple: (response_json, status_code)
+    """
+    post = Post.query.filter_by(slug=slug, is_published=True).first()
+    if post is None or post.content_html is None:
+        return {'message': 'Post no encontrado'}, 404
+    return post.to_dict(), 200
+
+
+def get_public_posts(page: int = 1, limit: int = 10, tag: Optional[str] = None) -> Tuple[Dict, int]:
+    """
+    Listado público: réplica local si está lista, API (con caché) si no.
+    Los listados por tag se sirven desde el índice de tags en memoria si ya
+    está completo.
+
+    Returns:
+        tuple: (response_json, status_code)
+    """
+    if tag:
+        _refresh_tag_index()
+        response_json = get_tag_index().get_page(tag, page=page, limit=limit)
+        if response_json is not None:
+            return response_json, 200
+
+    if mirror_is_ready():
+        try:
+            return mirror_get_posts(page=page, limit=limit, tag=tag)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error al leer la réplica del blog: {str(e)}")
+
+    return get_posts(page=page, limit=limit, tag=tag)
+
+
+def get_public_tags() -> List[Dict]:
+    """
+    Tags de los posts publicados con su cantidad de posts (de mayor a menor).
+    Lista vacía mientras el índice de tags no esté completo.
+    """
+    _refresh_tag_index()
+    return get_tag_index().tag_counts() or []
+
+
+def _refresh_tag_index() -> None:
+    """
+    Reconstruye el índice de tags desde la réplica local en un hilo aparte si
+    nunca se reconstruyó o está obsoleto (la sincronización corre en otro
+    proceso). Sin réplica, el índice se completa con los listados de la API
+    que ya pasan por el cliente y caduca a los BLOG_TAG_INDEX_TTL segundos:
+    nunca se recorre la API desde una petición.
+    """
+    global _tag_index_building
+
+    if not get_tag_index().is_stale(BLOG_TAG_INDEX_TTL) or not mirror_is_ready():
+        return
+
+    with _tag_index_lock:
+        if _tag_index_building:
+            return
+        _tag_index_building = True
+
+    app = current_app._get_current_object()
+
+    def rebuild():
+        global _tag_index_building
+        try:
+            with app.app_context():
+                rebuild_tag_index()
+        except Exception as e:
+            app.logger.warning(f"No se pudo reconstruir el índice de tags: {str(e)}")
+        finally:
+            with _tag_index_lock:
+                _tag_index_building = False
+
+    threading.Thread(target=rebuild, daemon=True).start()
+
+
+def rebuild_tag_index() -> None:
+    """
+    Reconstruye el índice de tags desde la réplica local.
+
+    Raises:
+        SQLAlchemyError: Si la réplica no se puede leer
+    """
+    try:
+        posts = Post.query.filter(Post.is_published.is_(True)).all()
+        get_tag_index().rebuild(post.to_dict(full=False) for post in posts)
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+
+
+def get_public_post(slug: str) -> Tuple[Dict, int]:
+    """
+    Detalle público: réplica local si está lista, API (con caché) si no.
+    Si un post aún no llegó a la réplica se consulta la API.
+
+    Returns:
+        tuple: (response_json, status_code)
+    """
+    if mirror_is_ready():
+        try:
+            response_json, status_code = mirror_get_post_by_slug(slug)
+            if status_code == 200:
+                return response_json, status_code
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error al leer la réplica del blog: {str(e)}")
+
+    return get_post_by_slug(slug)
+
+
+def get_public_header_image(post_id: int) -> Optional[str]:
+    """
+    `headerImageUrl` de un post publicado que la aplicación ya conoce: índice de
+    tags (listados ya leídos), réplica local si está lista o, para los IDs del
+    índice id <-> slug, el detalle de la caché de lecturas. Un ID desconocido
+    nunca genera llamadas a la API.
+
+    Returns:
+        str: URL de la imagen, o None si el post no se conoce, no está publicado,
+        no tiene imagen o la API no está disponible
+    """
+    summary = get_tag_index().get_summary(post_id)
+    if summary is not None and summary.get('headerImageUrl'):
+        return summary['headerImageUrl']
+
+    if mirror_is_ready():
+        try:
+            post = Post.query.filter_by(id=post_id, is_published=True).first()
+            # La réplica tiene todos los posts publicados: si no está, no existe
+            return post.header_image_url if post is not None else None
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error al leer la réplica del blog: {str(e)}")
+
+    slug = get_known_slug(post_id)
+    if not slug:
+        return None
+    try:
+        response_json, status_code = get_post_by_slug(slug)
+    except requests.RequestException as e:
+        current_app.logger.warning(f"Imagen del post {post_id}: API del Blog no disponible ({str(e)})")
+        return None
+    if status_code != 200 or response_json.get('id') != post_id or not response_json.get('isPublished', True):
+        return None
+    return response_json.get('headerImageUrl')
+
+
+def mirror_record_post(data: Dict) -> None:
+    """
+    Refleja en la réplica y en el índice de tags un post creado o editado desde
+    el panel de administración. Los posts no publicados se eliminan de ambos
+    (solo contienen posts públicos).
+    """
+    if not isinstance(data, dict) or data.get('id') is None:
+        return
+    get_tag_index().record_post(data)
+    if not mirror_is_ready():
+        return
+
+    try:
+        post = Post.query.get(data['id'])
+        if not data.get('isPublished', True):
+            if post is not None:
+                db.session.delete(post)
+        else:
+            if post is None:
+                post = Post(id=data['id'])
+                db.session.add(post)
+            post.update_from_api(data)
+            # El resumen se recalcula en la próxima sincronización
+            post.summary_checksum = None
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error al actualizar la réplica del blog: {str(e)}")
+
+
+def mirror_forget_post(post_id: int) -> None:
+    """
+    Elimina un post de la réplica y del índice de tags (tras borrarlo desde el
+    panel de administración).
+    """
+    get_tag_index().forget(post_id)
+    if not mirror_is_ready():
+        return
+
+    try:
+        Post.query.filter_by(id=post_id).delete()
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error al actualizar la réplica del blog: {str(e)}")
+
+
+def list_public_slugs() -> List[str]:
+    """
+    Slugs de todos los posts publicados: desde la réplica local si está lista
+    o, si no, desde el listado completo de la API.
+
+    Raises:
+        RuntimeError: Si el listado de la API no pudo recorrerse completo
+    """
+    if mirror_is_ready():
+        try:
+            return [slug for slug, in db.session.query(Post.slug).filter(Post.is_published.is_(True))]
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error al leer la réplica del blog: {str(e)}")
+
+    return [summary['slug'] for summary in _fetch_all_summaries() if summary.get('slug')]
+
+
+def _fetch_all_summaries() -> List[Dict]:
+    """
+    Recorre el listado completo de posts publicados de la API (solo resúmenes).
+
+    Raises:
+        RuntimeError: Si alguna página del listado falla
+    """
+    summaries = []
+    page = 1
+    while True:
+        response_json, status_code = fetch_public_posts(page=page, limit=100)
+        if status_code != 200:
+            raise RuntimeError(f"La API del Blog respondió {status_code} al listar la página {page}")
+        data = response_json.get('data', [])
+        summaries.extend(summary for summary in data if summary.get('id') is not None)
+        total_pages = response_json.get('pagination', {}).get('totalPages', page)
+        if len(data) < 100 or page >= total_pages:
+            break
+        page += 1
+    return summaries
+
+
+def _summary_checksum(summary: Dict) -> str:
+    return hashlib.sha1(json.dumps(summary, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def sync_posts(full: bool = False) -> Dict[str, int]:
+    """
+    Sincroniza la réplica local con la API del Blog.
+
+    La API no permite filtrar por fecha de modificación, así que se recorre el
+    listado (solo resúmenes) y se pide el detalle únicamente de los posts nuevos
+    o cuyo resumen cambió; el `updatedAt` del detalle decide si se reescribe la
+    fila. Con `full=True` se pide el detalle de todos los posts.
+    Los posts que ya no aparecen en el listado se eliminan.
+    Los índices de tags y de búsqueda se actualizan con los mismos cambios.
+
+    Args:
+        full: Revisar el detalle de todos los posts
+
+    Returns:
+        dict: Contadores (listed, fetched, created, updated, unchanged, deleted, indexed)
+
+    Raises:
+        RuntimeError: Si el listado de la API no pudo recorrerse completo
+    """
+    stats = {'listed': 0, 'fetched': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'indexed': 0}
+
+    # 1. Recorrer el listado completo (resúmenes)
+    summaries = {summary['id']: summary for summary in _fetch_all_summaries()}
+    stats['listed'] = len(summaries)
+
+    local_posts = {post.id: post for post in Post.query.all()}
+    max_updated_at = None
+    changed = []
+    deleted = []
+
+    # 2. Pedir el detalle de los posts nuevos o modificados
+    for post_id, summary in summaries.items():
+        checksum = _summary_checksum(summary)
+        post = local_posts.get(post_id)
+
+        if post is not None and not full and post.summary_checksum == checksum and post.content_html is not None:
+            stats['unchanged'] += 1
+        else:
+            detail, status_code = fetch_public_post(summary.get('slug', ''))
+            stats['fetched'] += 1
+            if status_code != 200:
+                current_app.logger.warning(f"Sync blog: no se pudo obtener {summary.get('slug')} ({status_code})")
+                continue
+
+            updated_at = parse_api_datetime(detail.get('updatedAt'))
+            if post is None:
+                post = Post(id=post_id)
+                db.session.add(post)
+                post.update_from_api(detail)
+                changed.append(detail)
+                stats['created'] += 1
+            elif post.updated_at != updated_at or post.content_html is None:
+                post.update_from_api(detail)
+                changed.append(detail)
+                stats['updated'] += 1
+            else:
+                stats['unchanged'] += 1
+            post.summary_checksum = checksum
+
+        if post.updated_at and (max_updated_at is None or post.updated_at > max_updated_at):
+            max_updated_at = post.updated_at
+
+    # 3. Eliminar los posts que ya no están publicados
+    for post_id, post in local_posts.items():
+        if post_id not in summaries:
+            db.session.delete(post)
+            deleted.append(post_id)
+            stats['deleted'] += 1
+
+    # 4. Guardar el estado de la sincronización
+    state = BlogSyncState.query.get(1) or BlogSyncState(id=1)
+    now = datetime.utcnow()
+    state.last_sync_at = now
+    if full:
+        state.last_full_sync_at = now
+    state.max_updated_at = max_updated_at
+    state.posts = len(summaries)
+    db.session.add(state)
+    db.session.commit()
+
+    # 5. Reconstruir el índice de tags con el listado recién leído
+    get_tag_index().rebuild(summaries.values())
+
+    # 6. Actualizar el índice de búsqueda (completo si está vacío o en una sincronización completa)
+    search_index = get_search_index()
+    if search_index is not None:
+        if full or search_index.count() == 0:
+            stats['indexed'] = rebuild_search_index(from_mirror=True)
+        else:
+            stats['indexed'] = search_index.index_posts(changed)
+            for post_id in deleted:
+                search_index.remove_post(post_id)
+
+    return stats
+
+
+def rebuild_search_index(from_mirror: Optional[bool] = None) -> int:
+    """
+    Reconstruye el índice de búsqueda desde cero: desde la réplica local si está
+    lista o, si no, recorriendo la API del Blog (listado + detalle de cada post).
+
+    Args:
+        from_mirror: Forzar el origen (por defecto, según `mirror_is_ready()`)
+
+    Returns:
+        int: Cantidad de posts indexados
+
+    Raises:
+        RuntimeError: Si la búsqueda está desactivada o el listado de la API falla
+    """
+    search_index = get_search_index()
+    if search_index is None:
+        raise RuntimeError('La búsqueda está desactivada (BLOG_SEARCH_PATH vacío)')
+
+    if from_mirror is None:
+        from_mirror = mirror_is_ready()
+
+    if from_mirror:
+        posts = [post.to_dict() for post in Post.query.filter(Post.is_published.is_(True)).all()]
+    else:
+        posts = []
+        for summary in _fetch_all_summaries():
+            detail, status_code = fetch_public_post(summary.get('slug', ''))
+            if status_code == 200:
+                posts.append(detail)
+
+    search_index.clear()
+    return search_index.index_posts(posts)
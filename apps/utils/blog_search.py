@@ -0,0 +1,264 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Índice de búsqueda full-text del blog (SQLite FTS5) local.
+
+Indexa título, resumen, tag y el texto plano de `contentHtml` de los posts
+publicados. Las búsquedas no tocan la API del Blog.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Tuple
+
+from markupsafe import escape
+
+from apps.utils.sqlite_local import LocalSQLite
+
+
+# Archivo del índice (vacío para desactivar la búsqueda)
+BLOG_SEARCH_PATH = os.environ.get(
+    'BLOG_SEARCH_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'blog_search.sqlite3')
+)
+
+# Campos del resumen que se guardan junto al documento para pintar los resultados
+SUMMARY_FIELDS = ('id', 'title', 'slug', 'excerpt', 'author', 'tag', 'publishedAt', 'headerImageUrl')
+
+# Peso de cada columna en el ranking bm25: title, excerpt, tag, body
+RANK_WEIGHTS = (10.0, 4.0, 6.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+logger = logging.getLogger(__name__)
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Extrae el texto visible de un fragmento HTML.
+    """
+
+    SKIP_TAGS = ('script', 'style')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Texto plano de un fragmento HTML, con los espacios normalizados.
+    """
+    if not html:
+        return ''
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return ' '.join(' '.join(extractor.parts).split())
+
+
+def build_match_query(query: str) -> str:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra se
+    busca como prefijo y todas deben aparecer (AND implícito).
+    """
+    tokens = _TOKEN_RE.findall(query or '')
+    return ' '.join('"{}"*'.format(token) for token in tokens[:12])
+
+
+class BlogSearchIndex(object):
+    """
+    Índice FTS5 de posts publicados (rowid = ID del post).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = LocalSQLite(path, [
+            'CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5('
+            ' title, excerpt, tag, body, summary UNINDEXED,'
+            ' tokenize = "unicode61 remove_diacritics 2")'
+        ])
+
+    def index_post(self, post: Dict) -> None:
+        """
+        Indexa (o reindexa) un post a partir de su representación completa de la API.
+        Los posts no publicados se eliminan del índice.
+        """
+        self.index_posts([post])
+
+    def index_posts(self, posts: Iterable[Dict]) -> int:
+        """
+        Indexa varios posts en una sola transacción.
+
+        Returns:
+            int: Cantidad de posts indexados
+        """
+        rows = []
+        removed = []
+        for post in posts:
+            if not isinstance(post, dict) or post.get('id') is None:
+                continue
+            if not post.get('isPublished', True):
+                removed.append((post['id'],))
+                continue
+            summary = {field: post.get(field) for field in SUMMARY_FIELDS}
+            rows.append((
+                post['id'],
+                post.get('title') or '',
+                post.get('excerpt') or '',
+                post.get('tag') or '',
+                html_to_text(post.get('contentHtml') or ''),
+                json.dumps(summary, ensure_ascii=False)
+            ))
+
+        try:
+            conn = self._db.connect()
+            conn.executemany('DELETE FROM posts_fts WHERE rowid = ?', [(row[0],) for row in rows] + removed)
+            conn.executemany(
+                'INSERT INTO posts_fts (rowid, title, excerpt, tag, body, summary) VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo actualizar el índice de búsqueda: {str(e)}")
+            return 0
+        return len(rows)
+
+    def remove_post(self, post_id: int) -> None:
+        """
+        Elimina un post del índice.
+        """
+        try:
+            conn = self._db.connect()
+            conn.execute('DELETE FROM posts_fts WHERE rowid = ?', (post_id,))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo eliminar el post {post_id} del índice de búsqueda: {str(e)}")
+
+    def clear(self) -> None:
+        """
+        Vacía el índice (antes de una reindexación completa).
+        """
+        conn = self._db.connect()
+        conn.execute('DELETE FROM posts_fts')
+        conn.commit()
+
+    def count(self) -> int:
+        try:
+            return self._db.connect().execute('SELECT COUNT(*) FROM posts_fts').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> Dict:
+        return {'path': self.path, 'documents': self.count()}
+
+    def search(self, query: str, page: int = 1, limit: int = 9) -> Tuple[List[Dict], int]:
+        """
+        Busca posts ordenados por relevancia (bm25).
+
+        Args:
+            query: Texto introducido por el usuario
+            page: Número de página (desde 1)
+            limit: Resultados por página
+
+        Returns:
+            tuple: (resultados, total). Cada resultado es el resumen del post
+                   (mismos campos que el listado de la API) más un `snippet`
+                   (HTML escapado con las coincidencias en <mark>).
+        """
+        match = build_match_query(query)
+        if not match:
+            return [], 0
+
+        page = max(page, 1)
+        limit = max(limit, 1)
+        try:
+            conn = self._db.connect()
+            total = conn.execute('SELECT COUNT(*) FROM posts_fts WHERE posts_fts MATCH ?', (match,)).fetchone()[0]
+            rows = conn.execute(
+                'SELECT summary, snippet(posts_fts, 3, char(2), char(3), \'…\', 24) '
+                'FROM posts_fts WHERE posts_fts MATCH ? '
+                'ORDER BY bm25(posts_fts, ?, ?, ?, ?) LIMIT ? OFFSET ?',
+                (match,) + RANK_WEIGHTS + (limit, (page - 1) * limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Error en la búsqueda '{query}': {str(e)}")
+            return [], 0
+
+        results = []
+        for summary, snippet in rows:
+            result = json.loads(summary)
+            # El texto se escapa antes de marcar las coincidencias
+            result['snippet'] = str(escape(snippet or '')).replace('\x02', '<mark>').replace('\x03', '</mark>')
+            results.append(result)
+        return results, total
+
+
+_index = BlogSearchIndex(BLOG_SEARCH_PATH) if BLOG_SEARCH_PATH else None
+
+
+def get_search_index():
+    """
+    Índice de búsqueda del proceso, o None si está desactivado (BLOG_SEARCH_PATH vacío).
+    """
+    return _index
+
+
+def get_search_stats():
+    return _index.stats() if _index is not None else {'enabled': False}
+
+
+def search_posts(query: str, page: int = 1, limit: int = 9) -> Tuple[Dict, int]:
+    """
+    Búsqueda con el mismo formato de respuesta que el listado de la API.
+
+    Returns:
+        tuple: (response_json, status_code)
+    """
+    if _index is None:
+        return {'message': 'La búsqueda no está disponible'}, 503
+
+    results, total = _index.search(query, page=page, limit=limit)
+    return {
+        'data': results,
+        'pagination': {
+            'page': max(page, 1),
+            'limit': max(limit, 1),
+            'total': total,
+            'totalPages': (total + max(limit, 1) - 1) // max(limit, 1)
+        }
+    }, 200
+
+
+def search_record_post(post: Dict) -> None:
+    """
+    Indexa un post creado o editado (no hace nada si la búsqueda está desactivada).
+    """
+    if _index is not None:
+        _index.index_post(post)
+
+
+def search_forget_post(post_id: int) -> None:
+    """
+    Elimina un post del índice (no hace nada si la búsqueda está desactivada).
+    """
+    if _index is not None:
+        _index.remove_post(post_id)
@@ -0,0 +1,447 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Cachés (TTL + LRU) para respuestas de las APIs externas.
+
+Hay dos backends intercambiables con la misma interfaz:
+- 'memory': caché en memoria del proceso (por defecto).
+- 'sqlite': archivo SQLite en modo WAL compartido por todos los workers de
+  gunicorn, de modo que se calienta una sola vez y las invalidaciones hechas
+  por un worker las ven todos de inmediato.
+"""
+
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from apps.utils.sqlite_local import LocalSQLite
+
+
+# Estados posibles de una entrada al consultarla
+CACHE_FRESH = 'fresh'
+CACHE_STALE = 'stale'
+CACHE_MISS = 'miss'
+
+# Backend de caché: 'memory' (por proceso) o 'sqlite' (compartido entre workers)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+
+# Archivo del backend 'sqlite'
+CACHE_SQLITE_PATH = os.environ.get(
+    'CACHE_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache.sqlite3')
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache(object):
+    """
+    Caché LRU thread-safe acotada por cantidad de entradas y por bytes.
+
+    Cada entrada es fresca durante `ttl` segundos; después se considera
+    obsoleta (stale) durante `stale_ttl` segundos más, tiempo en el que se puede
+    seguir sirviendo mientras se refresca en segundo plano. Pasado ese margen
+    deja de servirse en condiciones normales, pero se conserva hasta que el LRU
+    la desaloje para usarla como respaldo si la API falla (get_stale).
+    """
+
+    def __init__(self, ttl: float = 60, stale_ttl: float = 600,
+                 max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'stale_hits': 0, 'stale_if_error': 0, 'misses': 0,
+                       'evictions': 0, 'invalidations': 0}
+
+    def get(self, key: str) -> Tuple[Optional[Any], str]:
+        """
+        Busca una entrada en la caché.
+
+        Args:
+            key: Clave de la entrada
+
+        Returns:
+            tuple: (value, state) donde state es CACHE_FRESH, CACHE_STALE o CACHE_MISS.
+                   El valor devuelto es una copia, por lo que puede modificarse libremente.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None, CACHE_MISS
+
+            age = now - entry['stored_at']
+            if age > self.ttl + self.stale_ttl:
+                # Se conserva (hasta que el LRU la desaloje) para servirla si la API falla
+                self._stats['misses'] += 1
+                return None, CACHE_MISS
+
+            self._entries.move_to_end(key)
+            value = entry['value']
+            if age <= self.ttl:
+                self._stats['hits'] += 1
+                state = CACHE_FRESH
+            else:
+                self._stats['stale_hits'] += 1
+                state = CACHE_STALE
+
+        return copy.deepcopy(value), state
+
+    def get_stale(self, key: str, count: bool = True) -> Optional[Any]:
+        """
+        Devuelve la última copia conocida de una entrada sin importar su antigüedad
+        (stale-if-error). Se usa cuando la API externa no responde o confirma
+        con un 304 que la copia sigue vigente.
+
+        Args:
+            key: Clave de la entrada
+            count: Contabilizarla como stale-if-error en las estadísticas
+
+        Returns:
+            Copia del valor, o None si no hay ninguna copia
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if count:
+                self._stats['stale_if_error'] += 1
+            value = entry['value']
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        """
+        Guarda una entrada en la caché, desalojando las menos usadas si hace falta.
+
+        Args:
+            key: Clave de la entrada
+            value: Valor serializable a JSON
+            stored_at: Marca de tiempo de la entrada (por defecto, ahora)
+        """
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        value = copy.deepcopy(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = {
+                'value': value,
+                'size': size,
+                'stored_at': stored_at if stored_at is not None else time.time()
+            }
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, prefix: str = '') -> int:
+        """
+        Elimina todas las entradas cuya clave empieza por `prefix`.
+
+        Args:
+            prefix: Prefijo de clave (vacío para vaciar la caché)
+
+        Returns:
+            int: Cantidad de entradas eliminadas
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            self._stats['invalidations'] += 1
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de uso de la caché.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        stats['backend'] = 'memory'
+        stats['max_entries'] = self.max_entries
+        stats['max_bytes'] = self.max_bytes
+        stats['ttl'] = self.ttl
+        stats['stale_ttl'] = self.stale_ttl
+        return stats
+
+    def _remove(self, key: str) -> None:
+        # Debe llamarse con el lock tomado
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+
+
+class SQLiteCache(object):
+    """
+    Caché compartida entre procesos sobre un archivo SQLite local.
+
+    Misma interfaz y semántica de TTL que ResponseCache. Cada instancia usa
+    su propio `namespace` dentro del archivo. Para no escribir en cada lectura
+    los límites de entradas y bytes se aplican desalojando las entradas más
+    antiguas por fecha de escritura. Los contadores de estadísticas son por proceso.
+    """
+
+    # Cada cuántas escrituras se comprueban los límites de tamaño
+    ENFORCE_EVERY = 32
+
+    def __init__(self, namespace: str, path: str = CACHE_SQLITE_PATH, ttl: float = 60,
+                 stale_ttl: float = 600, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.namespace = namespace
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._db = LocalSQLite(path, [
+            'CREATE TABLE IF NOT EXISTS cache_entries ('
+            ' namespace TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' stored_at REAL NOT NULL,'
+            ' PRIMARY KEY (namespace, key))',
+            'CREATE INDEX IF NOT EXISTS ix_cache_entries_stored_at ON cache_entries (namespace, stored_at)'
+        ])
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {'hits': 0, 'stale_hits': 0, 'stale_if_error': 0, 'misses': 0,
+                       'evictions': 0, 'invalidations': 0, 'errors': 0}
+
+    def get(self, key: str) -> Tuple[Optional[Any], str]:
+        row = self._fetch(key)
+        if row is None:
+            self._count('misses')
+            return None, CACHE_MISS
+
+        value, stored_at = row
+        age = time.time() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            self._count('misses')
+            return None, CACHE_MISS
+        if age <= self.ttl:
+            self._count('hits')
+            return value, CACHE_FRESH
+        self._count('stale_hits')
+        return value, CACHE_STALE
+
+    def get_stale(self, key: str, count: bool = True) -> Optional[Any]:
+        row = self._fetch(key)
+        if row is None:
+            return None
+        if count:
+            self._count('stale_if_error')
+        return row[0]
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        try:
+            conn = self._db.connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, stored_at) VALUES (?, ?, ?, ?, ?)',
+                (self.namespace, key, payload, size, stored_at if stored_at is not None else time.time())
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self._count('errors')
+            logger.warning(f"Caché SQLite: no se pudo guardar {key}: {str(e)}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            enforce = self._writes % self.ENFORCE_EVERY == 0
+        if enforce:
+            self._enforce_limits()
+
+    def invalidate(self, prefix: str = '') -> int:
+        try:
+            conn = self._db.connect()
+            cursor = conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND substr(key, 1, ?) = ?',
+                (self.namespace, len(prefix), prefix)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self._count('errors')
+            logger.warning(f"Caché SQLite: no se pudo invalidar {prefix}*: {str(e)}")
+            return 0
+        self._count('invalidations')
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        try:
+            entries, size = self._db.connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?',
+                (self.namespace,)
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        stats['backend'] = 'sqlite'
+        stats['entries'] = entries
+        stats['bytes'] = size
+        stats['max_entries'] = self.max_entries
+        stats['max_bytes'] = self.max_bytes
+        stats['ttl'] = self.ttl
+        stats['stale_ttl'] = self.stale_ttl
+        return stats
+
+    def _fetch(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            row = self._db.connect().execute(
+                'SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._count('errors')
+            logger.warning(f"Caché SQLite: no se pudo leer {key}: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _enforce_limits(self) -> None:
+        try:
+            conn = self._db.connect()
+            entries, size = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?',
+                (self.namespace,)
+            ).fetchone()
+            evicted = 0
+            rows = conn.execute(
+                'SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY stored_at',
+                (self.namespace,)
+            )
+            keys = []
+            for key, entry_size in rows:
+                if entries - evicted <= self.max_entries and size <= self.max_bytes:
+                    break
+                keys.append((self.namespace, key))
+                evicted += 1
+                size -= entry_size
+            if keys:
+                conn.executemany('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', keys)
+                conn.commit()
+                with self._lock:
+                    self._stats['evictions'] += evicted
+        except sqlite3.Error as e:
+            self._count('errors')
+            logger.warning(f"Caché SQLite: no se pudieron aplicar los límites: {str(e)}")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+class ValidatorStore(object):
+    """
+    Validadores HTTP de las últimas respuestas recibidas (ETag, Last-Modified
+    y una huella del contenido), por clave de caché y acotados por LRU.
+
+    Permiten revalidar con peticiones condicionales (If-None-Match /
+    If-Modified-Since) y reutilizar el cuerpo ya guardado si la API responde 304.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._stats = {'conditional_requests': 0, 'not_modified': 0, 'bytes_saved': 0,
+                       'unchanged_refetches': 0}
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return dict(entry) if entry is not None else None
+
+    def set(self, key: str, etag: Optional[str], last_modified: Optional[str],
+            fingerprint: Optional[str], size: int) -> None:
+        with self._lock:
+            self._entries[key] = {'etag': etag, 'last_modified': last_modified,
+                                  'fingerprint': fingerprint, 'size': size}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix: str = '') -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Incrementa un contador de estadísticas.
+        """
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+
+def create_cache(namespace: str, ttl: float = 60, stale_ttl: float = 600,
+                 max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+    """
+    Crea la caché de un namespace con el backend configurado en CACHE_BACKEND.
+
+    Args:
+        namespace: Nombre lógico de la caché (ej: 'blog', 'portal')
+        ttl: Segundos que una entrada se considera fresca
+        stale_ttl: Segundos adicionales en los que se sirve como obsoleta
+        max_entries: Cantidad máxima de entradas
+        max_bytes: Tamaño máximo aproximado en bytes
+
+    Returns:
+        ResponseCache o SQLiteCache
+    """
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(namespace, CACHE_SQLITE_PATH, ttl=ttl, stale_ttl=stale_ttl,
+                           max_entries=max_entries, max_bytes=max_bytes)
+
+    if CACHE_BACKEND != 'memory':
+        logger.warning(f"CACHE_BACKEND desconocido '{CACHE_BACKEND}', usando 'memory'")
+
+    return ResponseCache(ttl=ttl, stale_ttl=stale_ttl, max_entries=max_entries, max_bytes=max_bytes)
+
+
+def _estimate_size(value: Any) -> int:
+    """
+    Tamaño aproximado en bytes de un valor serializable a JSON.
+    """
+    try:
+        return len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+    except (TypeError, ValueError):
+        return len(repr(value))
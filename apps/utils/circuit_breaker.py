@@ -0,0 +1,166 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Circuit breaker para las APIs externas (Blog y Portal de Clientes).
+
+Tras varios fallos consecutivos (errores de red, respuestas 5xx o llamadas
+demasiado lentas) el circuito se abre y las peticiones fallan de inmediato
+con CircuitOpenError en lugar de esperar el timeout. Pasado el tiempo de
+recuperación se deja pasar una petición de prueba (half-open): si va bien el
+circuito se cierra, si falla se vuelve a abrir.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Fallos consecutivos necesarios para abrir el circuito
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+
+# Segundos que el circuito permanece abierto antes de probar de nuevo
+CIRCUIT_RECOVERY_TIMEOUT = float(os.environ.get('CIRCUIT_RECOVERY_TIMEOUT', '30'))
+
+# Una respuesta que tarda más de estos segundos cuenta como fallo
+CIRCUIT_SLOW_CALL_THRESHOLD = float(os.environ.get('CIRCUIT_SLOW_CALL_THRESHOLD', '5'))
+
+# Peticiones de prueba simultáneas permitidas en estado half-open
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.environ.get('CIRCUIT_HALF_OPEN_MAX_CALLS', '1'))
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    La petición se rechazó sin llegar a la API porque el circuito está abierto.
+    """
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker thread-safe para un upstream.
+    """
+
+    def __init__(self, name: str,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = CIRCUIT_RECOVERY_TIMEOUT,
+                 slow_call_threshold: float = CIRCUIT_SLOW_CALL_THRESHOLD,
+                 half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._opened_at_wall: Optional[float] = None
+        self._half_open_calls = 0
+        self._last_failure: Optional[str] = None
+        self._stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'transitions': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Ejecuta `fn` (una llamada HTTP que devuelve requests.Response) protegida por el circuito.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto
+            requests.RequestException: Si la llamada falla
+        """
+        self._before_call()
+
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._on_failure(type(e).__name__)
+            raise
+
+        elapsed = time.monotonic() - started
+        status_code = getattr(result, 'status_code', 200)
+
+        if status_code >= 500:
+            self._on_failure(f'HTTP {status_code}')
+        elif elapsed > self.slow_call_threshold:
+            with self._lock:
+                self._stats['slow_calls'] += 1
+            self._on_failure(f'lenta ({elapsed:.2f}s)')
+        else:
+            self._on_success()
+
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._state
+            stats['consecutive_failures'] = self._consecutive_failures
+            stats['last_failure'] = self._last_failure
+            stats['opened_at'] = self._opened_at_wall
+        return stats
+
+    def _before_call(self) -> None:
+        with self._lock:
+            self._stats['calls'] += 1
+
+            if self._state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    self._stats['rejected'] += 1
+                    raise CircuitOpenError(f"Circuito '{self.name}' abierto: petición rechazada sin contactar la API")
+                self._transition(STATE_HALF_OPEN)
+
+            if self._state == STATE_HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self._stats['rejected'] += 1
+                    raise CircuitOpenError(f"Circuito '{self.name}' en prueba (half-open): petición rechazada")
+                self._half_open_calls += 1
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def _on_failure(self, reason: str) -> None:
+        with self._lock:
+            self._stats['failures'] += 1
+            self._consecutive_failures += 1
+            self._last_failure = reason
+
+            if self._state == STATE_HALF_OPEN:
+                self._transition(STATE_OPEN)
+            elif self._state == STATE_CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._transition(STATE_OPEN)
+
+    def _transition(self, new_state: str) -> None:
+        # Debe llamarse con el lock tomado
+        old_state = self._state
+        self._state = new_state
+        self._stats['transitions'] += 1
+        self._half_open_calls = 0
+
+        if new_state == STATE_OPEN:
+            self._opened_at = time.monotonic()
+            self._opened_at_wall = time.time()
+            logger.warning(
+                f"Circuit breaker '{self.name}': {old_state} -> {new_state} "
+                f"({self._consecutive_failures} fallos consecutivos, último: {self._last_failure})"
+            )
+        else:
+            logger.info(f"Circuit breaker '{self.name}': {old_state} -> {new_state}")
@@ -5,13 +5,39 @@ Helper para interactuar con la API del Portal de Clientes.
 """
 
 import requests
+import hashlib
+import os
+from urllib.parse import urlencode
 from flask import session, current_app
 from typing import Optional, Dict, Tuple, Any
+from apps.utils.cache import create_cache, CACHE_FRESH
+from apps.utils.circuit_breaker import CircuitBreaker
+from apps.utils.http_client import http_get, http_post, http_put
+from apps.utils.singleflight import SingleFlight, request_key
 
 
 # Base URL de la API del Portal de Clientes
 API_BASE_URL = 'https://clientes.arsystech.net/api'
 
+# Caché corta de lecturas del portal (por usuario). Sin margen stale: los datos
+# de clientes no se sirven vencidos.
+PORTAL_CACHE_TTL = float(os.environ.get('PORTAL_CACHE_TTL', '30'))
+PORTAL_CACHE_MAX_ENTRIES = int(os.environ.get('PORTAL_CACHE_MAX_ENTRIES', '512'))
+
+_cache = create_cache(
+    'portal',
+    ttl=PORTAL_CACHE_TTL,
+    stale_ttl=0,
+    max_entries=PORTAL_CACHE_MAX_ENTRIES,
+    max_bytes=8 * 1024 * 1024
+)
+
+# Circuit breaker del upstream: falla rápido si la API está caída o muy lenta
+_breaker = CircuitBreaker('portal')
+
+# Coalescencia de GETs idénticos concurrentes (misma URL, parámetros y token)
+_flight = SingleFlight()
+
 
 def get_client_portal_token() -> Optional[str]:
     """
@@ -33,13 +59,53 @@ def get_client_portal_user() -> Optional[Dict]:
     return session.get('client_portal_user')
 
 
-def api_get(path: str, params: Optional[Dict] = None) -> Tuple[Dict, int]:
+def _cache_key(token: Optional[str], path: str, params: Optional[Dict] = None) -> str:
+    """
+    Clave de caché: hash del token (identidad), ruta y parámetros ordenados.
+    Cada usuario tiene sus propias entradas; el token nunca se guarda en claro.
+    """
+    identity = hashlib.sha256(token.encode('utf-8')).hexdigest() if token else 'anonymous'
+    query = urlencode(sorted((k, v) for k, v in (params or {}).items() if v is not None))
+    return f"{identity}:{path}?{query}"
+
+
+def invalidate_portal_cache() -> None:
+    """
+    Vacía la caché de lecturas del portal (se llama tras cualquier escritura exitosa,
+    p. ej. al actualizar un cliente). Con el backend SQLite afecta a todos los workers.
+    """
+    _cache.invalidate('')
+
+
+def get_portal_cache_stats() -> Dict:
+    """
+    Estadísticas de la caché de lecturas del portal.
+    """
+    return _cache.stats()
+
+
+def get_portal_breaker_stats() -> Dict:
+    """
+    Estado y métricas del circuit breaker de la API del Portal de Clientes.
+    """
+    return _breaker.stats()
+
+
+def get_portal_flight_stats() -> Dict:
+    """
+    Estadísticas de coalescencia de GETs hacia la API del Portal de Clientes.
+    """
+    return _flight.stats()
+
+
+def api_get(path: str, params: Optional[Dict] = None, use_cache: bool = False) -> Tuple[Dict, int]:
     """
     Realiza una petición GET a la API del Portal de Clientes.
     
     Args:
         path: Ruta relativa del endpoint (ej: '/clients')
         params: Parámetros de query string (opcional)
+        use_cache: Si es True, usa la caché corta de lecturas del usuario actual
     
     Returns:
         tuple: (response_json, status_code)
@@ -49,26 +115,48 @@ def api_get(path: str, params: Optional[Dict] = None) -> Tuple[Dict, int]:
     """
     token = get_client_portal_token()
     
+    if use_cache:
+        key = _cache_key(token, path, params)
+        cached_json, state = _cache.get(key)
+        if state == CACHE_FRESH:
+            return cached_json, 200
+        
+        response_json, status_code = _api_get(path, params, token)
+        if status_code == 200:
+            _cache.set(key, response_json)
+        return response_json, status_code
+    
+    return _api_get(path, params, token)
+
+
+def _api_get(path: str, params: Optional[Dict], token: Optional[str]) -> Tuple[Dict, int]:
+    """
+    Petición GET sin caché.
+    """
     url = f"{API_BASE_URL}{path}"
     headers = {}
     
     if token:
         headers['Authorization'] = f'Bearer {token}'
     
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        
-        # Intentar parsear JSON, si falla devolver texto
+    # Peticiones idénticas concurrentes comparten una sola llamada a la API
+    def fetch():
         try:
-            response_json = response.json()
-        except ValueError:
-            response_json = {'message': response.text}
+            response = _breaker.call(http_get, url, headers=headers, params=params, timeout=10)
+            
+            # Intentar parsear JSON, si falla devolver texto
+            try:
+                response_json = response.json()
+            except ValueError:
+                response_json = {'message': response.text}
+            
+            return response_json, response.status_code
         
-        return response_json, response.status_code
-    
-    except requests.RequestException as e:
-        current_app.logger.error(f"Error en petición GET a {url}: {str(e)}")
-        raise
+        except requests.RequestException as e:
+            current_app.logger.error(f"Error en petición GET a {url}: {str(e)}")
+            raise
+        
+    return _flight.do(request_key('GET', url, params, token), fetch)
 
 
 def api_post(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, int]:
@@ -94,7 +182,7 @@ def api_post(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, int]:
         headers['Authorization'] = f'Bearer {token}'
     
     try:
-        response = requests.post(url, headers=headers, json=json_data, timeout=10)
+        response = _breaker.call(http_post, url, headers=headers, json=json_data, timeout=10)
         
         # Intentar parsear JSON, si falla devolver texto
         try:
@@ -102,6 +190,10 @@ def api_post(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, int]:
         except ValueError:
             response_json = {'message': response.text}
         
+        # Cualquier escritura exitosa invalida las lecturas cacheadas
+        if response.status_code < 400 and not path.startswith('/auth/'):
+            invalidate_portal_cache()
+        
         return response_json, response.status_code
     
     except requests.RequestException as e:
@@ -132,7 +224,7 @@ def api_put(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, int]:
         headers['Authorization'] = f'Bearer {token}'
     
     try:
-        response = requests.put(url, headers=headers, json=json_data, timeout=10)
+        response = _breaker.call(http_put, url, headers=headers, json=json_data, timeout=10)
         
         # Intentar parsear JSON, si falla devolver texto
         try:
@@ -140,6 +232,10 @@ def api_put(path: str, json_data: Optional[Dict] = None) -> Tuple[Dict, int]:
         except ValueError:
             response_json = {'message': response.text}
         
+        # Cualquier escritura exitosa invalida las lecturas cacheadas
+        if response.status_code < 400:
+            invalidate_portal_cache()
+        
         return response_json, response.status_code
     
     except requests.RequestException as e:
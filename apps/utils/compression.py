@@ -0,0 +1,293 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Compresión gzip/Brotli de las respuestas.
+
+- `flask assets compress` escribe junto a cada archivo de texto de
+  apps/static su versión `.gz` y `.br` (nivel máximo, una sola vez).
+- La vista `static` sirve esas versiones según el Accept-Encoding del
+  navegador, con `Vary: Accept-Encoding` y un ETag distinto por codificación.
+- El resto de respuestas de texto (HTML, JSON) a partir de COMPRESS_MIN_SIZE
+  se comprimen al vuelo con un nivel rápido, salvo las que ya traen
+  Content-Encoding (la caché de páginas guarda sus versiones comprimidas).
+
+Brotli es opcional: sin el paquete `brotli` solo se usa gzip.
+"""
+
+import gzip
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app, request
+from werkzeug.http import parse_accept_header
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+
+# Tamaño mínimo (bytes) para comprimir una respuesta o un archivo
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+
+# Niveles para la compresión al vuelo (rápidos) y para los archivos estáticos (máximos)
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '5'))
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# Tipos que se comprimen al vuelo
+COMPRESS_MIMETYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/xml',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+
+# Archivos de static con versión precomprimida (imágenes y woff/woff2 ya van comprimidos)
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.xml', '.ico', '.webmanifest',
+                          '.ttf', '.otf', '.eot')
+
+# Una versión comprimida solo se guarda si ahorra al menos este porcentaje
+_MIN_SAVING = 0.05
+
+# Extensión de archivo y sufijo del ETag de cada codificación, en orden de preferencia
+ENCODINGS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+_stats = {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'static_hits': 0}
+_stats_lock = threading.Lock()
+
+
+def available_encodings() -> List[str]:
+    return [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+def _quality(accepted, encoding: str) -> float:
+    # La entrada exacta manda sobre el comodín ("gzip;q=0, *")
+    for value, quality in accepted:
+        if value.lower() == encoding:
+            return quality
+    for value, quality in accepted:
+        if value == '*':
+            return quality
+    return 0
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """
+    Codificación a usar según Accept-Encoding (prefiere br sobre gzip a igual calidad).
+
+    Returns:
+        'br', 'gzip' o None para enviar el cuerpo sin comprimir
+    """
+    accepted = parse_accept_header(accept_encoding or '')
+    best, best_quality = None, 0
+    for encoding in available:
+        quality = _quality(accepted, encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """
+    Comprime `data` con gzip o Brotli (nivel máximo si `static`).
+    """
+    if encoding == 'br':
+        quality = STATIC_BROTLI_QUALITY if static else COMPRESS_BROTLI_QUALITY
+        return brotli.compress(data, quality=quality)
+    level = STATIC_GZIP_LEVEL if static else COMPRESS_GZIP_LEVEL
+    # mtime=0: el mismo archivo produce siempre los mismos bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def etag_for_encoding(etag: str, encoding: Optional[str]) -> str:
+    # Cada codificación es una representación distinta: ETag fuerte distinto
+    return etag + '-' + ENCODINGS[encoding].lstrip('.') if encoding else etag
+
+
+def etag_variants(etag: str) -> List[str]:
+    """
+    ETag de la representación sin comprimir y de cada versión comprimida.
+    """
+    return [etag] + [etag_for_encoding(etag, encoding) for encoding in ENCODINGS]
+
+
+# Archivos estáticos
+
+def compress_static(static_dir: str, encodings: Optional[List[str]] = None) -> Dict:
+    """
+    Escribe las versiones .gz/.br de los archivos de texto de static. Solo
+    procesa los archivos nuevos o modificados y elimina las versiones de
+    archivos que ya no existen.
+
+    Returns:
+        dict: files, written, skipped, original_bytes y {codificación: bytes}
+    """
+    encodings = encodings or available_encodings()
+    stats: Dict = {'files': 0, 'written': 0, 'skipped': 0, 'original_bytes': 0}
+    stats.update({encoding: 0 for encoding in encodings})
+
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            stem, extension = os.path.splitext(name)
+            if extension in ENCODINGS.values():
+                if not os.path.exists(os.path.join(root, stem)):
+                    os.remove(path)
+                continue
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+
+            size = os.path.getsize(path)
+            if size < COMPRESS_MIN_SIZE:
+                continue
+            stats['files'] += 1
+            stats['original_bytes'] += size
+            mtime = os.path.getmtime(path)
+
+            data = None
+            for encoding in encodings:
+                target = path + ENCODINGS[encoding]
+                if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    stats['skipped'] += 1
+                    stats[encoding] += os.path.getsize(target)
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                compressed = compress(data, encoding, static=True)
+                if len(compressed) > size * (1 - _MIN_SAVING):
+                    # No compensa: se sirve el original
+                    if os.path.exists(target):
+                        os.remove(target)
+                    stats[encoding] += size
+                    continue
+                _write_bytes(target, compressed)
+                stats['written'] += 1
+                stats[encoding] += len(compressed)
+    return stats
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _static_variant(filename: str) -> Tuple[Optional[str], bool]:
+    """
+    Versión precomprimida a servir para `filename`.
+
+    Returns:
+        (codificación o None, si existe alguna versión comprimida)
+    """
+    if not filename.endswith(PRECOMPRESS_EXTENSIONS):
+        return None, False
+    path = safe_join(current_app.static_folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime if path else None
+    except OSError:
+        mtime = None
+    if mtime is None:
+        return None, False
+
+    available = []
+    for encoding in available_encodings():
+        try:
+            # Una versión anterior al original (archivo editado sin volver a comprimir) no sirve
+            if os.stat(path + ENCODINGS[encoding]).st_mtime >= mtime:
+                available.append(encoding)
+        except OSError:
+            pass
+    if not available:
+        return None, False
+    return negotiate_encoding(request.headers.get('Accept-Encoding', ''), available), True
+
+
+def register_static_compression(app) -> None:
+    """
+    Envuelve la vista `static` para servir las versiones .br/.gz de
+    `flask assets compress` a los navegadores que las aceptan.
+    """
+    send_static = app.view_functions['static']
+
+    def static(filename):
+        encoding, compressed = _static_variant(filename)
+        if encoding is None:
+            response = send_static(filename=filename)
+        else:
+            # El tipo se deduce del nombre sin la extensión (main.css.br -> text/css)
+            response = send_static(filename=filename + ENCODINGS[encoding])
+            response.headers['Content-Encoding'] = encoding
+            response.headers.set('Content-Disposition', 'inline', filename=os.path.basename(filename))
+            with _stats_lock:
+                _stats['static_hits'] += 1
+        if compressed:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = static
+
+
+# Respuestas dinámicas
+
+def compress_response(response):
+    """
+    Hook `after_request`: comprime al vuelo las respuestas de texto.
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESS_MIMETYPES
+            or request.endpoint == 'static'):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''), available_encodings())
+    if encoding is None:
+        return response
+
+    compressed = compress(data, encoding)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    with _stats_lock:
+        _stats['responses'] += 1
+        _stats['bytes_in'] += len(data)
+        _stats['bytes_out'] += len(compressed)
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag_for_encoding(etag, encoding), weak=weak)
+        # La validación de apply_http_cache se hizo con el ETag sin comprimir
+        response = response.make_conditional(request.environ)
+    return response
+
+
+def get_compression_stats() -> Dict:
+    """
+    Respuestas comprimidas al vuelo, bytes antes/después y archivos precomprimidos servidos.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['brotli'] = brotli is not None
+    return stats
+
+
+def register_compression(app) -> None:
+    # Debe registrarse antes que apply_http_cache: los hooks after_request se
+    # ejecutan en orden inverso y la compresión tiene que ir después del ETag
+    app.after_request(compress_response)
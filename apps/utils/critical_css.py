@@ -0,0 +1,219 @@
+# -*- encoding: utf-8 -*-
+
+"""
+CSS crítico (primera pantalla) de las plantillas principales.
+
+`flask assets build` renderiza cada plantilla de CRITICAL_TEMPLATES sin
+datos, toma las etiquetas, clases, ids y atributos de los primeros
+CRITICAL_FOLD_ELEMENTS elementos del <body> (cabecera, menú móvil y hero)
+y se queda con las reglas del paquete CSS que solo usan esos nombres. El
+resultado se guarda en `dist/manifest.json` y `head-css.html` lo incrusta
+en un <style>, cargando la hoja completa de forma asíncrona.
+
+No hay navegador de por medio: una regla entra si todos los nombres de
+alguno de sus selectores aparecen en la primera pantalla, sin comprobar la
+estructura. Sobra algo de CSS, pero no falta el de los elementos visibles.
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Set
+
+from flask import before_render_template, g
+from jinja2 import ChainableUndefined
+
+from apps.utils.font_subset import split_statements
+
+
+# Elementos del <body> que se consideran primera pantalla
+CRITICAL_FOLD_ELEMENTS = int(os.environ.get('CRITICAL_FOLD_ELEMENTS', '200'))
+
+# Plantillas con CSS crítico (además de las de /solutions/<nombre>)
+CRITICAL_TEMPLATES = [
+    'pages/index6.html',
+    'pages/blog.html',
+    'pages/blog-detail.html',
+    'pages/portal_clientes.html',
+]
+
+# At-rules cuyo contenido son reglas que se filtran igual que las de primer nivel
+_GROUPING_RULES = ('@media', '@supports', '@layer', '@container')
+
+_PARENS_RE = re.compile(r'\([^()]*\)')
+_PSEUDO_RE = re.compile(r'::?[\w-]+')
+_ATTRIBUTE_RE = re.compile(r'\[\s*([\w-]+)[^\]]*\]')
+_CLASS_RE = re.compile(r'\.((?:[\w-]|\\.)+)')
+_ID_RE = re.compile(r'#((?:[\w-]|\\.)+)')
+_TAG_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+_FAMILY_RE = re.compile(r'font-family\s*:\s*([^;}]+)', re.IGNORECASE)
+_KEYFRAMES_RE = re.compile(r'@(?:-webkit-)?keyframes\s+([\w-]+)', re.IGNORECASE)
+
+
+class _FoldParser(HTMLParser):
+    """
+    Nombres usados por los primeros elementos del <body>.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.count = 0
+        self.in_body = False
+        self.names: Set[str] = {'html', 'body'}
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            self.in_body = True
+        if not self.in_body or self.count >= self.limit:
+            return
+        self.count += 1
+        self.names.add(tag)
+        for name, value in attrs:
+            self.names.add('[' + name)
+            if name == 'class' and value:
+                self.names.update('.' + token for token in value.split())
+            elif name == 'id' and value:
+                self.names.add('#' + value)
+
+    handle_startendtag = handle_starttag
+
+
+def fold_names(html: str, limit: int = CRITICAL_FOLD_ELEMENTS) -> Set[str]:
+    """
+    Etiquetas, clases (.x), ids (#x) y atributos ([x) de la primera pantalla.
+    """
+    parser = _FoldParser(limit)
+    parser.feed(html)
+    parser.close()
+    return parser.names
+
+
+def selector_names(selector: str) -> Set[str]:
+    """
+    Nombres que exige un selector, sin pseudo-clases ni valores de atributos.
+    """
+    previous = None
+    while previous != selector:
+        previous, selector = selector, _PARENS_RE.sub('', selector)
+    names = {'[' + name for name in _ATTRIBUTE_RE.findall(selector)}
+    selector = _PSEUDO_RE.sub('', _ATTRIBUTE_RE.sub('', selector))
+    names.update('.' + name.replace('\\', '') for name in _CLASS_RE.findall(selector))
+    names.update('#' + name.replace('\\', '') for name in _ID_RE.findall(selector))
+    selector = _ID_RE.sub('', _CLASS_RE.sub('', selector))
+    names.update(tag.lower() for tag in _TAG_RE.findall(selector))
+    return names
+
+
+def _rule_matches(prelude: str, names: Set[str]) -> bool:
+    return any(selector_names(selector) <= names for selector in prelude.split(','))
+
+
+def _filter_rules(css: str, names: Set[str]) -> List[str]:
+    kept = []
+    for prelude, text in split_statements(css):
+        if not prelude:
+            continue
+        if prelude.startswith('@'):
+            if prelude.lower().startswith(_GROUPING_RULES):
+                body = text[text.index('{') + 1:text.rindex('}')]
+                inner = _filter_rules(body, names)
+                if inner:
+                    kept.append('{}{{{}}}'.format(prelude, ''.join(inner)))
+            elif prelude.lower().startswith(('@font-face', '@keyframes', '@-webkit-keyframes')):
+                # Se deciden al final, según lo que usen las reglas conservadas
+                kept.append(text.strip())
+            continue
+        if _rule_matches(prelude, names):
+            kept.append(text.strip())
+    return kept
+
+
+def _drop_unused_at_rules(rules: List[str]) -> List[str]:
+    used = ''.join(rule for rule in rules if not rule.startswith(('@font-face', '@keyframes', '@-webkit-keyframes')))
+    families = {family.strip().strip('"\'').lower()
+                for value in _FAMILY_RE.findall(used) for family in value.split(',')}
+    # Font Awesome 6 declara la familia en variables (--fa-font-solid: ... "Font Awesome 6 Pro")
+    families.update(name.lower() for name in re.findall(r'"([^"]+)"', used))
+
+    kept = []
+    for rule in rules:
+        if rule.startswith('@font-face'):
+            match = _FAMILY_RE.search(rule)
+            if not match or match.group(1).strip().strip('"\'').lower() not in families:
+                continue
+        elif rule.startswith(('@keyframes', '@-webkit-keyframes')):
+            match = _KEYFRAMES_RE.match(rule)
+            if not match or not re.search(r'\b{}\b'.format(re.escape(match.group(1))), used):
+                continue
+        kept.append(rule)
+    return kept
+
+
+def extract_critical(css: str, html: str, limit: int = CRITICAL_FOLD_ELEMENTS) -> str:
+    """
+    Reglas de `css` que afectan a la primera pantalla de `html` (sin minificar).
+    """
+    return '\n'.join(_drop_unused_at_rules(_filter_rules(css, fold_names(html, limit))))
+
+
+def critical_templates() -> List[str]:
+    from apps.pages.routes import SOLUTION_TEMPLATES
+
+    return CRITICAL_TEMPLATES + ['pages/' + name for name in SOLUTION_TEMPLATES.values()]
+
+
+class _EmptyUndefined(ChainableUndefined):
+    """
+    Variable ausente que también admite llamadas (post.get('title')).
+    """
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+def render_without_data(app, name: str) -> str:
+    """
+    Renderiza una plantilla sin los datos de la vista: las variables que
+    faltan quedan vacías (posts, cliente, formulario...).
+    """
+    env = app.jinja_env.overlay(undefined=_EmptyUndefined)
+    with app.test_request_context('/'):
+        context: Dict = {}
+        app.update_template_context(context)
+        return env.get_template(name).render(context)
+
+
+def build_critical(app, css: str, templates: Iterable[str]) -> Dict:
+    """
+    CSS crítico de cada plantilla.
+
+    Args:
+        app: Aplicación Flask (para renderizar las plantillas)
+        css: Hoja completa con las url() ya absolutas (el <style> va en la página)
+        templates: Nombres de las plantillas
+
+    Returns:
+        dict: {'pages': {plantilla: css}, 'errors': {plantilla: mensaje}}
+    """
+    pages, errors = {}, {}
+    for name in templates:
+        try:
+            html = render_without_data(app, name)
+        except Exception as e:
+            errors[name] = str(e)
+            continue
+        pages[name] = extract_critical(css, html)
+    return {'pages': pages, 'errors': errors}
+
+
+def _remember_page_template(sender, template, context, **extra) -> None:
+    g.page_template = template.name
+
+
+def register_critical_css(app) -> None:
+    """
+    Guarda en `g.page_template` la plantilla principal de cada respuesta
+    (render_template), que es la que decide el CSS crítico.
+    """
+    before_render_template.connect(_remember_page_template, app)
@@ -0,0 +1,104 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Creación del esquema de la base de datos al arrancar.
+
+`db.create_all()` se ejecuta una sola vez al crear la aplicación (o con
+`flask database create` si DB_CREATE_ON_STARTUP=False, por ejemplo cuando
+el esquema lo gestionan las migraciones de `flask db upgrade`), no antes de
+cada petición. Si el DBMS configurado no responde se usa SQLite, igual que
+antes, pero la decisión se toma al arrancar y queda en `get_database_status()`.
+
+Después del arranque las conexiones se cierran: el motor vuelve a conectar
+solo cuando una ruta usa la base de datos (portal, réplica del blog).
+"""
+
+import os
+import threading
+import time
+from typing import Dict
+
+from apps import db
+
+
+# Crear las tablas al crear la aplicación (False: solo con `flask database create`)
+DB_CREATE_ON_STARTUP = (os.getenv('DB_CREATE_ON_STARTUP', 'True') == 'True')
+
+_status = {'ready': False, 'bootstrap': None, 'fallback': False, 'error': None, 'seconds': None}
+_status_lock = threading.Lock()
+
+
+def _sqlite_uri() -> str:
+    basedir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return 'sqlite:///' + os.path.join(basedir, 'db.sqlite3')
+
+
+def _create_all(app) -> None:
+    try:
+        db.create_all(app=app)
+    except Exception:
+        # Otro worker puede estar creando las mismas tablas a la vez: un segundo
+        # intento ya las encuentra creadas
+        db.create_all(app=app)
+
+
+def create_schema(app) -> Dict:
+    """
+    Crea las tablas que falten; si el DBMS configurado falla, pasa a SQLite.
+
+    Returns:
+        dict: Estado de la base de datos (ver get_database_status)
+    """
+    start = time.perf_counter()
+    fallback, error = False, None
+    try:
+        _create_all(app)
+    except Exception as e:
+        error = str(e)
+        app.logger.error('> Error: DBMS Exception: ' + error)
+        app.logger.warning('> Fallback to SQLite ')
+        fallback = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = _sqlite_uri()
+        _create_all(app)
+    finally:
+        # Sin conexiones abiertas hasta que una petición las necesite
+        db.get_engine(app).dispose()
+
+    with _status_lock:
+        _status.update(ready=True, bootstrap='create_all', fallback=fallback, error=error,
+                       seconds=round(time.perf_counter() - start, 4))
+    return get_database_status()
+
+
+def bootstrap_database(app) -> None:
+    """
+    Prepara el esquema al crear la aplicación según DB_CREATE_ON_STARTUP.
+    """
+    if not DB_CREATE_ON_STARTUP:
+        # El esquema lo crean las migraciones o `flask database create`
+        with _status_lock:
+            _status.update(ready=True, bootstrap='skipped')
+        return
+
+    try:
+        create_schema(app)
+    except Exception as e:
+        # Ni siquiera SQLite: la app arranca y las rutas que usan la base de datos fallan
+        app.logger.error('> Error: no se pudo crear el esquema: ' + str(e))
+        with _status_lock:
+            _status.update(ready=False, bootstrap='failed', error=str(e))
+
+
+def database_ready() -> bool:
+    """
+    Indica si el esquema se creó (o se dejó a las migraciones) al arrancar.
+    """
+    return _status['ready']
+
+
+def get_database_status() -> Dict:
+    """
+    Estado del arranque de la base de datos: ready, bootstrap, fallback, error y seconds.
+    """
+    with _status_lock:
+        return dict(_status)
@@ -0,0 +1,379 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Subconjunto de Font Awesome con solo los iconos que usa el sitio.
+
+`flask assets fonts` busca en las plantillas (y en el JS propio) las clases
+de icono (`fa-phone`) y de estilo (`fa-solid`, `fab`...) que se usan, y
+los `content` de las hojas de estilo propias que apuntan a una familia de
+Font Awesome. Con eso genera:
+
+- `fonts/subset/<fuente>.woff2`: solo los glifos usados y solo de los
+  estilos usados (el resto de pesos desaparece).
+- `css/fontawesome.subset.css`: `fontawesome.css` sin las reglas de los
+  iconos no usados y con los @font-face apuntando a los subconjuntos.
+- `fonts/subset/report.json`: iconos, estilos y bytes ahorrados.
+
+`head-css.html` usa la hoja recortada cuando existe (`fontawesome_css()`).
+Requiere fontTools (y brotli para WOFF2; sin brotli se genera WOFF).
+"""
+
+import json
+import os
+import posixpath
+import re
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import current_app
+
+
+# Hoja de estilos original y recortada, relativas a la carpeta static
+FONTAWESOME_CSS = 'css/fontawesome.css'
+FONTAWESOME_SUBSET_CSS = 'css/fontawesome.subset.css'
+FONTS_DIR = 'fonts'
+SUBSET_DIR = 'fonts/subset'
+REPORT_NAME = 'report.json'
+
+# Iconos que se añaden aunque no aparezcan en las plantillas (ej: los que se
+# generan desde JS o desde datos), separados por comas: "fa-bars,fa-xmark"
+FONT_SUBSET_EXTRA_ICONS = [
+    name.strip() for name in os.environ.get('FONT_SUBSET_EXTRA_ICONS', '').split(',') if name.strip()
+]
+
+# Clase de estilo -> estilo
+STYLE_CLASSES = {
+    'fa': 'solid', 'fas': 'solid', 'fa-solid': 'solid',
+    'far': 'regular', 'fa-regular': 'regular',
+    'fal': 'light', 'fa-light': 'light',
+    'fat': 'thin', 'fa-thin': 'thin',
+    'fad': 'duotone', 'fa-duotone': 'duotone',
+    'fab': 'brands', 'fa-brands': 'brands',
+    'fass': 'sharp-solid', 'fa-sharp': 'sharp-solid', 'fa-sharp-solid': 'sharp-solid',
+    'fasr': 'sharp-regular', 'fa-sharp-regular': 'sharp-regular',
+    'fasl': 'sharp-light', 'fa-sharp-light': 'sharp-light',
+}
+
+# Estilo -> (familia de Font Awesome 6, fuente)
+STYLE_FONTS = {
+    'solid': ('Font Awesome 6 Pro', 'fa-solid-900'),
+    'regular': ('Font Awesome 6 Pro', 'fa-regular-400'),
+    'light': ('Font Awesome 6 Pro', 'fa-light-300'),
+    'thin': ('Font Awesome 6 Pro', 'fa-thin-100'),
+    'duotone': ('Font Awesome 6 Duotone', 'fa-duotone-900'),
+    'brands': ('Font Awesome 6 Brands', 'fa-brands-400'),
+    'sharp-solid': ('Font Awesome 6 Sharp', 'fa-sharp-solid-900'),
+    'sharp-regular': ('Font Awesome 6 Sharp', 'fa-sharp-regular-400'),
+    'sharp-light': ('Font Awesome 6 Sharp', 'fa-sharp-light-300'),
+}
+
+# Clases fa-* que no son iconos (tamaños, animaciones, utilidades)
+_NON_ICON_RE = re.compile(
+    r'^fa-(\d*x|2xs|xs|sm|lg|xl|2xl|fw|ul|li|border|pull-\w+|beat|beat-fade|bounce|fade|flip|shake|spin'
+    r'|spin-pulse|spin-reverse|pulse|rotate-\w+|flip-\w+|stack|stack-\dx|inverse|swap-opacity|sr-only'
+    r'|sr-only-focusable|width-auto|classic)$'
+)
+
+_CLASS_TOKEN_RE = re.compile(r'(?<![\w-])(fa[a-z]?|fa-[a-z0-9]+(?:-[a-z0-9]+)*)(?![\w-])')
+_ICON_SELECTOR_RE = re.compile(r'^(?:\.(?:fad|fa-duotone))?\.(fa-[a-z0-9-]+)::?(?:before|after)$')
+_CONTENT_RE = re.compile(r'content:\s*"((?:\\[0-9a-fA-F]+)+)"')
+_FAMILY_RE = re.compile(r'font-family:\s*([^;}]+)')
+_URL_RE = re.compile(r'url\("?\.\./fonts/([\w-]+)\.(?:woff2|ttf)"?\)')
+_SCAN_EXTENSIONS = ('.html', '.js')
+
+_css_path: Optional[str] = None
+
+
+def split_statements(css: str) -> List[Tuple[str, str]]:
+    """
+    Divide una hoja de estilos en sentencias de primer nivel (prelude, texto completo).
+    Tiene en cuenta comentarios, cadenas y bloques anidados (@keyframes, @media).
+    """
+    statements = []
+    start = 0
+    depth = 0
+    block_start = 0
+    i = 0
+    length = len(css)
+    while i < length:
+        char = css[i]
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            continue
+        if char in ('"', "'"):
+            end = i + 1
+            while end < length and css[end] != char:
+                end += 2 if css[end] == '\\' else 1
+            i = end + 1
+            continue
+        if char == '{':
+            if depth == 0:
+                block_start = i
+            depth += 1
+        elif char == '}' and depth == 0:
+            # Llave sin abrir: sentencia propia, para no absorber el resto de la hoja
+            statements.append(('', css[start:i + 1]))
+            start = i + 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                # Prelude hasta la llave real (no una dentro de un comentario o una cadena)
+                prelude = re.sub(r'/\*.*?\*/', '', css[start:block_start], flags=re.S).strip()
+                statements.append((prelude, css[start:i + 1]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            # @charset / @import
+            text = css[start:i + 1]
+            statements.append((text.strip(), text))
+            start = i + 1
+        i += 1
+    if css[start:].strip():
+        statements.append(('', css[start:]))
+    return statements
+
+
+def _codepoints(escaped: str) -> Set[int]:
+    return {int(part, 16) for part in escaped.split('\\') if part}
+
+
+def _families(value: str) -> List[str]:
+    return [family.strip().strip('"\'') for family in value.split(',')]
+
+
+def scan_usage(paths: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+    """
+    Clases de icono y estilos usados en los archivos indicados.
+
+    Returns:
+        tuple: (nombres de icono 'fa-xxx', estilos 'solid'/'brands'/...)
+    """
+    icons = set(FONT_SUBSET_EXTRA_ICONS)
+    styles = set()
+    for path in paths:
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+        for token in _CLASS_TOKEN_RE.findall(text):
+            if token in STYLE_CLASSES:
+                styles.add(STYLE_CLASSES[token])
+            elif token.startswith('fa-') and not _NON_ICON_RE.match(token):
+                icons.add(token)
+    return icons, styles
+
+
+def _scan_paths(app) -> List[str]:
+    paths = []
+    roots = [os.path.join(app.root_path, app.template_folder), os.path.join(app.static_folder, 'js')]
+    for root_dir in roots:
+        for root, dirs, files in os.walk(root_dir):
+            dirs.sort()
+            for name in sorted(files):
+                # fontawesome.js contiene los nombres de todas las clases
+                if name.endswith(_SCAN_EXTENSIONS) and not name.startswith('fontawesome'):
+                    paths.append(os.path.join(root, name))
+    return paths
+
+
+def _external_references(static_dir: str) -> Dict[str, Set[int]]:
+    """
+    Familias de Font Awesome usadas directamente desde otras hojas de estilo
+    (ej: `font-family: "FontAwesome"; content: "\\f062"` en main.css).
+    """
+    references: Dict[str, Set[int]] = {}
+    css_dir = os.path.join(static_dir, 'css')
+    for name in sorted(os.listdir(css_dir)):
+        if not name.endswith('.css') or name.startswith('fontawesome'):
+            continue
+        with open(os.path.join(css_dir, name), encoding='utf-8', errors='ignore') as f:
+            css = f.read()
+        for _, text in split_statements(css):
+            family = _FAMILY_RE.search(text)
+            content = _CONTENT_RE.search(text)
+            if not family or not content:
+                continue
+            for family_name in _families(family.group(1)):
+                if 'fontawesome' in family_name.lower().replace(' ', ''):
+                    references.setdefault(family_name, set()).update(_codepoints(content.group(1)))
+    return references
+
+
+def _icon_codepoints(statements: List[Tuple[str, str]]) -> Dict[str, Set[int]]:
+    codepoints: Dict[str, Set[int]] = {}
+    for prelude, text in statements:
+        content = _CONTENT_RE.search(text)
+        if not content:
+            continue
+        for selector in prelude.split(','):
+            match = _ICON_SELECTOR_RE.match(selector.strip())
+            if match:
+                codepoints.setdefault(match.group(1), set()).update(_codepoints(content.group(1)))
+    return codepoints
+
+
+def _subset_font(source: str, target: str, unicodes: Set[int], flavor: str) -> Tuple[int, int]:
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = flavor
+    # Las ligaduras hacen falta para la segunda capa de los iconos duotone
+    options.layout_features = ['*']
+    options.notdef_outline = True
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=sorted(unicodes))
+    subsetter.subset(font)
+    glyphs = len(font.getBestCmap() or {})
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix='.tmp-')
+    os.close(fd)
+    try:
+        subset.save_font(font, tmp_path, options)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.path.getsize(target), glyphs
+
+
+def build_font_subset(app) -> Dict:
+    """
+    Genera los subconjuntos de las fuentes, la hoja recortada y el informe.
+
+    Returns:
+        dict: Informe (iconos, estilos, bytes antes/después por fuente)
+
+    Raises:
+        RuntimeError: Si fontTools no está instalado
+    """
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        raise RuntimeError('fontTools no está instalado (pip install fonttools brotli)')
+    try:
+        import brotli  # noqa: F401
+        flavor = 'woff2'
+    except ImportError:
+        flavor = 'woff'
+
+    static_dir = app.static_folder
+    with open(os.path.join(static_dir, FONTAWESOME_CSS), encoding='utf-8') as f:
+        statements = split_statements(f.read())
+
+    icons, styles = scan_usage(_scan_paths(app))
+    if icons and not styles:
+        styles.add('solid')
+    references = _external_references(static_dir)
+
+    known = _icon_codepoints(statements)
+    unknown = sorted(name for name in icons if name not in known)
+    icons = {name for name in icons if name in known}
+    icon_codepoints = set().union(*(known[name] for name in icons)) if icons else set()
+
+    # Fuente -> glifos necesarios, y familias cuyas @font-face se conservan
+    fonts: Dict[str, Set[int]] = {}
+    for style in styles:
+        fonts.setdefault(STYLE_FONTS[style][1], set()).update(icon_codepoints)
+    kept_faces = {(STYLE_FONTS[style][0], STYLE_FONTS[style][1]) for style in styles}
+    for prelude, text in statements:
+        if prelude != '@font-face':
+            continue
+        family = _families(_FAMILY_RE.search(text).group(1))[0]
+        font = _URL_RE.search(text)
+        if family in references and font:
+            fonts.setdefault(font.group(1), set()).update(references[family])
+            kept_faces.add((family, font.group(1)))
+
+    # Subconjuntos
+    extension = '.' + flavor
+    report_fonts = {}
+    all_fonts = sorted({match for _, text in statements for match in _URL_RE.findall(text)})
+    for font in all_fonts:
+        original = os.path.getsize(os.path.join(static_dir, FONTS_DIR, font + '.woff2'))
+        size, glyphs = 0, 0
+        if fonts.get(font):
+            target = os.path.join(static_dir, SUBSET_DIR, font + extension)
+            size, glyphs = _subset_font(os.path.join(static_dir, FONTS_DIR, font + '.ttf'), target, fonts[font], flavor)
+            if not glyphs:
+                # Ninguno de los iconos usados está en esta fuente: su @font-face se elimina
+                os.remove(target)
+                size = 0
+        report_fonts[font] = {'original_bytes': original, 'subset_bytes': size, 'glyphs': glyphs}
+
+    # Hoja recortada
+    output = []
+    for prelude, text in statements:
+        if prelude == '@font-face':
+            family = _families(_FAMILY_RE.search(text).group(1))[0]
+            font = _URL_RE.search(text)
+            if not font or (family, font.group(1)) not in kept_faces or not report_fonts[font.group(1)]['subset_bytes']:
+                continue
+            url = posixpath.relpath(posixpath.join(SUBSET_DIR, font.group(1) + extension),
+                                    posixpath.dirname(FONTAWESOME_SUBSET_CSS))
+            text = re.sub(r'src:[^;}]+', 'src: url("{}") format("{}")'.format(url, flavor), text)
+            output.append(text)
+            continue
+
+        selectors = [selector.strip() for selector in prelude.split(',')] if prelude else []
+        matches = [_ICON_SELECTOR_RE.match(selector) for selector in selectors]
+        if selectors and any(matches):
+            kept = [selector for selector, match in zip(selectors, matches) if not match or match.group(1) in icons]
+            if not kept:
+                continue
+            if len(kept) != len(selectors):
+                text = text[text.index('{'):]
+                text = '\n' + ',\n'.join(kept) + ' ' + text
+        output.append(text)
+
+    css = ''.join(output).strip() + '\n'
+    _write_text(os.path.join(static_dir, FONTAWESOME_SUBSET_CSS), css)
+
+    original_css = os.path.getsize(os.path.join(static_dir, FONTAWESOME_CSS))
+    report = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'flavor': flavor,
+        'styles': sorted(styles),
+        'icons': sorted(icons),
+        'unknown_icons': unknown,
+        'external_families': {family: len(codes) for family, codes in sorted(references.items())},
+        'fonts': report_fonts,
+        'css': {'original_bytes': original_css, 'subset_bytes': len(css.encode('utf-8'))},
+        'original_bytes': sum(font['original_bytes'] for font in report_fonts.values()) + original_css,
+        'subset_bytes': sum(font['subset_bytes'] for font in report_fonts.values()) + len(css.encode('utf-8')),
+    }
+    _write_text(os.path.join(static_dir, SUBSET_DIR, REPORT_NAME), json.dumps(report, indent=2, sort_keys=True))
+    _remove_stale(os.path.join(static_dir, SUBSET_DIR), {font + extension for font in report_fonts
+                                                         if report_fonts[font]['subset_bytes']})
+    return report
+
+
+def _write_text(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def _remove_stale(subset_dir: str, keep: Set[str]) -> None:
+    for name in os.listdir(subset_dir):
+        if name != REPORT_NAME and name not in keep:
+            os.remove(os.path.join(subset_dir, name))
+
+
+def fontawesome_css() -> str:
+    """
+    Hoja de Font Awesome a enlazar (o a incluir en el paquete CSS): la
+    recortada si se generó con `flask assets fonts`, si no la original.
+    Se decide una vez por proceso.
+    """
+    global _css_path
+
+    if _css_path is None:
+        subset = os.path.join(current_app.static_folder, FONTAWESOME_SUBSET_CSS)
+        _css_path = FONTAWESOME_SUBSET_CSS if os.path.exists(subset) else FONTAWESOME_CSS
+    return _css_path
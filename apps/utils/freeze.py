@@ -0,0 +1,227 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Exportación estática (pre-renderizada) de las páginas públicas.
+
+`flask freeze` renderiza con la propia aplicación (mismas plantillas y mismo
+minificado) las páginas de `route_template`, `solution_page`, `terminos`,
+`privacidad`, la home y el blog, y las escribe como HTML en FREEZE_DIR para
+que nginx las sirva sin pasar por gunicorn. `manifest.json` lista las
+páginas exportadas y las rutas que siguen atendiéndose en Flask. Cada
+página se escribe también comprimida (.gz/.br) para nginx.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from flask import Flask
+
+from apps.utils.compression import COMPRESS_MIN_SIZE, ENCODINGS, available_encodings, compress
+
+
+# Directorio de salida (nginx lo sirve como raíz de documentos)
+FREEZE_DIR = os.environ.get(
+    'FREEZE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'frozen')
+)
+
+MANIFEST_NAME = 'manifest.json'
+
+# Rutas exportadas que dependen de los posts del blog
+BLOG_ROUTES_PREFIX = '/blog'
+
+_manifest_lock = threading.Lock()
+
+
+def route_to_file(route: str) -> str:
+    """
+    Archivo (relativo a FREEZE_DIR) de una ruta, según el `try_files $uri.html
+    $uri/index.html` de nginx.
+    """
+    if route == '/':
+        return 'index.html'
+    return route.strip('/') + '.html'
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.freeze-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_manifest(output_dir: str = FREEZE_DIR) -> Optional[Dict]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(output_dir: str, manifest: Dict) -> None:
+    payload = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+    _write_atomic(os.path.join(output_dir, MANIFEST_NAME), payload)
+
+
+def collect_routes(app: Flask, blog: bool = True) -> List[str]:
+    """
+    Rutas públicas a exportar. Debe llamarse con un contexto de aplicación.
+    """
+    from apps.pages.routes import SOLUTION_TEMPLATES
+
+    routes = ['/']
+
+    from apps.utils.page_registry import page_slugs
+
+    routes.extend('/' + slug for slug in sorted(page_slugs()))
+
+    routes.extend('/solutions/' + name for name in sorted(SOLUTION_TEMPLATES))
+
+    if blog:
+        from apps.utils.blog_mirror import list_public_slugs
+
+        routes.append(BLOG_ROUTES_PREFIX)
+        routes.extend('{}/{}'.format(BLOG_ROUTES_PREFIX, slug) for slug in sorted(list_public_slugs()))
+
+    return routes
+
+
+def _flask_routes(app: Flask) -> List[Dict]:
+    rules = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        methods = sorted(m for m in rule.methods if m not in ('HEAD', 'OPTIONS'))
+        rules.append({'rule': rule.rule, 'endpoint': rule.endpoint, 'methods': methods})
+    return rules
+
+
+def freeze_site(app: Flask, output_dir: str = FREEZE_DIR, blog: bool = True,
+                routes: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Renderiza las páginas públicas y las escribe en `output_dir`.
+
+    Cada página se pide a la aplicación con el cliente de pruebas (como un
+    visitante anónimo), así que el HTML es idéntico al que serviría Flask.
+    Solo se escriben respuestas 200 HTML; los archivos de una exportación
+    anterior que ya no corresponden a ninguna página se eliminan.
+
+    Args:
+        app: Aplicación Flask
+        output_dir: Directorio de salida
+        blog: Exportar también el listado y el detalle de los posts
+        routes: Rutas a exportar (por defecto, `collect_routes`)
+
+    Returns:
+        dict: Manifiesto generado
+    """
+    if routes is None:
+        routes = collect_routes(app, blog=blog)
+
+    previous = load_manifest(output_dir) or {}
+    pages = {}
+    skipped = {}
+
+    client = app.test_client()
+    for route in routes:
+        response = client.get(route)
+        if response.status_code != 200 or response.mimetype != 'text/html':
+            skipped[route] = response.status_code
+            continue
+        filename = route_to_file(route)
+        path = os.path.normpath(os.path.join(output_dir, filename))
+        if os.path.commonpath([path, os.path.abspath(output_dir)]) != os.path.abspath(output_dir):
+            # Un slug con '..' nunca debe escribir fuera del directorio de salida
+            skipped[route] = 'invalid'
+            continue
+        _write_page(path, response.get_data())
+        pages[route] = filename
+
+    for route, filename in previous.get('pages', {}).items():
+        if route not in pages:
+            _remove_file(output_dir, filename)
+
+    manifest = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'minified': not app.debug,
+        'pages': pages,
+        'skipped': skipped,
+        # Todo lo que no esté en `pages` (o lleve query string o cookie de sesión) lo atiende Flask
+        'flask_routes': _flask_routes(app),
+    }
+    with _manifest_lock:
+        _save_manifest(output_dir, manifest)
+    return manifest
+
+
+def _write_page(path: str, data: bytes) -> None:
+    # Con versiones .gz/.br al lado para gzip_static/brotli_static de nginx
+    _write_atomic(path, data)
+    for encoding, extension in ENCODINGS.items():
+        if len(data) >= COMPRESS_MIN_SIZE and encoding in available_encodings():
+            _write_atomic(path + extension, compress(data, encoding, static=True))
+        elif os.path.exists(path + extension):
+            os.remove(path + extension)
+
+
+def _remove_file(output_dir: str, filename: str) -> None:
+    path = os.path.join(output_dir, filename)
+    for target in [path] + [path + extension for extension in ENCODINGS.values()]:
+        try:
+            os.remove(target)
+        except FileNotFoundError:
+            pass
+    # Eliminar directorios vacíos (ej: blog/) sin salir de output_dir
+    parent = os.path.dirname(path)
+    while os.path.abspath(parent) != os.path.abspath(output_dir):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def unfreeze_blog(output_dir: str = FREEZE_DIR) -> int:
+    """
+    Elimina de la exportación las páginas que muestran posts (home y blog),
+    para que nginx las pida a Flask hasta la próxima exportación.
+    Se llama tras crear, editar o eliminar un post.
+
+    Returns:
+        int: Cantidad de páginas eliminadas
+    """
+    with _manifest_lock:
+        manifest = load_manifest(output_dir)
+        if not manifest:
+            return 0
+
+        removed = [route for route in manifest.get('pages', {})
+                   if route == '/' or route == BLOG_ROUTES_PREFIX or route.startswith(BLOG_ROUTES_PREFIX + '/')]
+        for route in removed:
+            _remove_file(output_dir, manifest['pages'].pop(route))
+
+        if removed:
+            _save_manifest(output_dir, manifest)
+    return len(removed)
+
+
+def clear_frozen(output_dir: str = FREEZE_DIR) -> None:
+    """
+    Elimina la exportación completa (todo pasa a servirse desde Flask).
+    """
+    with _manifest_lock:
+        manifest = load_manifest(output_dir)
+        if not manifest:
+            return
+        for filename in manifest.get('pages', {}).values():
+            _remove_file(output_dir, filename)
+        os.remove(os.path.join(output_dir, MANIFEST_NAME))
@@ -0,0 +1,160 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Validadores HTTP (ETag / Last-Modified), respuestas 304 y Cache-Control por ruta.
+
+Todas las respuestas HTML y JSON de las vistas reciben un ETag fuerte
+calculado sobre el cuerpo final (ya minificado). Las vistas del blog pueden
+calcularlo antes de renderizar a partir de los datos (updatedAt o la huella
+del listado) con `page_etag` + `not_modified`, y así responder 304 sin
+renderizar la plantilla.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Optional
+
+from flask import Response, g, request, session
+
+from apps.utils.compression import etag_variants
+from apps.utils.page_cache import get_templates_hash
+
+
+# Segundos que navegadores y proxies pueden reutilizar una página pública sin revalidar
+HTML_CACHE_MAX_AGE = int(os.environ.get('HTML_CACHE_MAX_AGE', '300'))
+
+# Igual para las páginas públicas del blog (cambian con cada publicación)
+BLOG_HTML_CACHE_MAX_AGE = int(os.environ.get('BLOG_HTML_CACHE_MAX_AGE', '60'))
+
+# Páginas públicas de marketing
+PUBLIC_ENDPOINTS = (
+    'pages_blueprint.index',
+    'pages_blueprint.route_template',
+    'pages_blueprint.solution_page',
+    'pages_blueprint.terminos',
+    'pages_blueprint.privacidad',
+)
+
+# Páginas públicas del blog
+BLOG_ENDPOINTS = (
+    'pages_blueprint.blog_public',
+    'pages_blueprint.blog_search',
+    'pages_blueprint.blog_search_json',
+    'pages_blueprint.blog_post_detail',
+)
+
+# Respuestas que nunca deben guardarse (portal, login, depuración)
+NO_STORE = 'private, no-store'
+
+_CONDITIONAL_MIMETYPES = ('text/html', 'application/json')
+
+
+def _has_portal_session() -> bool:
+    return bool(session.get('client_portal_token'))
+
+
+def _is_public_endpoint(endpoint: Optional[str]) -> bool:
+    return endpoint in PUBLIC_ENDPOINTS or endpoint in BLOG_ENDPOINTS
+
+
+def cache_control_for(endpoint: Optional[str]) -> str:
+    """
+    Política Cache-Control de un endpoint.
+
+    Las páginas públicas se pueden cachear en proxies durante un tiempo corto;
+    si el visitante tiene sesión en el portal (la barra de navegación cambia)
+    solo las cachea su navegador, revalidando siempre. Todo lo demás
+    (portal de clientes, panel del blog, login) no se guarda.
+    """
+    if _is_public_endpoint(endpoint):
+        if _has_portal_session():
+            return 'private, no-cache'
+        max_age = BLOG_HTML_CACHE_MAX_AGE if endpoint in BLOG_ENDPOINTS else HTML_CACHE_MAX_AGE
+        return 'public, max-age={}'.format(max_age)
+    return NO_STORE
+
+
+def page_etag(*parts: Any) -> str:
+    """
+    ETag de una página calculado a partir de sus datos, sin renderizarla.
+    Incluye el hash de las plantillas y la variante de sesión.
+    """
+    payload = json.dumps([get_templates_hash(), _has_portal_session(), request.full_path, parts],
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """
+    Registra el ETag (y Last-Modified) de la página en curso y, si el cliente
+    ya tiene esa versión (If-None-Match / If-Modified-Since), devuelve la
+    respuesta 304 para que la vista no renderice nada.
+
+    Returns:
+        Response 304, o None si hay que renderizar la página
+    """
+    g.page_etag = etag
+    g.page_last_modified = last_modified
+
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    # El cliente puede tener la versión comprimida (ETag con sufijo -br/-gz)
+    for candidate in etag_variants(etag):
+        if request.if_none_match.contains(candidate):
+            etag = candidate
+            break
+
+    response = Response(status=200)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.make_conditional(request.environ)
+    if response.status_code != 304:
+        return None
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def apply_http_cache(response: Response) -> Response:
+    """
+    Hook `after_request`: Cache-Control por ruta (solo para 200 y 304), ETag
+    fuerte y 304 condicional.
+    """
+    if request.endpoint == 'static' or request.method not in ('GET', 'HEAD'):
+        return response
+
+    if 'Cache-Control' not in response.headers:
+        # Solo la página en sí (o su 304) es pública: 404, redirecciones y errores no se guardan
+        if response.status_code not in (200, 304) or session.modified:
+            response.headers['Cache-Control'] = NO_STORE
+        else:
+            response.headers['Cache-Control'] = cache_control_for(request.endpoint)
+
+    # Las páginas públicas cambian con la sesión del portal (cookie)
+    if _is_public_endpoint(request.endpoint) and response.headers['Cache-Control'] != NO_STORE:
+        response.vary.add('Cookie')
+
+    # La cookie de sesión se escribe después de este hook: session.modified la anticipa
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype not in _CONDITIONAL_MIMETYPES
+            or response.headers['Cache-Control'] == NO_STORE):
+        return response
+
+    if not response.get_etag()[0]:
+        etag = g.get('page_etag')
+        if etag:
+            response.set_etag(etag)
+        else:
+            response.add_etag()
+    last_modified = g.get('page_last_modified')
+    if last_modified is not None and response.last_modified is None:
+        response.last_modified = last_modified
+
+    return response.make_conditional(request.environ)
+
+
+def register_http_cache(app) -> None:
+    app.after_request(apply_http_cache)
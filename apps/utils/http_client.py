@@ -0,0 +1,198 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Transporte HTTP compartido (pool de conexiones keep-alive) para las APIs externas.
+
+Todas las llamadas a la API del Blog, al Portal de Clientes y a reCAPTCHA pasan
+por aquí, de modo que cada proceso reutiliza las conexiones TCP/TLS abiertas con
+cada host en lugar de pagar un handshake nuevo en cada petición.
+"""
+
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Cantidad de pools (hosts) que se mantienen abiertos por adaptador
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '10'))
+
+# Conexiones keep-alive máximas por host
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+
+# Si es True, cuando el pool de un host está lleno se espera a que se libere una
+# conexión en lugar de abrir una conexión extra descartable
+HTTP_POOL_BLOCK = os.environ.get('HTTP_POOL_BLOCK', 'False') == 'True'
+
+
+_lock = threading.Lock()
+_local = threading.local()
+
+# Un adaptador (y por lo tanto un PoolManager de urllib3) por host.
+# Los adaptadores son thread-safe; las sesiones no, así que cada hilo
+# tiene su propia sesión que monta los adaptadores compartidos.
+_adapters: Dict[str, HTTPAdapter] = {}
+_counters: Dict[str, Dict[str, int]] = {}
+
+
+class _RejectCookiePolicy(DefaultCookiePolicy):
+    """
+    Política que descarta todas las cookies recibidas de las APIs.
+    """
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+def _host_prefix(url: str) -> str:
+    """
+    Devuelve el prefijo 'scheme://host[:port]/' de una URL.
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _get_adapter(prefix: str) -> HTTPAdapter:
+    """
+    Obtiene (o crea) el adaptador con pool de conexiones para un host.
+    """
+    adapter = _adapters.get(prefix)
+    if adapter is None:
+        with _lock:
+            adapter = _adapters.get(prefix)
+            if adapter is None:
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    pool_block=HTTP_POOL_BLOCK
+                )
+                _adapters[prefix] = adapter
+                _counters[prefix] = {'requests': 0, 'errors': 0}
+    return adapter
+
+
+def _get_session(prefix: str) -> requests.Session:
+    """
+    Obtiene la sesión del hilo actual con el adaptador del host montado.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        # No persistir cookies entre peticiones de distintos usuarios
+        session.cookies.set_policy(_RejectCookiePolicy())
+        _local.session = session
+        _local.mounted = set()
+
+    if prefix not in _local.mounted:
+        session.mount(prefix, _get_adapter(prefix))
+        _local.mounted.add(prefix)
+
+    return session
+
+
+def http_request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Realiza una petición HTTP usando el pool de conexiones del host.
+
+    Args:
+        method: Método HTTP ('GET', 'POST', 'PUT', 'DELETE', ...)
+        url: URL absoluta
+        **kwargs: Argumentos aceptados por requests (headers, params, json, data, timeout...)
+
+    Returns:
+        requests.Response: Respuesta HTTP
+
+    Raises:
+        requests.RequestException: Si hay un error en la petición HTTP
+    """
+    prefix = _host_prefix(url)
+    session = _get_session(prefix)
+    counters = _counters[prefix]
+
+    try:
+        response = session.request(method, url, **kwargs)
+    except requests.RequestException:
+        with _lock:
+            counters['requests'] += 1
+            counters['errors'] += 1
+        raise
+
+    with _lock:
+        counters['requests'] += 1
+
+    return response
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """
+    Atajo de http_request('GET', ...).
+    """
+    return http_request('GET', url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """
+    Atajo de http_request('POST', ...).
+    """
+    return http_request('POST', url, **kwargs)
+
+
+def http_put(url: str, **kwargs) -> requests.Response:
+    """
+    Atajo de http_request('PUT', ...).
+    """
+    return http_request('PUT', url, **kwargs)
+
+
+def http_delete(url: str, **kwargs) -> requests.Response:
+    """
+    Atajo de http_request('DELETE', ...).
+    """
+    return http_request('DELETE', url, **kwargs)
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    """
+    Estadísticas de los pools de conexiones del proceso actual.
+
+    Returns:
+        dict: Por host, peticiones realizadas, errores, conexiones abiertas
+              desde el inicio y conexiones keep-alive ociosas en el pool.
+    """
+    stats = {}
+    with _lock:
+        items = list(_adapters.items())
+        counters = {prefix: dict(values) for prefix, values in _counters.items()}
+
+    for prefix, adapter in items:
+        host_stats = {
+            'requests': counters[prefix]['requests'],
+            'errors': counters[prefix]['errors'],
+            'connections_opened': 0,
+            'idle_connections': 0,
+            'pool_maxsize': HTTP_POOL_MAXSIZE
+        }
+        for pool_key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(pool_key)
+            if pool is None:
+                continue
+            host_stats['connections_opened'] += pool.num_connections
+            if pool.pool is not None:
+                # La cola del pool se rellena con None; solo cuentan las conexiones reales
+                host_stats['idle_connections'] += sum(1 for conn in list(pool.pool.queue) if conn)
+        stats[prefix.rstrip('/')] = host_stats
+
+    return stats
+
+
+def close_pools() -> None:
+    """
+    Cierra todas las conexiones abiertas (útil en tests o al hacer fork).
+    """
+    with _lock:
+        for adapter in _adapters.values():
+            adapter.close()
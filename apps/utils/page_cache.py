@@ -0,0 +1,263 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Caché de páginas renderizadas para las rutas estáticas de marketing.
+
+Las páginas de `route_template`, `solution_page`, `terminos` y `privacidad`
+solo dependen de la plantilla, del `segment` (derivado de la ruta) y de si
+el visitante tiene sesión en el portal. Se guardan ya minificadas (y
+comprimidas con gzip y Brotli) para no volver a renderizarlas, minificarlas
+ni comprimirlas.
+
+La clave incluye un hash del contenido de las plantillas, así que un
+despliegue con plantillas nuevas nunca sirve páginas antiguas.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from flask import Response, current_app, render_template, request, session
+
+from apps.utils.assets import ASSETS_DIST_DIR, MANIFEST_NAME
+from apps.utils.compression import (COMPRESS_MIN_SIZE, available_encodings, compress as compress_body,
+                                   etag_for_encoding, negotiate_encoding)
+
+
+# Memoria máxima de la caché de páginas (0 para desactivarla)
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+# Guardar también las versiones comprimidas (gzip y Brotli) de cada página
+PAGE_CACHE_GZIP = (os.environ.get('PAGE_CACHE_GZIP', 'True') == 'True')
+
+# Endpoints cuyas respuestas se cachean (Flask-Minify no los procesa: la caché
+# guarda la versión ya minificada)
+PAGE_CACHE_ENDPOINTS = [
+    'pages_blueprint.route_template',
+    'pages_blueprint.solution_page',
+    'pages_blueprint.terminos',
+    'pages_blueprint.privacidad',
+]
+
+# Página de error que se sirve ya renderizada en todas las respuestas 404
+NOT_FOUND_TEMPLATE = 'pages/page-404.html'
+
+def make_entry(body: bytes, compress: bool = True) -> Dict:
+    """
+    Entrada de caché de una página: cuerpo, versiones comprimidas, ETag y tamaño.
+    """
+    entry = {'body': body, 'encoded': {}, 'etag': hashlib.sha1(body).hexdigest()}
+    if compress and len(body) >= COMPRESS_MIN_SIZE:
+        # Se comprime una sola vez por página: nivel máximo
+        entry['encoded'] = {encoding: compress_body(body, encoding, static=True)
+                            for encoding in available_encodings()}
+    entry['size'] = len(body) + sum(len(data) for data in entry['encoded'].values())
+    return entry
+
+
+class PageCache(object):
+    """
+    Caché LRU thread-safe de páginas HTML acotada por bytes.
+
+    Cada entrada guarda el cuerpo ya minificado y, opcionalmente, sus versiones
+    gzip y Brotli. Las entradas no caducan: se invalidan por el hash de plantillas.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry
+
+    def set(self, key: str, body: bytes, compress: bool = True) -> Dict:
+        """
+        Guarda una página. Devuelve la entrada (aunque no quepa en la caché).
+        """
+        entry = make_entry(body, compress)
+
+        if entry['size'] > self.max_bytes:
+            return entry
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry['size']
+
+            while self._entries and self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+    def _remove(self, key: str) -> None:
+        # Debe llamarse con el lock tomado
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+
+
+_cache = PageCache(PAGE_CACHE_MAX_BYTES)
+
+# Función que minifica el HTML (la registra run.py cuando Flask-Minify está activo)
+_minifier: Optional[Callable[[str], str]] = None
+
+_templates_hash: Optional[str] = None
+_templates_hash_lock = threading.Lock()
+
+# Entrada de la página 404 para el hash de plantillas actual: (hash, entrada)
+_not_found: Optional[tuple] = None
+
+
+def set_page_minifier(minifier: Optional[Callable[[str], str]]) -> None:
+    """
+    Registra la función de minificado de HTML usada antes de guardar una página.
+    """
+    global _minifier
+    _minifier = minifier
+
+
+def get_templates_hash() -> str:
+    """
+    Hash del contenido de todas las plantillas y del manifiesto de paquetes
+    CSS/JS, que cambia las URLs enlazadas (se calcula una vez por proceso).
+    """
+    global _templates_hash
+
+    if _templates_hash is None:
+        with _templates_hash_lock:
+            if _templates_hash is None:
+                digest = hashlib.sha1()
+                templates_dir = os.path.join(current_app.root_path, current_app.template_folder)
+                for root, dirs, files in os.walk(templates_dir):
+                    dirs.sort()
+                    for name in sorted(files):
+                        path = os.path.join(root, name)
+                        digest.update(os.path.relpath(path, templates_dir).encode('utf-8'))
+                        with open(path, 'rb') as f:
+                            digest.update(f.read())
+                try:
+                    with open(os.path.join(current_app.static_folder, ASSETS_DIST_DIR, MANIFEST_NAME), 'rb') as f:
+                        digest.update(f.read())
+                except OSError:
+                    pass
+                _templates_hash = digest.hexdigest()[:12]
+    return _templates_hash
+
+
+def get_page_cache_stats() -> Dict:
+    """
+    Estadísticas de la caché de páginas.
+    """
+    stats = _cache.stats()
+    stats['templates_hash'] = _templates_hash
+    return stats
+
+
+def _page_key() -> str:
+    # El segment se deriva de la ruta; la sesión del portal decide la variante
+    variant = 'auth' if session.get('client_portal_token') else 'anon'
+    return '{}:{}:{}'.format(get_templates_hash(), variant, request.path)
+
+
+def _page_response(entry: Dict, state: str, status: int = 200) -> Response:
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''), entry['encoded'])
+    if encoding is not None:
+        response = Response(entry['encoded'][encoding], status=status, mimetype='text/html')
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = Response(entry['body'], status=status, mimetype='text/html')
+    if status == 200:
+        response.set_etag(etag_for_encoding(entry['etag'], encoding))
+    if entry['encoded']:
+        response.vary.add('Accept-Encoding')
+    response.headers['X-Page-Cache'] = state
+    return response
+
+
+def cached_page(view):
+    """
+    Decorador para las vistas de páginas estáticas: sirve la página desde la
+    caché o la renderiza, minifica y guarda. Solo se cachean respuestas 200 HTML;
+    el resto de respuestas HTML se minifican igual (Flask-Minify no las procesa)
+    salvo las que ya salen de esta caché (not_found_page).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        enabled = PAGE_CACHE_MAX_BYTES > 0 and not current_app.debug
+
+        if enabled:
+            key = _page_key()
+            entry = _cache.get(key)
+            if entry is not None:
+                return _page_response(entry, 'HIT')
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if (response.mimetype != 'text/html' or response.direct_passthrough
+                or 'X-Page-Cache' in response.headers):
+            return response
+
+        body = response.get_data(as_text=True)
+        if _minifier is not None:
+            body = _minifier(body)
+
+        if not enabled or response.status_code != 200:
+            response.set_data(body)
+            return response
+
+        entry = _cache.set(key, body.encode('utf-8'), compress=PAGE_CACHE_GZIP)
+        return _page_response(entry, 'MISS')
+
+    return wrapper
+
+
+def not_found_page() -> Response:
+    """
+    Respuesta 404 con `page-404.html`, renderizada, minificada y comprimida
+    una sola vez por hash de plantillas (no depende de la ruta ni de la sesión).
+    """
+    global _not_found
+
+    if current_app.debug or PAGE_CACHE_MAX_BYTES <= 0:
+        return current_app.make_response((render_template(NOT_FOUND_TEMPLATE), 404))
+
+    templates_hash = get_templates_hash()
+    cached = _not_found
+    if cached is None or cached[0] != templates_hash:
+        body = render_template(NOT_FOUND_TEMPLATE)
+        if _minifier is not None:
+            body = _minifier(body)
+        # Fuera de la LRU: los bots no deben desalojar páginas reales
+        entry = make_entry(body.encode('utf-8'), compress=PAGE_CACHE_GZIP)
+        cached = _not_found = (templates_hash, entry)
+    entry = cached[1]
+    if request.endpoint not in PAGE_CACHE_ENDPOINTS:
+        # Flask-Minify procesa la respuesta de las demás rutas: va sin comprimir
+        entry = dict(entry, encoded={})
+    return _page_response(entry, '404', status=404)
@@ -0,0 +1,99 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Registro de las páginas sueltas de apps/templates/pages que sirve
+`route_template` (/<nombre> y /<nombre>.html).
+
+Se construye una vez al arrancar listando el directorio, así que resolver
+una ruta es una búsqueda en un diccionario: las peticiones a rutas que no
+existen (bots que prueban /wp-login.php, /.env...) no llegan al cargador de
+Jinja ni lanzan TemplateNotFound.
+"""
+
+import os
+import threading
+from typing import Dict, FrozenSet, Optional
+
+from flask import current_app
+
+
+PAGES_DIR = 'pages'
+
+# Plantillas de pages/ que no son páginas de contenido: tienen vista propia o
+# necesitan sus datos (blog, blog-detail, login), son del panel de
+# administración (portal_clientes, blog_list, blog_form) o de error
+# (page-404, error). No se sirven desde la ruta genérica ni se exportan.
+EXCLUDED_PAGES = frozenset([
+    'blog', 'blog-detail', 'login', 'portal_clientes', 'blog_list', 'blog_form', 'page-404', 'error',
+])
+
+# Prefijos que se sirven con un archivo de static (/apple-touch-icon-120x120-precomposed.png...)
+STATIC_ALIASES = {
+    'apple-touch-icon': 'favicon_io/apple-touch-icon.png',
+}
+
+_pages: Optional[Dict[str, str]] = None
+_pages_lock = threading.Lock()
+
+
+def scan_pages(templates_dir: str) -> Dict[str, str]:
+    """
+    Rutas válidas de las plantillas de `templates_dir/pages`.
+
+    Returns:
+        dict: {nombre o nombre.html: 'pages/nombre.html'}
+    """
+    pages = {}
+    pages_dir = os.path.join(templates_dir, PAGES_DIR)
+    for name in sorted(os.listdir(pages_dir)):
+        slug, extension = os.path.splitext(name)
+        if extension != '.html' or slug in EXCLUDED_PAGES or not os.path.isfile(os.path.join(pages_dir, name)):
+            continue
+        template = PAGES_DIR + '/' + name
+        pages[slug] = template
+        pages[name] = template
+    return pages
+
+
+def build_page_registry(app) -> Dict[str, str]:
+    """
+    Construye (o reconstruye) el registro a partir de las plantillas de la app.
+    """
+    global _pages
+
+    pages = scan_pages(os.path.join(app.root_path, app.template_folder))
+    with _pages_lock:
+        _pages = pages
+    return pages
+
+
+def page_slugs() -> FrozenSet[str]:
+    """
+    Nombres de las páginas registradas (sin .html).
+    """
+    if _pages is None:
+        build_page_registry(current_app)
+    return frozenset(slug for slug in _pages if not slug.endswith('.html'))
+
+
+def resolve_page(slug: str) -> Optional[str]:
+    """
+    Plantilla que corresponde a `slug`, o None si no es una página.
+
+    En modo debug se vuelve a listar el directorio antes de dar una ruta por
+    inexistente, para ver las plantillas nuevas sin reiniciar.
+    """
+    template = _pages.get(slug) if _pages is not None else None
+    if template is None and (_pages is None or current_app.debug):
+        template = build_page_registry(current_app).get(slug)
+    return template
+
+
+def resolve_static_alias(slug: str) -> Optional[str]:
+    """
+    Archivo de static que corresponde a `slug` (favicons pedidos en la raíz), o None.
+    """
+    for prefix, filename in STATIC_ALIASES.items():
+        if slug.startswith(prefix):
+            return filename
+    return None
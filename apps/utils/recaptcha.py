@@ -8,6 +8,7 @@ import requests
 import os
 from flask import current_app
 from typing import Tuple, Optional
+from apps.utils.http_client import http_post
 
 
 # URL de verificación de reCAPTCHA v3
@@ -46,7 +47,7 @@ def verify_recaptcha(token: str, remote_ip: Optional[str] = None) -> Tuple[bool,
         if remote_ip:
             data['remoteip'] = remote_ip
         
-        response = requests.post(RECAPTCHA_VERIFY_URL, data=data, timeout=5)
+        response = http_post(RECAPTCHA_VERIFY_URL, data=data, timeout=5)
         response.raise_for_status()
         
         result = response.json()
@@ -0,0 +1,100 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Coalescencia de peticiones idénticas concurrentes (single-flight).
+
+Si varios hilos piden lo mismo a la vez, solo el primero llama a la API
+externa; el resto espera y recibe una copia del mismo resultado (o la misma
+excepción).
+"""
+
+import copy
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+
+class _Call(object):
+    """
+    Llamada en curso compartida por el líder y sus esperas.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(object):
+    """
+    Agrupa llamadas concurrentes con la misma clave en una sola ejecución.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecuta `fn` una sola vez por cada grupo de llamadas concurrentes con la misma clave.
+
+        Args:
+            key: Clave que identifica la petición (ver request_key)
+            fn: Función sin argumentos que realiza la petición
+
+        Returns:
+            Resultado de `fn`. Los hilos que esperaron reciben una copia.
+
+        Raises:
+            La excepción lanzada por `fn`, tanto al líder como a los que esperaban.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                is_leader = True
+                self._stats['executed'] += 1
+            else:
+                is_leader = False
+                self._stats['coalesced'] += 1
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn()
+            # Copia propia para los que esperan: quien llamó al líder puede modificar
+            # `result` mientras ellos la copian
+            call.result = copy.deepcopy(result)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+def request_key(method: str, url: str, params: Optional[Dict] = None, token: Optional[str] = None) -> str:
+    """
+    Clave de coalescencia: método, URL, parámetros ordenados e identidad.
+
+    El token nunca forma parte de la clave en claro; se usa su hash, de modo que
+    peticiones con distintos tokens (o anónimas) nunca comparten respuesta.
+    """
+    query = urlencode(sorted((k, v) for k, v in (params or {}).items() if v is not None))
+    identity = hashlib.sha256(token.encode('utf-8')).hexdigest() if token else 'anonymous'
+    return f"{method} {url}?{query} {identity}"
@@ -0,0 +1,103 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Almacén persistente (SQLite) de la última respuesta buena de la API del Blog.
+
+Sobrevive a reinicios y despliegues: al arrancar se usa para precalentar la
+caché en memoria y, si la API está caída, para seguir sirviendo contenido.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from apps.utils.sqlite_local import LocalSQLite
+
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore(object):
+    """
+    Tabla clave -> JSON en un archivo SQLite local (modo WAL).
+
+    Las escrituras se omiten si el contenido no cambió, así que guardar en
+    cada respuesta de la API no genera escrituras innecesarias en disco.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = LocalSQLite(path, [
+            'CREATE TABLE IF NOT EXISTS snapshots ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' checksum TEXT NOT NULL,'
+            ' stored_at REAL NOT NULL)'
+        ])
+
+    def _connect(self) -> sqlite3.Connection:
+        return self._db.connect()
+
+    def save(self, key: str, value: Any) -> None:
+        """
+        Guarda (o actualiza si cambió) la última copia buena de una respuesta.
+        """
+        try:
+            payload = json.dumps(value, ensure_ascii=False, sort_keys=True)
+            checksum = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+            conn = self._connect()
+            conn.execute(
+                'INSERT INTO snapshots (key, value, checksum, stored_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, checksum = excluded.checksum, '
+                'stored_at = excluded.stored_at WHERE snapshots.checksum != excluded.checksum',
+                (key, payload, checksum, time.time())
+            )
+            conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"No se pudo guardar el snapshot de {key}: {str(e)}")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Devuelve la última copia guardada de una respuesta, o None.
+        """
+        try:
+            row = self._connect().execute('SELECT value FROM snapshots WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo leer el snapshot de {key}: {str(e)}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def items(self, limit: int) -> Iterator[Tuple[str, Any, float]]:
+        """
+        Recorre las entradas más recientes: (key, value, stored_at).
+        """
+        try:
+            rows = self._connect().execute(
+                'SELECT key, value, stored_at FROM snapshots ORDER BY stored_at DESC LIMIT ?', (limit,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudieron leer los snapshots: {str(e)}")
+            return
+        for key, value, stored_at in rows:
+            yield key, json.loads(value), stored_at
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Elimina las entradas cuya clave empieza por `prefix`.
+        """
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM snapshots WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudieron eliminar los snapshots {prefix}*: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            count, = self._connect().execute('SELECT COUNT(*) FROM snapshots').fetchone()
+        except sqlite3.Error:
+            count = None
+        return {'path': self.path, 'entries': count}
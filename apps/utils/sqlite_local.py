@@ -0,0 +1,42 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Conexiones a archivos SQLite locales compartidos entre hilos y workers.
+"""
+
+import sqlite3
+import threading
+from typing import Iterable
+
+
+class LocalSQLite(object):
+    """
+    Archivo SQLite en modo WAL con una conexión por hilo.
+
+    WAL permite que varios workers de gunicorn lean mientras otro escribe;
+    el esquema se crea una sola vez por proceso con las sentencias recibidas.
+    """
+
+    def __init__(self, path: str, schema: Iterable[str]):
+        self.path = path
+        self._schema = list(schema)
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    for statement in self._schema:
+                        conn.execute(statement)
+                    conn.commit()
+                    self._initialized = True
+        return conn
@@ -0,0 +1,338 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Versiones optimizadas de las imágenes de apps/static/img.
+
+`flask assets images` genera, para cada PNG/JPEG, una copia WebP (y AVIF si
+se pide y Pillow lo soporta) al tamaño original y a los anchos de
+IMAGE_BUILD_WIDTHS, en `static/img-opt/` con la misma estructura de
+carpetas, y escribe `img-opt/manifest.json`. Con el manifiesto:
+
+- `picture()` (función global de las plantillas) emite `<picture>` con
+  `<source srcset>` por formato y el `<img>` original como respaldo.
+- La vista `static` sirve la versión WebP/AVIF cuando el navegador la
+  acepta y la plantilla (o el CSS) sigue pidiendo el PNG original.
+
+Solo se usan las versiones que pesan menos que el original.
+"""
+
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app, request
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow es opcional
+    Image = None
+
+
+logger = logging.getLogger(__name__)
+
+# Carpeta de origen y de salida, relativas a la carpeta static
+IMAGE_SOURCE_DIR = 'img'
+IMAGE_BUILD_DIR = os.environ.get('IMAGE_BUILD_DIR', 'img-opt')
+
+MANIFEST_NAME = 'manifest.json'
+
+# Anchos adicionales (solo los menores que el original)
+IMAGE_BUILD_WIDTHS = tuple(
+    int(width) for width in os.environ.get('IMAGE_BUILD_WIDTHS', '480,960,1440').split(',') if width.strip()
+)
+
+# Las imágenes más pequeñas no compensan una petición con negociación
+IMAGE_BUILD_MIN_BYTES = int(os.environ.get('IMAGE_BUILD_MIN_BYTES', '2048'))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Formatos en orden de preferencia: (formato, mimetype, opciones de Pillow)
+IMAGE_FORMATS = (
+    ('avif', 'image/avif', {'quality': 60, 'speed': 6}),
+    ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+)
+
+# Segundos entre comprobaciones de si el manifiesto cambió en disco
+_MANIFEST_RECHECK = 30
+
+_manifest: Optional[Dict] = None
+_manifest_mtime: Optional[float] = None
+_manifest_checked_at = 0.0
+_manifest_lock = threading.Lock()
+
+
+def avif_supported() -> bool:
+    if Image is None:
+        return False
+    try:
+        import pillow_avif  # noqa: F401 - registra el plugin en Pillow < 11.3
+    except ImportError:
+        pass
+    Image.init()
+    return 'AVIF' in Image.SAVE
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _encode(image, fmt: str, options: Dict) -> bytes:
+    out = io.BytesIO()
+    image.save(out, fmt.upper(), **options)
+    return out.getvalue()
+
+
+def _variant_name(rel: str, width: Optional[int], fmt: str) -> str:
+    # img/hero/a.png -> img-opt/hero/a.webp | img-opt/hero/a-480w.webp
+    stem = os.path.splitext(os.path.relpath(rel, IMAGE_SOURCE_DIR))[0]
+    suffix = '-{}w'.format(width) if width else ''
+    return '/'.join([IMAGE_BUILD_DIR, stem.replace(os.sep, '/') + suffix + '.' + fmt])
+
+
+def _build_image(static_dir: str, rel: str, formats: Iterable[Tuple[str, str, Dict]],
+                 widths: Iterable[int], previous: Optional[Dict]) -> Optional[Dict]:
+    """
+    Genera las versiones de una imagen. Reutiliza la entrada anterior del
+    manifiesto si el original no cambió y sus archivos siguen existiendo.
+    """
+    src_path = os.path.join(static_dir, rel)
+    stat = os.stat(src_path)
+    formats = list(formats)
+    if stat.st_size < IMAGE_BUILD_MIN_BYTES:
+        return None
+
+    if (previous and previous.get('mtime') == int(stat.st_mtime) and previous.get('bytes') == stat.st_size
+            and set(previous.get('encoded', [])) >= {fmt for fmt, _, _ in formats}
+            and all(os.path.exists(os.path.join(static_dir, path))
+                    for data in previous['formats'].values() for _, path in data['srcset'])):
+        return previous
+
+    with Image.open(src_path) as image:
+        image.load()
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    entry = {
+        'width': image.width,
+        'height': image.height,
+        'bytes': stat.st_size,
+        'mtime': int(stat.st_mtime),
+        'encoded': [fmt for fmt, _, _ in formats],
+        'formats': {},
+    }
+    for fmt, mimetype, options in formats:
+        full = _encode(image, fmt, options)
+        if len(full) >= stat.st_size:
+            # No compensa: se sigue sirviendo el original
+            continue
+        srcset = []
+        for width in sorted(w for w in widths if w < image.width):
+            height = max(1, round(image.height * width / float(image.width)))
+            name = _variant_name(rel, width, fmt)
+            _write_atomic(os.path.join(static_dir, name),
+                          _encode(image.resize((width, height), Image.LANCZOS), fmt, options))
+            srcset.append([width, name])
+        name = _variant_name(rel, None, fmt)
+        _write_atomic(os.path.join(static_dir, name), full)
+        srcset.append([image.width, name])
+        entry['formats'][fmt] = {'mimetype': mimetype, 'full': name, 'full_bytes': len(full), 'srcset': srcset}
+
+    return entry if entry['formats'] else None
+
+
+def build_images(static_dir: str, avif: bool = False, widths: Iterable[int] = IMAGE_BUILD_WIDTHS,
+                 workers: Optional[int] = None) -> Dict:
+    """
+    Genera las versiones optimizadas de todas las imágenes de `static/img`.
+
+    Args:
+        static_dir: Carpeta static de la aplicación
+        avif: Generar también AVIF (si Pillow lo soporta)
+        widths: Anchos adicionales para srcset
+        workers: Hilos de codificación (por defecto, uno por CPU)
+
+    Returns:
+        dict: Manifiesto generado
+
+    Raises:
+        RuntimeError: Si Pillow no está instalado
+    """
+    if Image is None:
+        raise RuntimeError('Pillow no está instalado (pip install Pillow)')
+
+    formats = [f for f in IMAGE_FORMATS if f[0] != 'avif' or (avif and avif_supported())]
+    if avif and not avif_supported():
+        logger.warning('Pillow no soporta AVIF: solo se genera WebP')
+
+    previous = (load_image_manifest(static_dir) or {}).get('images', {})
+    sources = []
+    for root, dirs, files in os.walk(os.path.join(static_dir, IMAGE_SOURCE_DIR)):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                sources.append(os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, '/'))
+
+    images = {}
+    errors = {}
+    widths = list(widths)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 2) as pool:
+        futures = {rel: pool.submit(_build_image, static_dir, rel, formats, widths, previous.get(rel))
+                   for rel in sources}
+        for rel, future in futures.items():
+            try:
+                entry = future.result()
+            except Exception as e:
+                errors[rel] = str(e)
+                continue
+            if entry is not None:
+                images[rel] = entry
+
+    _remove_stale(static_dir, images)
+
+    manifest = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'formats': [fmt for fmt, _, _ in formats],
+        'images': images,
+        'errors': errors,
+    }
+    payload = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    _write_atomic(os.path.join(static_dir, IMAGE_BUILD_DIR, MANIFEST_NAME), payload)
+    return manifest
+
+
+def _remove_stale(static_dir: str, images: Dict) -> None:
+    """
+    Elimina de img-opt/ los archivos que ya no corresponden a ninguna imagen.
+    """
+    keep = {path for entry in images.values() for data in entry['formats'].values() for _, path in data['srcset']}
+    keep.add('/'.join([IMAGE_BUILD_DIR, MANIFEST_NAME]))
+    build_dir = os.path.join(static_dir, IMAGE_BUILD_DIR)
+    for root, _, files in os.walk(build_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, static_dir).replace(os.sep, '/') not in keep:
+                os.remove(path)
+        if root != build_dir and not os.listdir(root):
+            os.rmdir(root)
+
+
+def load_image_manifest(static_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(static_dir, IMAGE_BUILD_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_image_manifest() -> Dict:
+    """
+    Imágenes del manifiesto de la aplicación actual (se vuelve a leer si cambia en disco).
+    """
+    global _manifest, _manifest_mtime, _manifest_checked_at
+
+    now = time.time()
+    if _manifest is not None and now - _manifest_checked_at < _MANIFEST_RECHECK:
+        return _manifest
+
+    with _manifest_lock:
+        _manifest_checked_at = now
+        path = os.path.join(current_app.static_folder, IMAGE_BUILD_DIR, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        if _manifest is None or mtime != _manifest_mtime:
+            manifest = load_image_manifest(current_app.static_folder) if mtime else None
+            _manifest = (manifest or {}).get('images', {})
+            _manifest_mtime = mtime
+    return _manifest
+
+
+def negotiate_image(filename: str, accept: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Mejor versión de una imagen estática según el encabezado Accept.
+
+    Returns:
+        tuple: (entrada del manifiesto o None, ruta de la versión a servir o None para el original)
+    """
+    entry = get_image_manifest().get(filename)
+    if entry is None:
+        return None, None
+    for fmt, mimetype, _ in IMAGE_FORMATS:
+        data = entry['formats'].get(fmt)
+        if data and mimetype in accept:
+            return entry, data['full']
+    return entry, None
+
+
+def register_static_negotiation(app) -> None:
+    """
+    Envuelve la vista `static` para servir WebP/AVIF en lugar de PNG/JPEG
+    cuando el navegador los acepta.
+    """
+    send_static = app.view_functions['static']
+
+    def static(filename):
+        entry, variant = negotiate_image(filename, request.headers.get('Accept', ''))
+        response = send_static(filename=variant or filename)
+        if entry is not None:
+            # La misma URL tiene varias representaciones
+            response.vary.add('Accept')
+        return response
+
+    app.view_functions['static'] = static
+
+
+def picture(src: str, alt: str = '', sizes: str = '100vw', lazy: bool = True, **attrs) -> Markup:
+    """
+    `<picture>` con las versiones del manifiesto (función global de las plantillas).
+    Sin versiones optimizadas devuelve el `<img>` original.
+
+    Args:
+        src: Ruta relativa a static (ej: 'img/hero/hero2-image1.png')
+        alt: Texto alternativo
+        sizes: Atributo sizes de los <source>
+        lazy: Añadir loading="lazy" (usar False en imágenes de la primera pantalla)
+        **attrs: Atributos adicionales del <img> (class_ para class)
+    """
+    assets_root = current_app.config.get('ASSETS_ROOT', '/static')
+    entry = get_image_manifest().get(src)
+
+    img_attrs: List[Tuple[str, object]] = [('src', '{}/{}'.format(assets_root, src)), ('alt', alt)]
+    if entry is not None:
+        img_attrs += [('width', entry['width']), ('height', entry['height'])]
+    if lazy:
+        img_attrs.append(('loading', 'lazy'))
+    img_attrs.append(('decoding', 'async'))
+    img_attrs += [(name.rstrip('_').replace('_', '-'), value) for name, value in attrs.items()]
+    img = '<img{}>'.format(''.join(' {}="{}"'.format(name, escape(value)) for name, value in img_attrs))
+
+    if entry is None:
+        return Markup(img)
+
+    sources = []
+    for fmt, mimetype, _ in IMAGE_FORMATS:
+        data = entry['formats'].get(fmt)
+        if not data:
+            continue
+        srcset = ', '.join('{}/{} {}w'.format(assets_root, path, width) for width, path in data['srcset'])
+        sources.append('<source type="{}" srcset="{}" sizes="{}">'.format(mimetype, escape(srcset), escape(sizes)))
+    return Markup('<picture>{}{}</picture>'.format(''.join(sources), img))
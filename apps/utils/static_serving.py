@@ -0,0 +1,67 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Entrega de los archivos de apps/static sin ocupar al worker de gunicorn.
+
+STATIC_SERVE_MODE:
+- `sendfile` (por defecto, gunicorn sin nginx delante): Flask envía el
+  archivo con `wsgi.file_wrapper`, que gunicorn transfiere con sendfile()
+  (copia cero) salvo en las peticiones Range.
+- `accel` (detrás del nginx de `nginx/`): Flask solo comprueba que el archivo
+  existe y decide la versión (WebP, .br/.gz) y las cabeceras; responde sin
+  cuerpo con `X-Accel-Redirect` y nginx envía los bytes desde la location
+  interna STATIC_ACCEL_PREFIX, con soporte de Range y 304.
+  nginx debe ver el mismo apps/static que la aplicación, incluidos los
+  archivos generados en el build (en docker-compose, el volumen `static`);
+  si no, responde 404 a lo que Flask acaba de autorizar.
+"""
+
+import mimetypes
+import os
+
+from flask import abort, current_app
+from werkzeug.security import safe_join
+from werkzeug.urls import url_quote
+
+
+STATIC_SERVE_MODE = os.environ.get('STATIC_SERVE_MODE', 'sendfile').lower()
+
+# Location interna de nginx que apunta a apps/static (ver nginx/appseed-app.conf)
+STATIC_ACCEL_PREFIX = os.environ.get('STATIC_ACCEL_PREFIX', '/_static/')
+
+
+def _accel_response(filename: str):
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response.headers['X-Accel-Redirect'] = STATIC_ACCEL_PREFIX + url_quote(filename)
+    # nginx conserva el Cache-Control de la respuesta; Last-Modified, ETag y Range los pone él
+    max_age = current_app.get_send_file_max_age(filename)
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def register_static_offload(app) -> None:
+    """
+    Sustituye la vista `static` original según STATIC_SERVE_MODE. Debe
+    registrarse antes que los demás envoltorios de la vista (WebP/AVIF,
+    compresión, caché inmutable), que siguen decidiendo qué archivo y qué
+    cabeceras se envían.
+    """
+    if STATIC_SERVE_MODE == 'accel':
+        app.view_functions['static'] = lambda filename: _accel_response(filename)
+    elif STATIC_SERVE_MODE != 'sendfile':
+        app.logger.warning('> STATIC_SERVE_MODE desconocido: {} (se usa sendfile)'.format(STATIC_SERVE_MODE))
+
+
+def serve_static(filename: str):
+    """
+    Respuesta de la vista `static` para `filename` (ej: favicons pedidos en la raíz).
+    """
+    return current_app.view_functions['static'](filename=filename)
@@ -0,0 +1,176 @@
+# -*- encoding: utf-8 -*-
+
+"""
+Caché de bytecode de las plantillas Jinja y precompilación al arrancar.
+
+Jinja compila cada plantilla a Python la primera vez que se usa en cada
+proceso: tras un despliegue o un `pm2 restart`, los primeros visitantes de
+cada worker esperan a que se compilen index*, blog-detail y los parciales.
+
+- El código compilado se guarda en JINJA_CACHE_DIR, compartido entre los
+  workers de gunicorn y entre reinicios. Jinja lo descarta solo si cambia
+  el contenido de la plantilla.
+- Con JINJA_PRECOMPILE=True cada worker carga todas las plantillas al
+  arrancar (desde la caché, o compilándolas la primera vez), antes de
+  recibir peticiones. `flask assets templates` hace lo mismo en el build.
+- Cada compilación queda en el log con su duración.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from flask.templating import Environment
+from jinja2 import FileSystemBytecodeCache
+
+
+# Directorio de la caché de bytecode ('' para desactivarla)
+JINJA_CACHE_DIR = os.environ.get(
+    'JINJA_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'jinja_cache')
+)
+
+# Cargar todas las plantillas al crear la aplicación
+JINJA_PRECOMPILE = (os.environ.get('JINJA_PRECOMPILE', 'False') == 'True')
+
+# Compilaciones más lentas que se muestran en las estadísticas
+_SLOWEST = 10
+
+_stats = {'compiled': 0, 'compile_seconds': 0.0, 'bytecode_hits': 0, 'bytecode_misses': 0}
+_compile_times: Dict[str, float] = {}
+_precompile: Optional[Dict] = None
+_stats_lock = threading.Lock()
+
+
+class SharedBytecodeCache(FileSystemBytecodeCache):
+    """
+    FileSystemBytecodeCache con escritura atómica (varios workers escriben a
+    la vez y ninguno debe leer un archivo a medias) y contadores de aciertos.
+    """
+
+    def load_bytecode(self, bucket) -> None:
+        try:
+            super().load_bytecode(bucket)
+        except Exception:
+            # Archivo dañado o de otra versión de Python: se vuelve a compilar
+            bucket.reset()
+        with _stats_lock:
+            _stats['bytecode_hits' if bucket.code is not None else 'bytecode_misses'] += 1
+
+    def dump_bytecode(self, bucket) -> None:
+        filename = self._get_cache_filename(bucket)
+        tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            with open(tmp_filename, 'wb') as f:
+                bucket.write_bytecode(f)
+            os.replace(tmp_filename, filename)
+        except OSError:
+            # Sin permisos de escritura: la plantilla funciona igual, solo no se comparte
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+
+
+class TimedEnvironment(Environment):
+    """
+    Entorno Jinja de Flask que anota y registra el tiempo de cada compilación.
+    """
+
+    def compile(self, source, name=None, filename=None, raw=False, defer_init=False):
+        start = time.perf_counter()
+        code = super().compile(source, name, filename, raw, defer_init)
+        if name and not raw:
+            _record_compile(self.app, name, time.perf_counter() - start)
+        return code
+
+
+def _record_compile(app, name: str, seconds: float) -> None:
+    with _stats_lock:
+        _stats['compiled'] += 1
+        _stats['compile_seconds'] += seconds
+        _compile_times[name] = seconds
+    app.logger.info('> Plantilla compilada: {} ({:.1f} ms)'.format(name, seconds * 1000))
+
+
+def configure_template_cache(app) -> None:
+    """
+    Usa la caché de bytecode y el entorno con tiempos de compilación. Debe
+    llamarse antes del primer acceso a `app.jinja_env` (que crea el entorno).
+    """
+    app.jinja_environment = TimedEnvironment
+    if not JINJA_CACHE_DIR:
+        return
+    try:
+        os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+    except OSError as e:
+        app.logger.warning('> Caché de plantillas desactivada ({}): {}'.format(JINJA_CACHE_DIR, str(e)))
+        return
+    app.jinja_options = dict(app.jinja_options, bytecode_cache=SharedBytecodeCache(JINJA_CACHE_DIR))
+
+
+def template_names(app) -> List[str]:
+    """
+    Plantillas a precompilar: primero las de pages/ (las rutas) y después
+    los layouts, parciales e includes que usan.
+    """
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    return sorted(names, key=lambda name: (not name.startswith('pages/'), name))
+
+
+def precompile_templates(app) -> Dict:
+    """
+    Carga todas las plantillas en `app.jinja_env`: quedan compiladas en
+    memoria y, si no lo estaban, en la caché de bytecode.
+
+    Returns:
+        dict: templates, compiled (no estaban en la caché), seconds y errors
+    """
+    global _precompile
+
+    with _stats_lock:
+        compiled_before = _stats['compiled']
+    errors = {}
+    start = time.perf_counter()
+    names = template_names(app)
+    for name in names:
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            errors[name] = str(e)
+            app.logger.warning('> Plantilla sin precompilar: {} ({})'.format(name, str(e)))
+
+    with _stats_lock:
+        result = {
+            'templates': len(names),
+            'compiled': _stats['compiled'] - compiled_before,
+            'seconds': round(time.perf_counter() - start, 3),
+            'errors': errors,
+        }
+        _precompile = result
+    app.logger.info('> Plantillas precompiladas: {} en {} s ({} compiladas, el resto desde la caché)'.format(
+        result['templates'], result['seconds'], result['compiled']))
+    return result
+
+
+def warm_templates(app) -> None:
+    """
+    Precompilación al arrancar el worker, si JINJA_PRECOMPILE está activo.
+    """
+    if JINJA_PRECOMPILE:
+        precompile_templates(app)
+
+
+def get_template_stats() -> Dict:
+    """
+    Compilaciones del proceso, aciertos de la caché de bytecode y las plantillas más lentas.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+        slowest = sorted(_compile_times.items(), key=lambda item: item[1], reverse=True)[:_SLOWEST]
+        stats['precompile'] = _precompile
+    stats['compile_seconds'] = round(stats['compile_seconds'], 3)
+    stats['slowest_ms'] = {name: round(seconds * 1000, 1) for name, seconds in slowest}
+    stats['bytecode_dir'] = JINJA_CACHE_DIR or None
+    return stats
@@ -0,0 +1,24 @@
+#!/bin/sh
+# Copia apps/static, con los archivos generados en el build (dist/, img-opt/,
+# .gz/.br, subconjunto de Font Awesome), al volumen que comparte con nginx.
+# No se borra nada: las páginas ya servidas pueden seguir pidiendo los
+# paquetes con hash de la versión anterior.
+set -e
+
+if [ -n "$STATIC_EXPORT_DIR" ]; then
+    mkdir -p "$STATIC_EXPORT_DIR"
+    cp -a apps/static/. "$STATIC_EXPORT_DIR"/
+fi
+
+# Réplica local del blog: `flask blog sync` al arrancar y cada BLOG_SYNC_INTERVAL
+# segundos, en segundo plano y en el mismo contenedor (misma base de datos)
+if [ -n "$BLOG_SYNC_INTERVAL" ] && [ "$BLOG_SYNC_INTERVAL" -gt 0 ]; then
+    (
+        while true; do
+            flask blog sync || echo "> Blog sync: error, se reintenta en ${BLOG_SYNC_INTERVAL} s" >&2
+            sleep "$BLOG_SYNC_INTERVAL"
+        done
+    ) &
+fi
+
+exec "$@"
@@ -8,7 +8,26 @@ module.exports = {
         FLASK_APP: 'run.py',
         FLASK_ENV: 'production',
         DEBUG: 'False',
-        ASSETS_ROOT: '/static'
+        ASSETS_ROOT: '/static',
+        // Sin nginx propio delante: gunicorn envía los archivos con sendfile()
+        STATIC_SERVE_MODE: 'sendfile',
+        // Plantillas cargadas (desde apps/jinja_cache) antes de la primera petición tras un restart
+        JINJA_PRECOMPILE: 'True',
+        // Exportación de `flask freeze` que sirve el nginx del servidor
+        FREEZE_DIR: '/opt/arsysintela/frozen'
+      }
+    }, {
+      // Réplica local del blog: `flask blog sync` cada 5 minutos (sin proceso permanente)
+      name: 'arsysintela-blog-sync',
+      script: 'venv/bin/flask',
+      args: 'blog sync',
+      cwd: '/opt/arsysintela',
+      cron_restart: '*/5 * * * *',
+      autorestart: false,
+      env: {
+        FLASK_APP: 'run.py',
+        FLASK_ENV: 'production',
+        DEBUG: 'False'
       }
     }]
   }; 
\ No newline at end of file
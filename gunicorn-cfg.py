@@ -8,6 +8,9 @@ loglevel = 'debug'
 capture_output = True
 enable_stdio_inheritance = True
 
+# Archivos estáticos con sendfile() (STATIC_SERVE_MODE=sendfile)
+sendfile = True
+
 # Configurar IPs confiables para encabezados X-Forwarded-*
 # Solo confiar en los encabezados cuando la petición viene del Nginx Proxy Manager
 forwarded_allow_ips = '10.200.1.250'
@@ -16,6 +16,7 @@ load_dotenv(env_path)
 
 from apps.config import config_dict
 from apps import create_app, db
+from apps.utils.page_cache import PAGE_CACHE_ENDPOINTS, set_page_minifier
 
 # WARNING: Don't run with debug turned on in production!
 DEBUG = (os.getenv('DEBUG', 'False') == 'True')
@@ -51,7 +52,9 @@ app.wsgi_app = ProxyFix(
 Migrate(app, db)
 
 if not DEBUG:
-    Minify(app=app, html=True, js=False, cssless=False)
+    # Las páginas estáticas se minifican una sola vez al guardarlas en la caché de páginas
+    minify = Minify(app=app, html=True, js=False, cssless=False, bypass=PAGE_CACHE_ENDPOINTS)
+    set_page_minifier(lambda html: minify.parser.minify(html, 'html'))
     
 if DEBUG:
     app.logger.info('DEBUG            = ' + str(DEBUG)             )
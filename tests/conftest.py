@@ -0,0 +1,37 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import tempfile
+
+# Los módulos leen la configuración al importarse: los archivos locales
+# (snapshot, índice de búsqueda, miniaturas, bytecode) van a un directorio temporal
+# y la API apunta a un puerto cerrado para que ningún test salga a la red.
+_TMP_DIR = tempfile.mkdtemp(prefix='arsys-tests-')
+
+os.environ.setdefault('BLOG_API_BASE_URL', 'http://127.0.0.1:9/api')
+os.environ['CACHE_BACKEND'] = 'memory'
+os.environ['BLOG_SNAPSHOT_PATH'] = ''
+os.environ['BLOG_SEARCH_PATH'] = os.path.join(_TMP_DIR, 'blog_search.sqlite3')
+os.environ['BLOG_IMAGE_CACHE_DIR'] = os.path.join(_TMP_DIR, 'blog_images')
+os.environ['JINJA_CACHE_DIR'] = ''
+
+import pytest  # noqa: E402
+
+from apps import create_app  # noqa: E402
+from apps.config import ProductionConfig  # noqa: E402
+
+
+class TestConfig(ProductionConfig):
+    TESTING = True
+    SECRET_KEY = 'tests'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(_TMP_DIR, 'db.sqlite3')
+
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
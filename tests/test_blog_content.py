@@ -0,0 +1,69 @@
+# -*- encoding: utf-8 -*-
+
+from apps.utils.blog_content import get_post_content, image_size_from_url, process_content
+
+
+def test_toc_ids_are_slugs_and_unique():
+    content = process_content(
+        '<h2>Introducción</h2><p>Texto</p>'
+        '<h3>Cómo &amp; por qué</h3>'
+        '<h2>Introducción</h2>'
+        '<h2 id="propio">Con id</h2>'
+        '<h4>Fuera del índice</h4>'
+    )
+
+    assert content['toc'] == [
+        {'id': 'introduccion', 'text': 'Introducción', 'level': 2},
+        {'id': 'como-por-que', 'text': 'Cómo & por qué', 'level': 3},
+        {'id': 'introduccion-2', 'text': 'Introducción', 'level': 2},
+        {'id': 'propio', 'text': 'Con id', 'level': 2},
+    ]
+    assert '<h2 id="introduccion">Introducción</h2>' in content['html']
+    assert '<h3 id="como-por-que">Cómo &amp; por qué</h3>' in content['html']
+    assert '<h2 id="introduccion-2">' in content['html']
+    assert '<h2 id="propio">' in content['html']
+    assert '<h4>Fuera del índice</h4>' in content['html']
+
+
+def test_heading_without_text_gets_id_but_no_toc_entry():
+    content = process_content('<h2><img src="a.png"></h2>')
+
+    assert content['toc'] == []
+    assert content['html'].startswith('<h2 id="seccion">')
+
+
+def test_images_get_lazy_loading_and_size_from_url():
+    content = process_content(
+        '<img src="https://placehold.co/800x400">'
+        '<img src="/foto.jpg?w=640&amp;h=480" />'
+        '<img src="/sin-tamano.jpg" loading="eager" width="10">'
+    )
+    html = content['html']
+
+    assert '<img src="https://placehold.co/800x400" loading="lazy" decoding="async" width="800" height="400">' in html
+    assert '<img src="/foto.jpg?w=640&amp;h=480" loading="lazy" decoding="async" width="640" height="480" />' in html
+    assert '<img src="/sin-tamano.jpg" loading="eager" width="10" decoding="async">' in html
+
+
+def test_image_size_from_url():
+    assert image_size_from_url('https://cdn.example.com/foto-1200x630.jpg') == (1200, 630)
+    assert image_size_from_url('https://cdn.example.com/foto.jpg?width=300&height=200') == (300, 200)
+    assert image_size_from_url('https://cdn.example.com/2024/foto.jpg') is None
+    assert image_size_from_url('') is None
+
+
+def test_word_count_skips_scripts_and_keeps_markup():
+    html = '<p>uno dos tres</p><script>var no = cuenta;</script><!-- nota --><p>cuatro</p>'
+    content = process_content(html)
+
+    assert content['word_count'] == 4
+    assert content['reading_time'] == 1
+    assert content['html'] == html
+
+
+def test_post_content_is_cached_per_version():
+    post = {'id': 7, 'updatedAt': '2024-01-01', 'contentHtml': '<h2>Uno</h2>'}
+    first = get_post_content(post)
+
+    assert get_post_content(dict(post, contentHtml='<h2>Otro</h2>')) == first
+    assert get_post_content(dict(post, updatedAt='2024-02-01', contentHtml='<h2>Otro</h2>'))['toc'][0]['id'] == 'otro'
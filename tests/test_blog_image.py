@@ -0,0 +1,78 @@
+# -*- encoding: utf-8 -*-
+
+import pytest
+import requests
+
+from apps.pages import routes
+from apps.utils import blog_api, blog_images, blog_mirror
+from apps.utils.blog_images import ImageUnavailable, source_version
+from apps.utils.blog_index import PostIndex, TagIndex
+
+IMAGE_URL = 'https://images.example.com/cabecera.png'
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Índices vacíos y una API que registra las llamadas y falla.
+    """
+    calls = []
+    monkeypatch.setattr(blog_api, '_post_index', PostIndex())
+    monkeypatch.setattr(blog_api, '_tag_index', TagIndex())
+    monkeypatch.setattr(blog_images, '_sources', {})
+
+    def get_post_by_slug(slug, use_cache=True):
+        calls.append(slug)
+        raise requests.ConnectionError('API caída')
+
+    monkeypatch.setattr(blog_mirror, 'get_post_by_slug', get_post_by_slug)
+    monkeypatch.setattr(blog_api, 'get_posts', lambda *args, **kwargs: pytest.fail('listado de la API'))
+    return calls
+
+
+def _width():
+    return sorted(blog_images.BLOG_IMAGE_WIDTHS)[0]
+
+
+def test_unknown_post_is_404_without_upstream_calls(client, upstream):
+    response = client.get('/img/blog/4242/{}?v=abc'.format(_width()))
+
+    assert response.status_code == 404
+    assert upstream == []
+
+
+def test_upstream_failure_is_404(client, upstream):
+    blog_api._post_index.record_post({'id': 7, 'slug': 'post-7'})
+
+    response = client.get('/img/blog/7/{}'.format(_width()))
+
+    assert response.status_code == 404
+    assert upstream == ['post-7']
+
+
+def test_known_post_is_served_from_the_index(client, upstream, monkeypatch):
+    blog_api._tag_index.record_post({'id': 7, 'slug': 'post-7', 'headerImageUrl': IMAGE_URL})
+
+    def get_variant(url, width, fmt):
+        raise ImageUnavailable('sin red en los tests')
+
+    monkeypatch.setattr(routes, 'get_variant', get_variant)
+    monkeypatch.setattr(routes, 'images_enabled', lambda: True)
+
+    response = client.get('/img/blog/7/{}?v={}'.format(_width(), source_version(IMAGE_URL)))
+
+    # No se pudo generar la miniatura: se redirige a la original
+    assert response.status_code == 302
+    assert response.headers['Location'] == IMAGE_URL
+    assert upstream == []
+
+
+def test_outdated_version_redirects_to_current_one(client, upstream, monkeypatch):
+    blog_api._tag_index.record_post({'id': 7, 'slug': 'post-7', 'headerImageUrl': IMAGE_URL})
+    monkeypatch.setattr(routes, 'images_enabled', lambda: True)
+
+    response = client.get('/img/blog/7/{}?v=antigua'.format(_width()))
+
+    assert response.status_code == 302
+    assert 'v={}'.format(source_version(IMAGE_URL)) in response.headers['Location']
+    assert upstream == []
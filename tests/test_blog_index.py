@@ -0,0 +1,242 @@
+# -*- encoding: utf-8 -*-
+
+import pytest
+
+from apps.utils import blog_api
+from apps.utils.blog_index import PostIndex, TagIndex
+
+
+def _post(post_id, slug=None):
+    return {'id': post_id, 'slug': slug or 'post-{}'.format(post_id)}
+
+
+def test_post_index_tracks_slug_changes():
+    index = PostIndex()
+    index.record_post(_post(1, 'viejo'))
+    index.record_post(_post(1, 'nuevo'))
+
+    assert index.get_slug(1) == 'nuevo'
+    assert index.get_id('nuevo') == 1
+    assert index.get_id('viejo') is None
+
+    index.forget(1)
+    assert index.get_slug(1) is None
+    assert index.get_id('nuevo') is None
+
+
+def test_post_index_missing_ids_expire_and_clear_on_record():
+    index = PostIndex()
+    index.mark_missing(7)
+    assert index.is_missing(7, 60)
+    assert not index.is_missing(7, 0)
+
+    index.record_post(_post(7))
+    assert not index.is_missing(7, 60)
+
+
+def test_post_index_missing_ids_are_bounded():
+    index = PostIndex()
+    for post_id in range(PostIndex.MAX_MISSING + 10):
+        index.mark_missing(post_id)
+
+    assert index.stats()['missing'] == PostIndex.MAX_MISSING
+    assert not index.is_missing(0, 60)
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    """
+    Sustituye el listado de la API por uno de 3 posts y cuenta las llamadas.
+    """
+    calls = []
+    monkeypatch.setattr(blog_api, '_post_index', PostIndex())
+
+    def get_posts(page=1, limit=10, tag=None, use_cache=True):
+        calls.append(page)
+        posts = [_post(post_id) for post_id in (1, 2, 3)] if page == 1 else []
+        blog_api._post_index.record_posts(posts)
+        return {'data': posts}, 200
+
+    monkeypatch.setattr(blog_api, 'get_posts', get_posts)
+    return calls
+
+
+def test_rebuild_finds_known_id(listing):
+    assert blog_api._rebuild_post_index(2) == 'post-2'
+    assert listing == [1]
+
+
+def test_unknown_ids_do_not_walk_the_listing_again(listing):
+    assert blog_api._rebuild_post_index(99) is None
+    assert listing == [1]
+
+    # Listado completo reciente: ni ese ID ni otro desconocido vuelven a llamar a la API
+    assert blog_api._rebuild_post_index(99) is None
+    assert blog_api._rebuild_post_index(100) is None
+    assert listing == [1]
+
+
+def test_failed_rebuild_remembers_missing_id(monkeypatch):
+    calls = []
+    monkeypatch.setattr(blog_api, '_post_index', PostIndex())
+
+    def get_posts(page=1, limit=10, tag=None, use_cache=True):
+        calls.append(page)
+        return {'message': 'caída'}, 503
+
+    monkeypatch.setattr(blog_api, 'get_posts', get_posts)
+
+    assert blog_api._rebuild_post_index(5) is None
+    assert blog_api._rebuild_post_index(5) is None
+    assert calls == [1]
+
+
+def _summary(post_id, tag, day, published=True):
+    return {'id': post_id, 'slug': 'post-{}'.format(post_id), 'tag': tag, 'isPublished': published,
+            'publishedAt': '2025-01-{:02d}T10:00:00.000Z'.format(day)}
+
+
+def test_tag_index_incomplete_until_listing_total_is_seen():
+    index = TagIndex()
+    index.record_listing([_summary(1, 'IA', 1), _summary(2, 'IA', 2)], total=3)
+
+    assert index.get_page('IA') is None
+    assert index.tag_counts() is None
+    assert index.get_summary(1)['tag'] == 'IA'
+
+    # Un listado filtrado por tag no cambia el total esperado
+    index.record_listing([_summary(3, 'Condominio', 3)])
+    page = index.get_page('IA', page=1, limit=10)
+    assert [post['id'] for post in page['data']] == [2, 1]
+    assert page['pagination']['total'] == 2
+    assert index.tag_counts() == [{'tag': 'IA', 'count': 2}, {'tag': 'Condominio', 'count': 1}]
+
+
+def test_tag_index_incremental_updates():
+    index = TagIndex()
+    index.rebuild([_summary(1, 'IA', 1), _summary(2, 'IA', 2)])
+
+    # Cambio de tag, despublicación y borrado
+    index.record_post(_summary(1, 'Condominio', 1))
+    assert [post['id'] for post in index.get_page('IA')['data']] == [2]
+    assert [post['id'] for post in index.get_page('Condominio')['data']] == [1]
+
+    index.record_post(_summary(2, 'IA', 2, published=False))
+    assert index.get_page('IA')['data'] == []
+    assert index.tag_counts() == [{'tag': 'Condominio', 'count': 1}]
+
+    index.forget(1)
+    assert index.tag_counts() == []
+
+
+def test_tag_index_pagination():
+    index = TagIndex()
+    index.rebuild([_summary(post_id, 'IA', post_id) for post_id in range(1, 6)])
+
+    page = index.get_page('IA', page=2, limit=2)
+    assert [post['id'] for post in page['data']] == [3, 2]
+    assert page['pagination'] == {'page': 2, 'limit': 2, 'total': 5, 'totalPages': 3}
+
+
+def test_tag_index_resets_when_listing_total_drops():
+    index = TagIndex(max_age=300)
+    index.record_listing([_summary(1, 'IA', 1), _summary(2, 'IA', 2), _summary(3, 'IA', 3)], total=3)
+    assert index.get_page('IA')['pagination']['total'] == 3
+
+    # El post 3 se borró en la API: el índice se vacía y se completa con los listados nuevos
+    index.record_listing([_summary(1, 'IA', 1)], total=2)
+    assert index.get_page('IA') is None
+    assert index.get_summary(3) is None
+
+    index.record_listing([_summary(2, 'IA', 2)], total=2)
+    assert [post['id'] for post in index.get_page('IA')['data']] == [2, 1]
+
+
+def test_tag_index_resets_when_a_new_post_replaces_a_deleted_one():
+    index = TagIndex(max_age=300)
+    index.record_listing([_summary(1, 'IA', 1), _summary(2, 'IA', 2)], total=2)
+
+    # Mismo total, pero el listado trae un post nuevo que no cabe: el 1 se borró
+    index.record_listing([_summary(4, 'IA', 4), _summary(2, 'IA', 2)], total=2)
+    assert [post['id'] for post in index.get_page('IA')['data']] == [4, 2]
+    assert index.get_summary(1) is None
+
+
+def test_tag_index_completed_from_listings_expires():
+    index = TagIndex(max_age=0)
+    index.record_listing([_summary(1, 'IA', 1)], total=1)
+
+    assert index.get_page('IA') is None
+    assert index.get_summary(1) is None
+    assert index.stats()['posts'] == 0
+
+
+def test_tag_index_admin_writes_keep_it_complete():
+    index = TagIndex(max_age=300)
+    index.record_listing([_summary(1, 'IA', 1)], total=1)
+
+    index.record_post(_summary(2, 'IA', 2))
+    assert index.get_page('IA')['pagination']['total'] == 2
+    index.forget(1)
+    assert [post['id'] for post in index.get_page('IA')['data']] == [2]
+
+    # El siguiente listado confirma el total sin vaciar el índice
+    index.record_listing([_summary(2, 'IA', 2)], total=1)
+    assert index.get_page('IA')['pagination']['total'] == 1
+
+
+class _Upstream(object):
+    """
+    API del blog en memoria: listado paginado y filtrado por tag.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.calls = []
+
+    def __call__(self, url, headers=None, params=None, timeout=None):
+        params = params or {}
+        self.calls.append(dict(params))
+        posts = [post for post in sorted(self.posts, key=lambda post: post['publishedAt'], reverse=True)
+                 if not params.get('tag') or post['tag'] == params['tag']]
+        page, limit = int(params.get('page', 1)), int(params.get('limit', 10))
+        return _Response({'data': posts[(page - 1) * limit:page * limit],
+                          'pagination': {'page': page, 'limit': limit, 'total': len(posts)}})
+
+
+class _Response(object):
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.headers = {}
+        self.content = b''
+
+    def json(self):
+        return self.payload
+
+
+def test_post_deleted_upstream_disappears_from_tag_page(client, monkeypatch):
+    from apps.utils.cache import ResponseCache, ValidatorStore
+
+    upstream = _Upstream([_summary(post_id, 'IA', post_id) for post_id in (1, 2, 3)])
+    monkeypatch.setattr(blog_api, 'http_get', upstream)
+    monkeypatch.setattr(blog_api, '_cache', ResponseCache())
+    monkeypatch.setattr(blog_api, '_validators', ValidatorStore())
+    monkeypatch.setattr(blog_api, '_snapshots', None)
+    monkeypatch.setattr(blog_api, '_post_index', PostIndex())
+    monkeypatch.setattr(blog_api, '_tag_index', TagIndex(max_age=300))
+
+    assert client.get('/blog').status_code == 200
+    calls = len(upstream.calls)
+    assert b'post-3' in client.get('/blog?tag=IA').data
+    # Servido desde el índice de tags
+    assert len(upstream.calls) == calls
+
+    upstream.posts = [post for post in upstream.posts if post['id'] != 3]
+    blog_api.invalidate_blog_cache()
+    client.get('/blog')
+
+    response = client.get('/blog?tag=IA')
+    assert b'post-3' not in response.data
+    assert b'post-2' in response.data
@@ -0,0 +1,60 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from apps import db
+from apps.pages.models import BlogSyncState
+from apps.utils import blog_mirror
+
+
+@pytest.fixture
+def sync_state(app, monkeypatch):
+    """
+    Estado de sincronización vacío y sin el intervalo entre comprobaciones.
+    """
+    monkeypatch.setattr(blog_mirror, '_ready', False)
+    monkeypatch.setattr(blog_mirror, '_ready_checked_at', 0.0)
+    monkeypatch.setattr(blog_mirror, '_READY_RECHECK', 0)
+    monkeypatch.setattr(blog_mirror, 'BLOG_MIRROR_MAX_AGE', 1800)
+
+    with app.app_context():
+        def set_last_sync(last_sync_at):
+            state = BlogSyncState.query.get(1) or BlogSyncState(id=1)
+            state.last_sync_at = last_sync_at
+            db.session.add(state)
+            db.session.commit()
+
+        yield set_last_sync
+        BlogSyncState.query.delete()
+        db.session.commit()
+
+
+def test_mirror_not_ready_until_first_sync(sync_state):
+    assert not blog_mirror.mirror_is_ready()
+
+    sync_state(datetime.utcnow())
+    assert blog_mirror.mirror_is_ready()
+
+
+def test_mirror_stops_being_ready_when_sync_is_too_old(sync_state, monkeypatch):
+    sync_state(datetime.utcnow())
+    assert blog_mirror.mirror_is_ready()
+
+    # `flask blog sync` dejó de ejecutarse: se vuelve a la API
+    sync_state(datetime.utcnow() - timedelta(hours=1))
+    assert not blog_mirror.mirror_is_ready()
+
+    # Sin límite de antigüedad la réplica se sigue usando
+    monkeypatch.setattr(blog_mirror, 'BLOG_MIRROR_MAX_AGE', 0)
+    assert blog_mirror.mirror_is_ready()
+
+
+def test_mirror_state_is_rechecked_at_most_every_interval(sync_state, monkeypatch):
+    sync_state(datetime.utcnow())
+    monkeypatch.setattr(blog_mirror, '_READY_RECHECK', 60)
+    assert blog_mirror.mirror_is_ready()
+
+    sync_state(datetime.utcnow() - timedelta(hours=1))
+    assert blog_mirror.mirror_is_ready()
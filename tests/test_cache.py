@@ -0,0 +1,175 @@
+# -*- encoding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+import requests
+
+from apps.utils import blog_api
+from apps.utils.cache import CACHE_FRESH, CACHE_MISS, CACHE_STALE, ResponseCache, SQLiteCache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteCache('tests', str(tmp_path / 'cache.sqlite3'), ttl=60, stale_ttl=600)
+    return ResponseCache(ttl=60, stale_ttl=600)
+
+
+def test_fresh_stale_and_expired(cache):
+    now = time.time()
+    cache.set('fresca', {'n': 1}, stored_at=now - 10)
+    cache.set('obsoleta', {'n': 2}, stored_at=now - 120)
+    cache.set('caducada', {'n': 3}, stored_at=now - 1000)
+
+    assert cache.get('fresca') == ({'n': 1}, CACHE_FRESH)
+    assert cache.get('obsoleta') == ({'n': 2}, CACHE_STALE)
+    assert cache.get('caducada') == (None, CACHE_MISS)
+    assert cache.get('otra') == (None, CACHE_MISS)
+
+    # La copia caducada sigue disponible como respaldo si la API falla
+    assert cache.get_stale('caducada') == {'n': 3}
+    assert cache.get_stale('otra') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['stale_hits'], stats['misses'], stats['stale_if_error']) == (1, 1, 2, 1)
+
+
+def test_invalidate_by_prefix(cache):
+    cache.set('posts:1', 1)
+    cache.set('posts:2', 2)
+    cache.set('tags', 3)
+
+    assert cache.invalidate('posts:') == 2
+    assert cache.get('posts:1') == (None, CACHE_MISS)
+    assert cache.get('tags') == (3, CACHE_FRESH)
+
+
+def test_values_are_copies():
+    cache = ResponseCache()
+    value = {'posts': [1]}
+    cache.set('k', value)
+    value['posts'].append(2)
+
+    cached, _ = cache.get('k')
+    assert cached == {'posts': [1]}
+    cached['posts'].append(3)
+    assert cache.get('k')[0] == {'posts': [1]}
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') == (None, CACHE_MISS)
+    assert cache.get('a') == (1, CACHE_FRESH)
+    assert cache.get('c') == (3, CACHE_FRESH)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_limit_evicts_and_skips_oversized_values():
+    cache = ResponseCache(max_bytes=40)
+    cache.set('a', 'x' * 25)
+    cache.set('b', 'y' * 25)
+
+    assert cache.get('a') == (None, CACHE_MISS)
+    assert cache.stats()['bytes'] <= 40
+
+    cache.set('enorme', 'z' * 100)
+    assert cache.get('enorme') == (None, CACHE_MISS)
+    assert cache.get('b') == ('y' * 25, CACHE_FRESH)
+
+
+@pytest.fixture
+def blog_cache(monkeypatch):
+    cache = ResponseCache(ttl=60, stale_ttl=600)
+    monkeypatch.setattr(blog_api, '_cache', cache)
+    monkeypatch.setattr(blog_api, '_snapshots', None)
+    return cache
+
+
+def test_stale_entry_is_served_and_refreshed_in_background(app, blog_cache, monkeypatch):
+    refreshed = threading.Event()
+
+    def upstream(path, params, token):
+        refreshed.set()
+        return {'posts': ['nuevo']}, 200
+
+    monkeypatch.setattr(blog_api, '_blog_api_get', upstream)
+    blog_cache.set('/posts', {'posts': ['viejo']}, stored_at=time.time() - 120)
+
+    with app.test_request_context('/blog'):
+        assert blog_api.blog_api_get('/posts', use_cache=True) == ({'posts': ['viejo']}, 200)
+
+    assert refreshed.wait(2)
+    for _ in range(100):
+        if blog_cache.get('/posts')[1] == CACHE_FRESH:
+            break
+        time.sleep(0.01)
+    assert blog_cache.get('/posts') == ({'posts': ['nuevo']}, CACHE_FRESH)
+
+
+def test_expired_entry_is_served_if_upstream_fails(app, blog_cache, monkeypatch):
+    def upstream(path, params, token):
+        raise requests.ConnectionError('API caída')
+
+    monkeypatch.setattr(blog_api, '_blog_api_get', upstream)
+    blog_cache.set('/posts', {'posts': ['viejo']}, stored_at=time.time() - 3600)
+
+    with app.test_request_context('/blog'):
+        assert blog_api.blog_api_get('/posts', use_cache=True) == ({'posts': ['viejo']}, 200)
+        with pytest.raises(requests.ConnectionError):
+            blog_api.blog_api_get('/tags', use_cache=True)
+
+
+def test_refresh_started_before_a_write_is_not_stored(app, blog_cache, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    finished = threading.Event()
+
+    def upstream(path, params, token):
+        started.set()
+        release.wait(2)
+        return {'posts': ['antes de editar']}, 200
+
+    def store(*args):
+        real_store(*args)
+        finished.set()
+
+    real_store = blog_api._store
+    monkeypatch.setattr(blog_api, '_blog_api_get', upstream)
+    monkeypatch.setattr(blog_api, '_store', store)
+    blog_cache.set('/posts', {'posts': ['viejo']}, stored_at=time.time() - 120)
+
+    with app.test_request_context('/blog'):
+        blog_api.blog_api_get('/posts', use_cache=True)
+
+    assert started.wait(2)
+    # Un administrador edita un post mientras el refresco espera a la API
+    blog_api.invalidate_blog_cache()
+    release.set()
+
+    assert finished.wait(2)
+    assert blog_cache.get('/posts') == (None, CACHE_MISS)
+
+
+def test_miss_fetched_before_a_write_is_not_stored(app, blog_cache, monkeypatch):
+    def upstream(path, params, token):
+        blog_api.invalidate_blog_cache()
+        return {'posts': ['antes de editar']}, 200
+
+    monkeypatch.setattr(blog_api, '_blog_api_get', upstream)
+
+    with app.test_request_context('/blog'):
+        assert blog_api.blog_api_get('/posts', use_cache=True) == ({'posts': ['antes de editar']}, 200)
+
+    assert blog_cache.get('/posts') == (None, CACHE_MISS)
+
+    monkeypatch.setattr(blog_api, '_blog_api_get', lambda path, params, token: ({'posts': ['nuevo']}, 200))
+    with app.test_request_context('/blog'):
+        blog_api.blog_api_get('/posts', use_cache=True)
+    assert blog_cache.get('/posts') == ({'posts': ['nuevo']}, CACHE_FRESH)
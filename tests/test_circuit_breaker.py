@@ -0,0 +1,124 @@
+# -*- encoding: utf-8 -*-
+
+import pytest
+import requests
+
+from apps.utils import circuit_breaker
+from apps.utils.circuit_breaker import (CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_HALF_OPEN,
+                                        STATE_OPEN)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse(object):
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('tests', failure_threshold=3, recovery_timeout=30, slow_call_threshold=5,
+                          half_open_max_calls=1)
+
+
+def _fail(*args, **kwargs):
+    raise requests.ConnectionError('API caída')
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(_fail)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(_fail)
+    assert breaker.state == STATE_CLOSED
+
+    # Un éxito reinicia la cuenta
+    breaker.call(FakeResponse)
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == STATE_CLOSED
+
+    breaker.call(lambda: FakeResponse(503))
+    breaker.call(lambda: FakeResponse(502))
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()['last_failure'] == 'HTTP 502'
+
+
+def test_open_circuit_rejects_without_calling(breaker):
+    _open(breaker)
+    calls = []
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+
+    assert not calls
+    assert breaker.stats()['rejected'] == 1
+    # Las vistas tratan el rechazo como cualquier error de red
+    assert issubclass(CircuitOpenError, requests.RequestException)
+
+
+def test_half_open_success_closes(breaker, clock):
+    _open(breaker)
+    clock.now += 30
+
+    assert breaker.call(FakeResponse).status_code == 200
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats()['consecutive_failures'] == 0
+
+
+def test_half_open_failure_reopens(breaker, clock):
+    _open(breaker)
+    clock.now += 30
+
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == STATE_OPEN
+
+    # El tiempo de recuperación vuelve a empezar
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.call(FakeResponse)
+
+
+def test_half_open_allows_a_single_probe(breaker, clock):
+    _open(breaker)
+    clock.now += 30
+
+    def probe():
+        assert breaker.state == STATE_HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(FakeResponse)
+        return FakeResponse()
+
+    breaker.call(probe)
+    assert breaker.state == STATE_CLOSED
+
+
+def test_slow_calls_count_as_failures(breaker, clock):
+    def slow():
+        clock.now += 6
+        return FakeResponse()
+
+    for _ in range(3):
+        assert breaker.call(slow).status_code == 200
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.stats()['slow_calls'] == 3
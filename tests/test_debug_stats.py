@@ -0,0 +1,45 @@
+# -*- encoding: utf-8 -*-
+
+import pytest
+
+
+@pytest.fixture
+def stats_token(app):
+    app.config['DEBUG_STATS_TOKEN'] = 'secreto'
+    yield 'secreto'
+    app.config['DEBUG_STATS_TOKEN'] = None
+
+
+def test_anonymous_visitor_gets_404(client, stats_token):
+    response = client.get('/debug-stats')
+
+    assert response.status_code == 404
+    assert response.headers['Cache-Control'] == 'private, no-store'
+
+
+def test_wrong_or_missing_token_gets_404(client, app):
+    assert client.get('/debug-stats', headers={'X-Debug-Token': ''}).status_code == 404
+
+    app.config['DEBUG_STATS_TOKEN'] = 'secreto'
+    try:
+        assert client.get('/debug-stats', headers={'X-Debug-Token': 'otro'}).status_code == 404
+    finally:
+        app.config['DEBUG_STATS_TOKEN'] = None
+
+
+def test_token_header_shows_stats(client, stats_token):
+    response = client.get('/debug-stats', headers={'X-Debug-Token': stats_token})
+
+    assert response.status_code == 200
+    assert 'page_cache' in response.get_json()
+
+
+def test_portal_admin_sees_stats(client):
+    with client.session_transaction() as session:
+        session['client_portal_token'] = 'token'
+        session['client_portal_user'] = {'role': 'client'}
+    assert client.get('/debug-stats').status_code == 404
+
+    with client.session_transaction() as session:
+        session['client_portal_user'] = {'role': 'admin'}
+    assert client.get('/debug-stats').status_code == 200
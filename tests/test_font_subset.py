@@ -0,0 +1,34 @@
+# -*- encoding: utf-8 -*-
+
+from apps.utils.font_subset import split_statements
+
+
+def test_top_level_rules_and_at_rules():
+    css = '@charset "UTF-8";\n.fa-xmark:before{content:"\\f00d"}\n@media (min-width:1px){.a{x:1}.b{y:2}}'
+
+    assert split_statements(css) == [
+        ('@charset "UTF-8";', '@charset "UTF-8";'),
+        ('.fa-xmark:before', '\n.fa-xmark:before{content:"\\f00d"}'),
+        ('@media (min-width:1px)', '\n@media (min-width:1px){.a{x:1}.b{y:2}}'),
+    ]
+
+
+def test_text_is_preserved():
+    css = '/*! licencia */\n@font-face{font-family:"Font Awesome 6 Free";src:url(../fonts/fa-solid-900.woff2)}\n.fa{a:b}'
+
+    assert ''.join(text for _, text in split_statements(css)) == css
+
+
+def test_braces_in_comments_and_strings_are_ignored():
+    css = '/* { */ .a{color:red}.b[data-x="}"]{content:"{"}.c:after{content:\'\\\'}\'}'
+
+    assert [prelude for prelude, _ in split_statements(css)] == ['.a', '.b[data-x="}"]', '.c:after']
+
+
+def test_comments_are_removed_from_the_prelude():
+    assert split_statements('.a, /* icono */ .b{x:1}') == [('.a,  .b', '.a, /* icono */ .b{x:1}')]
+
+
+def test_unbalanced_braces_do_not_swallow_the_stylesheet():
+    assert split_statements('.a{x:1}}.b{y:2}') == [('.a', '.a{x:1}'), ('', '}'), ('.b', '.b{y:2}')]
+    assert split_statements('.a{x:1}.b{y:2') == [('.a', '.a{x:1}'), ('', '.b{y:2')]
@@ -0,0 +1,75 @@
+# -*- encoding: utf-8 -*-
+
+from flask import session
+
+from apps.utils.compression import etag_for_encoding
+from apps.utils.http_cache import NO_STORE, not_modified, page_etag
+
+
+def test_public_page_is_cacheable_and_varies_on_cookie(client):
+    response = client.get('/terminos')
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'].startswith('public, max-age=')
+    assert 'Cookie' in response.vary
+    assert response.get_etag()[0]
+
+
+def test_not_found_is_never_stored(client):
+    response = client.get('/wp-login.php')
+
+    assert response.status_code == 404
+    assert response.headers['Cache-Control'] == NO_STORE
+    assert 'Cookie' not in response.vary
+
+
+def test_redirect_is_never_stored(client):
+    # Endpoint público que redirige al listado
+    response = client.get('/blog/search')
+
+    assert 300 <= response.status_code < 400
+    assert response.headers['Cache-Control'] == NO_STORE
+
+
+def test_if_none_match_returns_304_with_page_policy(client):
+    etag = client.get('/terminos').get_etag()[0]
+
+    response = client.get('/terminos', headers={'If-None-Match': '"{}"'.format(etag)})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['Cache-Control'].startswith('public, max-age=')
+    assert 'Cookie' in response.vary
+
+
+def test_page_etag_depends_on_data_path_and_session(app):
+    with app.test_request_context('/blog?page=1'):
+        etag = page_etag('post', '2024-01-01')
+        assert page_etag('post', '2024-01-01') == etag
+        assert page_etag('post', '2024-02-01') != etag
+        session['client_portal_token'] = 'token'
+        assert page_etag('post', '2024-01-01') != etag
+
+    with app.test_request_context('/blog?page=2'):
+        assert page_etag('post', '2024-01-01') != etag
+
+
+def test_not_modified_only_when_client_has_the_version(app):
+    with app.test_request_context('/blog'):
+        etag = page_etag('listado')
+
+    with app.test_request_context('/blog'):
+        assert not_modified(etag) is None
+
+    with app.test_request_context('/blog', headers={'If-None-Match': '"otro"'}):
+        assert not_modified(etag) is None
+
+    with app.test_request_context('/blog', headers={'If-None-Match': '"{}"'.format(etag)}):
+        assert not_modified(etag).status_code == 304
+
+    # Versión comprimida guardada por el navegador
+    compressed = etag_for_encoding(etag, 'br')
+    with app.test_request_context('/blog', headers={'If-None-Match': '"{}"'.format(compressed)}):
+        response = not_modified(etag)
+        assert response.status_code == 304
+        assert response.get_etag()[0] == compressed
@@ -0,0 +1,47 @@
+# -*- encoding: utf-8 -*-
+
+import pytest
+
+from apps.utils.freeze import collect_routes
+from apps.utils.page_registry import EXCLUDED_PAGES, page_slugs, resolve_page
+
+
+@pytest.mark.parametrize('slug', sorted(EXCLUDED_PAGES))
+def test_excluded_templates_are_not_pages(app, client, slug):
+    with app.app_context():
+        assert resolve_page(slug) is None
+        assert resolve_page(slug + '.html') is None
+
+    response = client.get('/{}.html'.format(slug))
+    assert response.status_code == 404
+
+
+def test_excluded_pages_exist_in_templates(app):
+    # Los nombres excluidos corresponden a plantillas reales de pages/
+    templates = {name[len('pages/'):-len('.html')] for name in app.jinja_env.list_templates()
+                 if name.startswith('pages/')}
+    assert EXCLUDED_PAGES <= templates
+
+
+def test_content_pages_are_served(app, client):
+    with app.app_context():
+        assert resolve_page('about') == 'pages/about.html'
+        assert resolve_page('about.html') == 'pages/about.html'
+
+    assert client.get('/about').status_code == 200
+
+
+def test_not_found_page_uses_404_template(client):
+    response = client.get('/no-existe.php')
+
+    assert response.status_code == 404
+    assert response.headers['X-Page-Cache'] == '404'
+
+
+def test_freeze_skips_excluded_pages(app):
+    with app.test_request_context():
+        routes = collect_routes(app, blog=False)
+
+    assert '/about' in routes
+    assert not {'/' + slug for slug in EXCLUDED_PAGES} & set(routes)
+    assert page_slugs().isdisjoint(EXCLUDED_PAGES)
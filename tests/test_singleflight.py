@@ -0,0 +1,167 @@
+# -*- encoding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+
+from apps.utils.singleflight import SingleFlight, request_key
+
+WAITERS = 4
+
+
+def _run_concurrently(flight, key, fn):
+    """
+    Lanza WAITERS llamadas a `flight.do` mientras `fn` está en curso.
+    """
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(WAITERS)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_for_waiters(flight):
+    for _ in range(500):
+        if flight.stats()['coalesced'] == WAITERS:
+            return
+        time.sleep(0.002)
+    pytest.fail('las llamadas no llegaron a agruparse')
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return {'posts': [1]}
+
+    leader = threading.Thread(target=lambda: flight.do('k', fetch))
+    leader.start()
+    started.wait(2)
+
+    threads, results, errors = _run_concurrently(flight, 'k', fetch)
+    _wait_for_waiters(flight)
+    release.set()
+    for thread in [leader] + threads:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert results == [{'posts': [1]}] * WAITERS
+    assert not errors
+    # Cada hilo recibe su propia copia
+    assert len({id(result) for result in results}) == WAITERS
+    assert flight.stats() == {'executed': 1, 'coalesced': WAITERS, 'in_flight': 0}
+
+
+def test_error_is_raised_to_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(2)
+        raise ValueError('API caída')
+
+    leader_errors = []
+
+    def leader():
+        try:
+            flight.do('k', fetch)
+        except ValueError as e:
+            leader_errors.append(e)
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    started.wait(2)
+
+    threads, results, errors = _run_concurrently(flight, 'k', fetch)
+    _wait_for_waiters(flight)
+    release.set()
+    for thread in [leader_thread] + threads:
+        thread.join(2)
+
+    assert not results
+    assert len(errors) == WAITERS and len(leader_errors) == 1
+    assert all(isinstance(e, ValueError) for e in errors)
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+
+    assert flight.do('k', lambda: 1) == 1
+    assert flight.do('k', lambda: 2) == 2
+    assert flight.stats()['executed'] == 2
+
+
+def test_request_key_separates_identities_and_ignores_param_order():
+    url = 'https://blog.example.com/api/posts'
+
+    assert request_key('GET', url, {'page': 1, 'limit': 9}) == request_key('GET', url, {'limit': 9, 'page': 1})
+    assert request_key('GET', url, {'page': 1}) != request_key('GET', url, {'page': 2})
+    assert request_key('GET', url, token='a') != request_key('GET', url, token='b')
+    assert request_key('GET', url, token='a') != request_key('GET', url)
+    assert 'secreto' not in request_key('GET', url, token='secreto')
+
+
+class _SlowCopy(object):
+    """
+    Objeto cuya copia, fuera del hilo líder, espera a que el líder modifique su resultado.
+    """
+
+    def __init__(self, leader, mutated):
+        self.leader = leader
+        self.mutated = mutated
+
+    def __deepcopy__(self, memo):
+        if threading.current_thread() is not self.leader[0]:
+            self.mutated.wait(2)
+        return _SlowCopy(self.leader, self.mutated)
+
+
+def test_leader_can_mutate_its_result_while_waiters_copy():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+    mutated = threading.Event()
+    leader_ref = []
+
+    def fetch():
+        started.set()
+        release.wait(2)
+        # La copia se hace antes que la de los posts (orden de inserción del dict)
+        return {'copy': _SlowCopy(leader_ref, mutated), 'posts': [{'title': 'original'}]}
+
+    def leader():
+        result = flight.do('k', fetch)
+        # Las vistas preparan los posts para la plantilla sobre el mismo dict
+        result['posts'][0]['title'] = 'modificado'
+        result['posts'].append({'title': 'extra'})
+        mutated.set()
+
+    leader_thread = threading.Thread(target=leader)
+    leader_ref.append(leader_thread)
+    leader_thread.start()
+    started.wait(2)
+
+    threads, results, errors = _run_concurrently(flight, 'k', fetch)
+    _wait_for_waiters(flight)
+    release.set()
+    for thread in [leader_thread] + threads:
+        thread.join(3)
+
+    assert not errors
+    assert [result['posts'] for result in results] == [[{'title': 'original'}]] * WAITERS